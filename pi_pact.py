@@ -6,24 +6,43 @@ Execution of a BLE beacon for use in BWSI PiPact independent project.
 Configuration of beacon done via external YAML. Underlying functionality 
 provided by PyBluez module (https://github.com/pybluez/pybluez). Beacon 
 uses iBeacon format (https://en.wikipedia.org/wiki/IBeacon).
+
+Modules only used while scanning, e.g. pandas, are imported on first use, so
+the advertiser starts without loading them.
 """
 
+from __future__ import annotations  # Note: annotations such as pd.DataFrame do not import pandas
 import argparse
-from bluetooth.ble import BeaconService
 from datetime import datetime
 from itertools import zip_longest
+import json
 import logging
 import logging.config
 import logging.handlers
+import math
 import os
-import pandas as pd
 from pathlib import Path
-from sense_hat import SenseHat
+from pi_pact_backend import BACKENDS, create_backend
+from pi_pact_control import ControlChannel
+from pi_pact_imports import lazy_import
+from pi_pact_logging import RateLimitFilter, start_queue, stop_queue
+from pi_pact_metrics import Metrics, MetricsExporter, write_atomic
 import sys
+import threading
 import time
 from typing import *
 from uuid import uuid1
-import yaml
+
+# Imported on first use
+asyncio = lazy_import('asyncio')
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+pi_pact_adapters = lazy_import('pi_pact_adapters')
+pi_pact_filters = lazy_import('pi_pact_filters')
+pi_pact_inference = lazy_import('pi_pact_inference')
+pi_pact_smoothing = lazy_import('pi_pact_smoothing')
+pi_pact_state = lazy_import('pi_pact_state')
+yaml = lazy_import('yaml')
 
 # Default configuration
 
@@ -31,24 +50,50 @@ LOG_NAME = 'pi_pact.log'
 DEFAULT_CONFIG: dict = {
     'advertiser': {
         'control_file': "advertiser_control",
+        'control_socket': "advertiser_control.sock",
         'timeout': None,
         'uuid': '',
         'major': 1,
         'minor': 1,
         'tx_power': 1,
-        'interval': 200
+        'interval': 200,
+        'metrics_file': None,
+        'metrics_port': None
     },
     'scanner': {
         'control_file': "scanner_control",
+        'control_socket': "scanner_control.sock",
         'scan_prefix': "pi_pact_scan",
         'timeout': None,
         'revisit': 1,
+        'engine': 'blocking',
+        'adapters': ['hci0'],
+        'stagger': False,
         'distance': 0.2,
+        'backend': 'hardware',
+        'replay_path': 'indoor-noObstruct-SenseHat-rssi-distance-data',
+        'replay_speed': 1,
         'use_sense_hat': True,
-        'filters': {'ADDRESS': 'DC:A6:32:33:E9:E9', 'PRESSURE': [900, 1500]}
+        'sense_hat_rate': 10,
+        'stream': False,
+        'flush_interval': 10,
+        'segment_size': None,
+        'segment_interval': None,
+        'retention': None,
+        'output_format': 'csv',
+        'filters': {'ADDRESS': 'DC:A6:32:33:E9:E9', 'PRESSURE': [900, 1500]},
+        'state_window': 16,
+        'state_ttl': None,
+        'state_memory': 8,
+        'smoothing': None,
+        'model': None,
+        'metrics_file': None,
+        'metrics_port': None
     },
     'logger': {
         'name': LOG_NAME,
+        'queue': False,
+        'rate_limit': None,
         'config': {
             'version': 1,
             'formatters': {
@@ -84,8 +129,11 @@ DEFAULT_CONFIG: dict = {
 
 # Universal settings
 BLE_DEVICE = "hci0"
-CONTROL_INTERVAL = 1  # (s)
+CONTROL_INTERVAL = 1  # (s) Control file polling interval when inotify is unavailable
 MAX_TIMEOUT = 600  # (s)
+MIN_REVISIT = 0.1  # (s)
+ENGINES = ['blocking', 'asyncio']
+SENSE_HAT_RETENTION = 600  # (s) Sense HAT samples retained while scanning
 ID_FILTERS = ['ADDRESS', 'UUID', 'MAJOR', 'MINOR', 'TX POWER']
 MEASUREMENT_FILTERS = ['TIMESTAMP', 'RSSI', 'DISTANCE', 'TEMPERATURE',
                        'HUMIDITY', 'PRESSURE', 'PITCH', 'ROLL', 'YAW']
@@ -97,6 +145,18 @@ TX_POWER_LIMITS = [-40, 4]
 INTERVAL_LIMITS = [20, 10000]  # (ms)
 DISTANCE_LIMITS = [0, 20000]  # (m)
 ALLOWABLE_FILTERS = ID_FILTERS + MEASUREMENT_FILTERS
+RECONFIGURABLE = {'advertiser': ['uuid', 'major', 'minor', 'tx_power', 'interval'],
+                  'scanner': ['revisit', 'distance', 'flush_interval', 'filters']}
+ADVERTISEMENT_COLUMNS = ['ADDRESS', 'TIMESTAMP', 'UUID', 'MAJOR', 'MINOR',
+                         'TX POWER', 'RSSI', 'DISTANCE']
+# Buffered advertisement column types. ADDRESS, UUID, and ADAPTER are category codes.
+ADVERTISEMENT_DTYPES = {'ADDRESS': 'int32', 'TIMESTAMP': 'datetime64[ns]', 'UUID': 'int32',
+                        'MAJOR': 'uint16', 'MINOR': 'uint16',
+                        'TX POWER': 'int16',  # Note: received as either a signed or unsigned byte
+                        'RSSI': 'int8', 'ADAPTER': 'int8'}
+SENSE_HAT_COLUMNS = ['TEMPERATURE', 'HUMIDITY', 'PRESSURE', 'PITCH', 'ROLL', 'YAW']
+OUTPUT_SUFFIXES = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+MANIFEST_SUFFIX = '_manifest.yml'
 
 
 # noinspection PyAttributeOutsideInit
@@ -105,6 +165,8 @@ class Advertiser(object):
     
     Attributes:
         control_file (pathlib.Path): BLE beacon advertiser control file path.
+        control_socket (pathlib.Path): BLE beacon advertiser control socket
+            path.
         timeout (float, int): BLE beacon advertiser timeout (s). Must be 
             strictly positive and less than 600.
         uuid (str): BLE beacon advertiser UUID. Must be 32 hexadecimal digits 
@@ -116,6 +178,11 @@ class Advertiser(object):
             [-40, 4].
         interval (int): BLE beacon advertiser interval (ms) value. Must be in 
             [20, 10000].
+        metrics_file (pathlib.Path): Prometheus text format file to which
+            advertising metrics are exported while advertising, with a JSON
+            summary written next to it when advertising stops, or None.
+        metrics_port (int): Port of a local HTTP endpoint serving advertising
+            metrics at /metrics while advertising, or None.
     """
 
     def __init__(self, logger: logging.Logger, **kwargs):
@@ -137,7 +204,7 @@ class Advertiser(object):
                                     f"configuration {key}: {value}.")  # Note: Uses Default Config
                 setattr(self, key, value)
         # Create beacon
-        self.__service: BeaconService = BeaconService(BLE_DEVICE)
+        self.__service = create_backend('hardware').beacon_service(BLE_DEVICE)
         self.__logger.info("Initialized beacon advertiser.")
 
     def __del__(self):
@@ -168,6 +235,22 @@ class Advertiser(object):
                 f.write("0")
             self.__control_file_handle = None
 
+    @property
+    def control_socket(self) -> Path:
+        """BLE beacon advertiser control socket path getter."""
+        return self.__control_socket
+
+    @control_socket.setter
+    def control_socket(self, value: str):
+        """BLE beacon advertiser control socket path setter.
+
+        Raises:
+            TypeError: Beacon advertiser control socket must be a string.
+        """
+        if not isinstance(value, str):
+            raise TypeError("Beacon advertiser control socket must be a string.")
+        self.__control_socket: Path = Path(value).resolve()
+
     @property
     def timeout(self) -> Union[float, int]:
         """BLE beacon advertiser timeout getter."""
@@ -296,13 +379,78 @@ class Advertiser(object):
                              f"{INTERVAL_LIMITS}.")
         self.__interval = value
 
+    @property
+    def metrics_file(self) -> Optional[Path]:
+        """BLE beacon advertiser metrics file path getter."""
+        return self.__metrics_file
+
+    @metrics_file.setter
+    def metrics_file(self, value: Optional[str]):
+        """BLE beacon advertiser metrics file path setter.
+
+        Raises:
+            TypeError: Beacon advertiser metrics file must be a string or NoneType.
+        """
+        if value is not None and not isinstance(value, str):
+            raise TypeError("Beacon advertiser metrics file must be a string or NoneType.")
+        self.__metrics_file: Optional[Path] = Path(value).resolve() if value is not None else None
+
+    @property
+    def metrics_port(self) -> Optional[int]:
+        """BLE beacon advertiser metrics port getter."""
+        return self.__metrics_port
+
+    @metrics_port.setter
+    def metrics_port(self, value: Optional[int]):
+        """BLE beacon advertiser metrics port setter.
+
+        Raises:
+            TypeError: Beacon advertiser metrics port must be an integer or NoneType.
+            ValueError: Beacon advertiser metrics port must be in [1, 65535].
+        """
+        if value is not None:
+            if not isinstance(value, int):
+                raise TypeError("Beacon advertiser metrics port must be an integer or NoneType.")
+            elif not 1 <= value <= 65535:
+                raise ValueError("Beacon advertiser metrics port must be in [1, 65535].")
+        self.__metrics_port = value
+
+    def __open_metrics(self) -> Tuple[Metrics, Optional[MetricsExporter]]:
+        """Create the metrics of one run and, if exported, their exporter."""
+        enabled = self.metrics_file is not None or self.metrics_port is not None
+        metrics = Metrics('advertiser', enabled)
+        if not enabled:
+            return metrics, None
+        return metrics, MetricsExporter(metrics, self.metrics_file, self.metrics_port)
+
+    def configure(self, settings: Dict[str, Any]):
+        """Reconfigure BLE beacon advertiser settings.
+
+        Takes effect immediately if advertising.
+
+        Args:
+            settings (dict): Settings keyed by attribute name. Must be one of
+                {'uuid', 'major', 'minor', 'tx_power', 'interval'}.
+
+        Raises:
+            KeyError: Beacon advertiser setting must be reconfigurable.
+        """
+        for key in settings:
+            if key not in RECONFIGURABLE['advertiser']:
+                raise KeyError("Beacon advertiser setting must be one of "
+                               f"reconfigurable settings {RECONFIGURABLE['advertiser']}.")
+        for key, value in settings.items():
+            setattr(self, key, value)
+        self.__restart = True
+
     def advertise(self, timeout=0):
         """Execute BLE beacon advertisement.
         
         Args:
             timeout (int, float): Time (s) for which to advertise beacon. If
                 specified as None then advertises till user commanded stop via
-                control file. Defaults to configuration value.
+                control socket, signal, or control file. Defaults to
+                configuration value.
         """
         # Parse inputs
         if timeout == 0:
@@ -313,30 +461,338 @@ class Advertiser(object):
         # Start advertising
         self.__logger.info("Starting beacon advertiser with timeout "
                            f"{timeout}.")
-        self.__service.start_advertising(self.uuid, self.major, self.minor,
-                                         self.tx_power, self.interval)  # Note: calls each aforementioned property.
-        # Stop advertising based on either timeout or control file
         start_time = time.monotonic()
-        self.__control_file_handle: IO[str] = self.__control_file.open(mode='r+')  # Note: open for reading and updating
-        run = True
-        while run:
-            time.sleep(CONTROL_INTERVAL)
-            if timeout is not None:
-                if (time.monotonic() - start_time) > timeout:
-                    self.__logger.debug("Beacon advertiser timed out.")
-                    run = False
-            self.__control_file_handle.seek(0)
-            control_flag = self.__control_file_handle.read()
-            if control_flag != "0":
-                self.__logger.debug("Beacon advertiser control flag set to "
-                                    "stop.")
-                run = False
-        self.__logger.info("Stopping beacon advertiser.")
-        self.__service.stop_advertising()
-        # Cleanup
-        self.__control_file_handle.close()
-        with self.__control_file.open('w') as f:
-            f.write("0")
+        channel = ControlChannel(
+            self.__logger, self.control_socket, self.__control_file,
+            status=lambda: {'mode': 'advertiser', 'elapsed': time.monotonic() - start_time,
+                            'uuid': self.uuid, 'major': self.major, 'minor': self.minor,
+                            'tx_power': self.tx_power, 'interval': self.interval},
+            configure=self.configure, poll_interval=CONTROL_INTERVAL)
+        metrics, exporter = self.__open_metrics()
+        if exporter is not None:
+            exporter.start()
+        channel.start()
+        advertising = False
+        self.__restart = False
+        try:
+            # Stop advertising based on either timeout or control command
+            while True:
+                latency = channel.acknowledge()
+                if latency is not None:
+                    metrics.observe('control_latency_seconds', latency)
+                if channel.stopped:
+                    self.__logger.debug("Beacon advertiser control flag set to "
+                                        "stop.")
+                    break
+                remaining = None
+                if timeout is not None:
+                    remaining = timeout - (time.monotonic() - start_time)
+                    if remaining <= 0:
+                        self.__logger.debug("Beacon advertiser timed out.")
+                        break
+                if advertising and channel.paused:
+                    self.__logger.info("Pausing beacon advertiser.")
+                    self.__service.stop_advertising()
+                    advertising = False
+                elif advertising and self.__restart:
+                    self.__logger.info("Restarting beacon advertiser with new "
+                                       "configuration.")
+                    self.__service.stop_advertising()
+                    advertising = False
+                if not advertising and not channel.paused:
+                    self.__restart = False
+                    start_advertising = time.perf_counter()
+                    self.__service.start_advertising(self.uuid, self.major, self.minor,
+                                                     self.tx_power, self.interval)  # Note: calls each aforementioned property.
+                    metrics.increment('starts_total')
+                    metrics.observe('start_duration_seconds', time.perf_counter() - start_advertising)
+                    advertising = True
+                channel.wait(remaining)
+        finally:
+            self.__logger.info("Stopping beacon advertiser.")
+            if advertising:
+                self.__service.stop_advertising()
+            # Cleanup
+            channel.close()
+            with self.__control_file.open('w') as f:
+                f.write("0")
+            if exporter is not None:
+                self.__logger.info(f"Beacon advertiser metrics: {json.dumps(exporter.close())}")
+
+
+class ScanWriter(object):
+    """Incrementally appends processed advertisements to a scan output file.
+
+    Rows are numbered continuously across writes so the SCAN column matches
+    the output of a single non-streamed write. The file is flushed and synced
+    to disk at most every flush interval so that data collected before a
+    crash or power loss survives.
+
+    Attributes:
+        scan_file (pathlib.Path): Scan output file path.
+        flush_interval (float, int): Interval (s) between syncs to disk.
+        rows (int): Number of advertisements written so far.
+        bytes (int): Number of bytes written so far, including output not
+            yet synced to disk.
+    """
+
+    def __init__(self, scan_file: Path, flush_interval: Union[float, int]):
+        """Instance initialization.
+
+        Args:
+            scan_file (pathlib.Path): Scan output file path. Any existing file
+                is overwritten.
+            flush_interval (float, int): Interval (s) between syncs to disk.
+        """
+        self.scan_file: Path = Path(scan_file)
+        self.flush_interval: Union[float, int] = flush_interval
+        self.rows: int = 0
+        self.bytes: int = 0
+        self.__handle: IO[str] = self.scan_file.open(mode='w', newline='')
+        self.__last_sync: float = time.monotonic()
+
+    def write(self, advertisements: pd.DataFrame):
+        """Append advertisements to the scan output file.
+
+        The header is written along with the first batch, even if empty.
+
+        Args:
+            advertisements (pandas.DataFrame): Processed and filtered
+                advertisements with a default integer index.
+        """
+        advertisements = advertisements.set_axis(
+            range(self.rows, self.rows + len(advertisements)), axis=0)
+        advertisements.to_csv(self.__handle, header=(self.bytes == 0),
+                              index_label='SCAN')
+        self.rows += len(advertisements)
+        self.bytes = self.__handle.tell()  # Note: byte offset, as CSV output is ASCII
+        if (time.monotonic() - self.__last_sync) >= self.flush_interval:
+            self.sync()
+
+    def sync(self):
+        """Flush buffered output and sync it to disk."""
+        self.__handle.flush()
+        os.fsync(self.__handle.fileno())
+        self.__last_sync = time.monotonic()
+
+    def close(self):
+        """Sync and close the scan output file."""
+        if not self.__handle.closed:
+            self.sync()
+            self.__handle.close()
+
+
+class SenseHatSampler(object):
+    """Samples Sense HAT measurements in a background thread.
+
+    Each sample reads temperature, humidity, pressure, and orientation once
+    and is stored with its timestamp in a fixed size ring buffer. Received
+    advertisements are then joined to the nearest sample by timestamp, so
+    measurements line up with the scan they belong to and no sensor reads
+    happen during post-processing.
+
+    Attributes:
+        rate (float, int): Sampling rate (Hz).
+        capacity (int): Number of most recent samples retained.
+    """
+
+    def __init__(self, sense_hat, rate: Union[float, int], capacity: int):
+        """Instance initialization.
+
+        Args:
+            sense_hat (sense_hat.SenseHat): Sense HAT to sample.
+            rate (float, int): Sampling rate (Hz).
+            capacity (int): Number of most recent samples retained.
+        """
+        self.rate: Union[float, int] = rate
+        self.capacity: int = capacity
+        self.__sense_hat = sense_hat
+        self.__timestamps: np.ndarray = np.zeros(capacity, dtype=np.int64)  # Note: datetime64[ns] as integers
+        self.__values: np.ndarray = np.full((capacity, len(SENSE_HAT_COLUMNS)), np.nan)
+        self.__count: int = 0
+        self.__lock: threading.Lock = threading.Lock()
+        self.__stop: threading.Event = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Take an initial sample and start background sampling."""
+        self.sample()
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, name='SenseHatSampler', daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """Stop background sampling. Retained samples remain available."""
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self):
+        """Background sampling loop."""
+        period = 1 / self.rate
+        next_time = time.monotonic() + period
+        while not self.__stop.wait(max(0.0, next_time - time.monotonic())):
+            self.sample()
+            next_time += period
+
+    def sample(self):
+        """Read the Sense HAT once and store the sample."""
+        orientation = self.__sense_hat.get_orientation()
+        values = (self.__sense_hat.get_temperature(), self.__sense_hat.get_humidity(),
+                  self.__sense_hat.get_pressure(), orientation['pitch'], orientation['roll'],
+                  orientation['yaw'])
+        timestamp = np.datetime64(datetime.now(), 'ns').astype(np.int64)
+        with self.__lock:
+            index = self.__count % self.capacity
+            self.__timestamps[index] = timestamp
+            self.__values[index] = values
+            self.__count += 1
+
+    def nearest(self, timestamps: np.ndarray) -> np.ndarray:
+        """Look up the retained sample nearest in time to each timestamp.
+
+        Args:
+            timestamps (numpy.ndarray): Timestamps as datetime64[ns].
+
+        Returns:
+            Array of shape (len(timestamps), len(SENSE_HAT_COLUMNS)) with the
+            values of the nearest sample for each timestamp.
+        """
+        if self.__count == 0:
+            self.sample()
+        targets = np.asarray(timestamps, dtype='datetime64[ns]').astype(np.int64)
+        with self.__lock:
+            if self.__count < self.capacity:
+                sample_times = self.__timestamps[:self.__count].copy()
+                sample_values = self.__values[:self.__count].copy()
+            else:
+                start = self.__count % self.capacity  # Note: oldest sample
+                sample_times = np.roll(self.__timestamps, -start)
+                sample_values = np.roll(self.__values, -start, axis=0)
+        if len(sample_times) == 1:
+            return np.repeat(sample_values, len(targets), axis=0)
+        right = np.clip(np.searchsorted(sample_times, targets), 1, len(sample_times) - 1)
+        left = right - 1
+        closest = np.where(targets - sample_times[left] <= sample_times[right] - targets, left, right)
+        return sample_values[closest]
+
+
+class AdvertisementBuffer(object):
+    """Accumulates received advertisements in growable typed column buffers.
+
+    Each column is a numpy array of compact type which doubles in capacity
+    when full, so appending a scan costs a few slice assignments rather than
+    one Python object per advertisement. Addresses, UUIDs, and adapters are
+    stored as integer codes into their distinct values and become categorical
+    columns. Sense HAT values following a payload, as replayed by the replay
+    backend, are buffered along with it.
+
+    Attributes:
+        rows (int): Number of advertisements appended so far.
+        adapter_column (bool): Whether the adapter which received each scan
+            is recorded in an ADAPTER column.
+    """
+
+    def __init__(self, capacity: int = 1024, adapter_column: bool = False):
+        """Instance initialization.
+
+        Args:
+            capacity (int): Initial number of advertisements that fit without
+                growing the buffers.
+            adapter_column (bool): Record the adapter which received each
+                scan in an ADAPTER column.
+        """
+        self.rows: int = 0
+        self.adapter_column: bool = adapter_column
+        self.__address_codes: Dict[str, int] = {}
+        self.__uuid_codes: Dict[str, int] = {}
+        self.__adapter_codes: Dict[str, int] = {}
+        self.__columns: Dict[str, np.ndarray] = {
+            name: np.empty(capacity, dtype=dtype) for name, dtype in ADVERTISEMENT_DTYPES.items()}
+        self.__environment: Optional[np.ndarray] = None  # Note: allocated once Sense HAT values are appended
+
+    @property
+    def environment(self) -> Optional[np.ndarray]:
+        """Sense HAT values appended with the advertisements.
+
+        Array of shape (rows, len(SENSE_HAT_COLUMNS)) in float32, with NaN
+        for advertisements appended without them, or None if none were.
+        """
+        return None if self.__environment is None else self.__environment[:self.rows]
+
+    def __reserve(self, rows: int):
+        """Grow the buffers, if needed, to fit the given number of additional rows."""
+        capacity = len(self.__columns['ADDRESS'])
+        if self.rows + rows <= capacity:
+            return
+        capacity = max(2 * capacity, self.rows + rows)
+        for name, column in self.__columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.rows] = column[:self.rows]
+            self.__columns[name] = grown
+        if self.__environment is not None:
+            grown = np.full((capacity, len(SENSE_HAT_COLUMNS)), np.nan, dtype=np.float32)
+            grown[:self.rows] = self.__environment[:self.rows]
+            self.__environment = grown
+
+    def append(self, scan: Mapping[str, Sequence[Any]], timestamp: datetime, adapter: Optional[str] = None):
+        """Append every advertisement received in one scan.
+
+        Args:
+            scan (dict): Received advertisements keyed by address. Each value
+                is the payload [UUID, MAJOR, MINOR, TX POWER, RSSI],
+                optionally followed by the Sense HAT values recorded with it
+                in the order of SENSE_HAT_COLUMNS.
+            timestamp (datetime.datetime): Timestamp of the scan.
+            adapter (str): Bluetooth adapter which received the scan.
+                Required if recording the ADAPTER column.
+        """
+        rows = len(scan)
+        if rows == 0:
+            return
+        self.__reserve(rows)
+        start, end = self.rows, self.rows + rows
+        uuids, majors, minors, tx_powers, rssis, *environment = zip(*scan.values())
+        if environment:
+            if self.__environment is None:
+                self.__environment = np.full((len(self.__columns['ADDRESS']), len(SENSE_HAT_COLUMNS)), np.nan,
+                                             dtype=np.float32)
+            self.__environment[start:end] = np.array(environment, dtype=np.float32).T
+        columns = self.__columns
+        columns['ADDRESS'][start:end] = [self.__address_codes.setdefault(address, len(self.__address_codes))
+                                         for address in scan]
+        columns['TIMESTAMP'][start:end] = np.datetime64(timestamp, 'ns')
+        columns['UUID'][start:end] = [self.__uuid_codes.setdefault(uuid, len(self.__uuid_codes))
+                                      for uuid in uuids]
+        columns['MAJOR'][start:end] = majors
+        columns['MINOR'][start:end] = minors
+        columns['TX POWER'][start:end] = tx_powers
+        columns['RSSI'][start:end] = rssis
+        if self.adapter_column:
+            columns['ADAPTER'][start:end] = self.__adapter_codes.setdefault(adapter, len(self.__adapter_codes))
+        self.rows = end
+
+    def to_frame(self, distance: Union[float, int]) -> pd.DataFrame:
+        """Build the advertisements DataFrame from the buffered columns.
+
+        Args:
+            distance (float, int): Distance (m) between advertiser and scanner
+                recorded with every advertisement.
+
+        Returns:
+            Advertisements with ADVERTISEMENT_COLUMNS, followed by ADAPTER if
+            recorded, with categorical ADDRESS, UUID, and ADAPTER, and narrow
+            numeric types.
+        """
+        columns = {name: column[:self.rows] for name, column in self.__columns.items()}
+        columns['ADDRESS'] = pd.Categorical.from_codes(columns['ADDRESS'], categories=list(self.__address_codes))
+        columns['UUID'] = pd.Categorical.from_codes(columns['UUID'], categories=list(self.__uuid_codes))
+        columns['DISTANCE'] = np.full(self.rows, distance, dtype=np.float32)
+        if not self.adapter_column:
+            return pd.DataFrame(columns, columns=ADVERTISEMENT_COLUMNS, copy=False)
+        columns['ADAPTER'] = pd.Categorical.from_codes(columns['ADAPTER'], categories=list(self.__adapter_codes))
+        return pd.DataFrame(columns, columns=ADVERTISEMENT_COLUMNS + ['ADAPTER'], copy=False)
 
 
 # noinspection PyAttributeOutsideInit
@@ -345,12 +801,68 @@ class Scanner(object):
     
     Attributes:
         control_file (pathlib.Path): BLE beacon scanner control file path.
+        control_socket (pathlib.Path): BLE beacon scanner control socket path.
         timeout (float, int): BLE beacon scanner timeout (s). Must be strictly
-            positive and less than 600.
-        revisit (int): BLE beacon scanner revisit interval (s). Must be 
-            strictly positive.
+            positive. None scans until stopped by a control command.
+        revisit (float, int): BLE beacon scanner revisit interval (s). Must be
+            at least 0.1. PyBluez scans last whole seconds, so sub-second
+            revisit intervals of the hardware backend require the asyncio
+            engine.
+        engine (str): Scanning engine. Must be one of {'blocking',
+            'asyncio'}.
+        adapters (list): Bluetooth adapters to scan on, e.g. ['hci0']. With
+            more than one adapter each scans in its own worker process and
+            advertisements are tagged with an ADAPTER column.
+        stagger (bool): Toggles offsetting the scans of multiple adapters
+            evenly over one revisit interval.
+        backend (str): Source of scans and Sense HAT measurements. Must be
+            one of {'hardware', 'replay'}.
+        replay_path (str): Recorded scan file, folder, or glob pattern
+            replayed by the replay backend.
+        replay_speed (float, int): Replay speed relative to real time. Must be
+            strictly positive. Infinity replays as fast as possible.
+        sense_hat_rate (float, int): Rate (Hz) at which the Sense HAT is
+            sampled while scanning. Must be strictly positive.
+        stream (bool): Toggles streaming mode, in which each scan is
+            appended to the scan output file as soon as it is processed and
+            filtered instead of kept in memory until scanning stops.
+        flush_interval (float, int): Interval (s) at which streamed scan output
+            is flushed and synced to disk. Must be strictly positive.
+        segment_size (float, int): Size (MiB) at which streamed scan output
+            starts a new segment file. Must be strictly positive or None.
+        segment_interval (float, int): Time (s) after which streamed scan
+            output starts a new segment file. Must be strictly positive or
+            None. Segmented output implies streaming mode.
+        retention (float, int): Total size (MiB) of segment files retained on
+            disk, beyond which the oldest are deleted. Must be strictly
+            positive or None.
+        output_format (str): Scan output file format. Must be one of {'csv',
+            'parquet', 'arrow'}. Columnar formats require pyarrow.
         filters (dict): Filters to apply to received beacons. Available
             filters/keys are {'address', 'uuid', 'major', 'minor'}.
+        state_window (int): Number of most recent samples retained per beacon
+            in the state table. Must be strictly positive.
+        state_ttl (float, int): Time (s) after which a beacon not seen is
+            evicted from the state table. Must be strictly positive or None.
+        state_memory (float, int): Memory cap (MiB) of the state table,
+            including the smoother state of each beacon, which evicts the
+            least recently seen beacon once full. Must be strictly positive.
+        state_table (pi_pact_state.BeaconStateTable): Recent samples of each
+            beacon seen during the current scan, after filtering.
+        smoothing (str, dict): RSSI smoothing method applied per beacon to
+            filtered advertisements, adding an RSSI SMOOTHED column, or None.
+            Must be one of {'ema', 'median', 'kalman'}, or a dictionary of
+            the method keyed by 'method' and its parameters.
+        model (str): Pickled proximity model applied to every filtered
+            advertisement, adding PREDICTION and LATENCY columns, or None.
+            The model file name sets its features and labels, e.g.
+            '3varP-binary-xgboost-model.pickle'.
+        metrics_file (pathlib.Path): Prometheus text format file to which
+            scanning metrics, e.g. scan duration and filter pass rate, are
+            exported while scanning, with a JSON summary written next to it
+            when scanning stops, or None.
+        metrics_port (int): Port of a local HTTP endpoint serving scanning
+            metrics at /metrics while scanning, or None.
     """
 
     def __init__(self, logger, **kwargs):
@@ -363,6 +875,12 @@ class Scanner(object):
         """
         # Logger
         self.__logger: logging.Logger = logger
+        self.__backend = None
+        self.__sampler: Optional[SenseHatSampler] = None
+        self.__pool: Optional[pi_pact_adapters.AdapterPool] = None
+        self.__state_table: Optional[pi_pact_state.BeaconStateTable] = None
+        self.__smoother = None
+        self.__metrics: Metrics = Metrics('scanner', enabled=False)
         # Beacon settings
         for key, value in DEFAULT_CONFIG['scanner'].items():
             if key in kwargs and kwargs[key]:
@@ -371,9 +889,12 @@ class Scanner(object):
                 self.__logger.debug("Using default beacon scanner "
                                     f"configuration {key}: {value}.")  # Note: uses default config
                 setattr(self, key, value)
+        self.__open_state()
         # Create beacon
-        self.__service: BeaconService = BeaconService(BLE_DEVICE)
-        self.__logger.info("Initialized beacon scanner.")
+        self.__service = None
+        if len(self.adapters) == 1:
+            self.__service = self.__open_backend().beacon_service(self.adapters[0])
+        self.__logger.info(f"Initialized beacon scanner with {self.backend} backend.")
 
     def __del__(self):
         """Instance destruction."""
@@ -403,6 +924,22 @@ class Scanner(object):
             f.write("0")
         self.__control_file_handle = None
 
+    @property
+    def control_socket(self) -> Path:
+        """BLE beacon scanner control socket path getter."""
+        return self.__control_socket
+
+    @control_socket.setter
+    def control_socket(self, value: str):
+        """BLE beacon scanner control socket path setter.
+
+        Raises:
+            TypeError: Beacon scanner control socket must be a string.
+        """
+        if not isinstance(value, str):
+            raise TypeError("Beacon scanner control socket must be a string.")
+        self.__control_socket: Path = Path(value).resolve()
+
     @property
     def scan_prefix(self) -> str:
         """BLE beacon scanner scan file prefix getter."""
@@ -432,7 +969,6 @@ class Scanner(object):
             TypeError: Beacon scanner timeout must be a float, integer, or 
                 NoneType.
             ValueError: Beacon scanner timeout must be strictly positive.
-            ValueError: Beacon scanner cannot exceed maximum allowable timeout.
         """
         if value is not None:
             if not isinstance(value, (float, int)):
@@ -441,33 +977,52 @@ class Scanner(object):
             elif value <= 0:
                 raise ValueError("Beacon scanner timeout must be strictly "
                                  "positive.")
-            elif value > MAX_TIMEOUT:
-                raise ValueError("Beacon scanner timeout cannot exceed "
-                                 "maximum allowable timeout.")
         self.__timeout = value
 
     @property
-    def revisit(self) -> int:
+    def revisit(self) -> Union[float, int]:
         """BLE beacon scanner revisit interval getter."""
         return self.__revisit
 
     @revisit.setter
-    def revisit(self, value: int):
+    def revisit(self, value: Union[float, int]):
         """BLE beacon scanner revisit interval setter.
 
         Raises:
-            TypeError: Beacon scanner revisit interval must be an integer.
-            ValueError: Beacon scanner revisit interval must be strictly 
-                positive.
+            TypeError: Beacon scanner revisit interval must be a float or
+                integer.
+            ValueError: Beacon scanner revisit interval must be at least the
+                minimum revisit interval.
          """
-        if not isinstance(value, int):
-            raise TypeError("Beacon scanner revisit interval must be an "
-                            "integer.")
-        elif value <= 0:
-            raise ValueError("Beacon scanner revisit interval must strictly "
-                             "positive.")
+        if not isinstance(value, (float, int)):
+            raise TypeError("Beacon scanner revisit interval must be a float "
+                            "or integer.")
+        elif value < MIN_REVISIT:
+            raise ValueError("Beacon scanner revisit interval must be at least "
+                             f"{MIN_REVISIT} s.")
         self.__revisit = value
 
+    @property
+    def engine(self) -> str:
+        """BLE beacon scanner engine getter."""
+        return self.__engine
+
+    @engine.setter
+    def engine(self, value: str):
+        """BLE beacon scanner engine setter.
+
+        Raises:
+            TypeError: Beacon scanner engine must be a string.
+            ValueError: Beacon scanner engine must be one of available
+                engines.
+        """
+        if not isinstance(value, str):
+            raise TypeError("Beacon scanner engine must be a string.")
+        elif value not in ENGINES:
+            raise ValueError("Beacon scanner engine must be one of available "
+                             f"engines {ENGINES}.")
+        self.__engine = value
+
     @property
     def distance(self) -> float:
         """Pre-measured distance getter."""
@@ -488,6 +1043,107 @@ class Scanner(object):
 
         self.__distance = value
 
+    @property
+    def adapters(self) -> List[str]:
+        """BLE beacon scanner adapters getter."""
+        return self.__adapters
+
+    @adapters.setter
+    def adapters(self, value: List[str]):
+        """BLE beacon scanner adapters setter.
+
+        Raises:
+            TypeError: Beacon scanner adapters must be a list of strings.
+            ValueError: Beacon scanner adapters must be distinct and at least
+                one.
+        """
+        if not isinstance(value, list) or not all(isinstance(adapter, str) for adapter in value):
+            raise TypeError("Beacon scanner adapters must be a list of strings.")
+        elif not value or len(set(value)) != len(value):
+            raise ValueError("Beacon scanner adapters must be at least one "
+                             "distinct adapter.")
+        self.__adapters = value
+
+    @property
+    def stagger(self) -> bool:
+        """BLE beacon scanner adapter staggering getter."""
+        return self.__stagger
+
+    @stagger.setter
+    def stagger(self, value: bool):
+        """BLE beacon scanner adapter staggering setter.
+
+        Raises:
+            TypeError: Beacon scanner stagger must be a boolean.
+        """
+        if not isinstance(value, bool):
+            raise TypeError("Beacon scanner stagger must be a boolean.")
+        self.__stagger = value
+
+    @property
+    def backend(self) -> str:
+        """BLE beacon scanner backend getter."""
+        return self.__backend_name
+
+    @backend.setter
+    def backend(self, value: str):
+        """BLE beacon scanner backend setter.
+
+        Raises:
+            TypeError: Beacon scanner backend must be a string.
+            ValueError: Beacon scanner backend must be one of available
+                backends.
+        """
+        if not isinstance(value, str):
+            raise TypeError("Beacon scanner backend must be a string.")
+        elif value not in BACKENDS:
+            raise ValueError("Beacon scanner backend must be one of available "
+                             f"backends {BACKENDS}.")
+        self.__backend_name = value
+
+    @property
+    def replay_path(self) -> str:
+        """BLE beacon scanner replay path getter."""
+        return self.__replay_path
+
+    @replay_path.setter
+    def replay_path(self, value: str):
+        """BLE beacon scanner replay path setter.
+
+        Raises:
+            TypeError: Beacon scanner replay path must be a string.
+        """
+        if not isinstance(value, str):
+            raise TypeError("Beacon scanner replay path must be a string.")
+        self.__replay_path = value
+
+    @property
+    def replay_speed(self) -> Union[float, int]:
+        """BLE beacon scanner replay speed getter."""
+        return self.__replay_speed
+
+    @replay_speed.setter
+    def replay_speed(self, value: Union[float, int]):
+        """BLE beacon scanner replay speed setter.
+
+        Raises:
+            TypeError: Beacon scanner replay speed must be a float or integer.
+            ValueError: Beacon scanner replay speed must be strictly positive.
+        """
+        if not isinstance(value, (float, int)):
+            raise TypeError("Beacon scanner replay speed must be a float or "
+                            "integer.")
+        elif value <= 0:
+            raise ValueError("Beacon scanner replay speed must be strictly "
+                             "positive.")
+        self.__replay_speed = value
+
+    def __open_backend(self):
+        """Create the configured backend on first use."""
+        if self.__backend is None:
+            self.__backend = create_backend(self.backend, self.replay_path, self.replay_speed)
+        return self.__backend
+
     @property
     def use_sense_hat(self) -> bool:
         """Toggle sense hat getter."""
@@ -505,7 +1161,157 @@ class Scanner(object):
 
         self.__use_sense_hat = value
         if self.__use_sense_hat:
-            self.__sense_hat = SenseHat()
+            self.__sense_hat = self.__open_backend().sense_hat()
+            self.__sampler = None
+
+    @property
+    def sense_hat_rate(self) -> Union[float, int]:
+        """Sense HAT sampling rate getter."""
+        return self.__sense_hat_rate
+
+    @sense_hat_rate.setter
+    def sense_hat_rate(self, value: Union[float, int]):
+        """Sense HAT sampling rate setter.
+
+        Raises:
+            TypeError: Sense HAT sampling rate must be a float or integer.
+            ValueError: Sense HAT sampling rate must be strictly positive.
+        """
+        if not isinstance(value, (float, int)):
+            raise TypeError("Sense HAT sampling rate must be a float or integer.")
+        elif value <= 0:
+            raise ValueError("Sense HAT sampling rate must be strictly positive.")
+        self.__sense_hat_rate = value
+
+    @property
+    def stream(self) -> bool:
+        """Toggle streaming mode getter."""
+        return self.__stream
+
+    @stream.setter
+    def stream(self, value: bool):
+        """Toggle streaming mode setter.
+
+        Raises:
+            TypeError: Toggle must be a bool.
+        """
+        if not isinstance(value, bool):
+            raise TypeError("Toggle must be a bool.")
+        self.__stream = value
+
+    @property
+    def flush_interval(self) -> Union[float, int]:
+        """BLE beacon scanner flush interval getter."""
+        return self.__flush_interval
+
+    @flush_interval.setter
+    def flush_interval(self, value: Union[float, int]):
+        """BLE beacon scanner flush interval setter.
+
+        Raises:
+            TypeError: Beacon scanner flush interval must be a float or
+                integer.
+            ValueError: Beacon scanner flush interval must be strictly
+                positive.
+        """
+        if not isinstance(value, (float, int)):
+            raise TypeError("Beacon scanner flush interval must be a float or "
+                            "integer.")
+        elif value <= 0:
+            raise ValueError("Beacon scanner flush interval must be strictly "
+                             "positive.")
+        self.__flush_interval = value
+
+    @property
+    def segment_size(self) -> Optional[Union[float, int]]:
+        """BLE beacon scanner segment size getter."""
+        return self.__segment_size
+
+    @segment_size.setter
+    def segment_size(self, value: Optional[Union[float, int]]):
+        """BLE beacon scanner segment size setter.
+
+        Raises:
+            TypeError: Beacon scanner segment size must be a float, integer,
+                or NoneType.
+            ValueError: Beacon scanner segment size must be strictly positive.
+        """
+        if value is not None:
+            if not isinstance(value, (float, int)):
+                raise TypeError("Beacon scanner segment size must be a float, "
+                                "integer, or NoneType.")
+            elif value <= 0:
+                raise ValueError("Beacon scanner segment size must be strictly "
+                                 "positive.")
+        self.__segment_size = value
+
+    @property
+    def segment_interval(self) -> Optional[Union[float, int]]:
+        """BLE beacon scanner segment interval getter."""
+        return self.__segment_interval
+
+    @segment_interval.setter
+    def segment_interval(self, value: Optional[Union[float, int]]):
+        """BLE beacon scanner segment interval setter.
+
+        Raises:
+            TypeError: Beacon scanner segment interval must be a float,
+                integer, or NoneType.
+            ValueError: Beacon scanner segment interval must be strictly
+                positive.
+        """
+        if value is not None:
+            if not isinstance(value, (float, int)):
+                raise TypeError("Beacon scanner segment interval must be a "
+                                "float, integer, or NoneType.")
+            elif value <= 0:
+                raise ValueError("Beacon scanner segment interval must be "
+                                 "strictly positive.")
+        self.__segment_interval = value
+
+    @property
+    def retention(self) -> Optional[Union[float, int]]:
+        """BLE beacon scanner segment retention getter."""
+        return self.__retention
+
+    @retention.setter
+    def retention(self, value: Optional[Union[float, int]]):
+        """BLE beacon scanner segment retention setter.
+
+        Raises:
+            TypeError: Beacon scanner retention must be a float, integer, or
+                NoneType.
+            ValueError: Beacon scanner retention must be strictly positive.
+        """
+        if value is not None:
+            if not isinstance(value, (float, int)):
+                raise TypeError("Beacon scanner retention must be a float, "
+                                "integer, or NoneType.")
+            elif value <= 0:
+                raise ValueError("Beacon scanner retention must be strictly "
+                                 "positive.")
+        self.__retention = value
+
+    @property
+    def output_format(self) -> str:
+        """BLE beacon scanner output format getter."""
+        return self.__output_format
+
+    @output_format.setter
+    def output_format(self, value: str):
+        """BLE beacon scanner output format setter.
+
+        Raises:
+            TypeError: Beacon scanner output format must be a string.
+            ValueError: Beacon scanner output format must be one of allowable
+                output formats.
+        """
+        if not isinstance(value, str):
+            raise TypeError("Beacon scanner output format must be a string.")
+        elif value not in OUTPUT_SUFFIXES:
+            raise ValueError("Beacon scanner output format must be one of "
+                             f"allowable output formats {list(OUTPUT_SUFFIXES)}.")
+        self.__output_format = value
 
     @property
     def filters(self) -> dict:
@@ -525,8 +1331,204 @@ class Scanner(object):
         elif not all([key in ALLOWABLE_FILTERS for key in value.keys()]):
             raise KeyError("Beacon scanner filters must be one of allowable "
                            f"filters {ALLOWABLE_FILTERS}.")
+        self.__compiled_filters = pi_pact_filters.CompiledFilters(value)
         self.__filters = value
 
+    @property
+    def state_window(self) -> int:
+        """BLE beacon scanner state table window getter."""
+        return self.__state_window
+
+    @state_window.setter
+    def state_window(self, value: int):
+        """BLE beacon scanner state table window setter.
+
+        Takes effect from the next scan.
+
+        Raises:
+            TypeError: Beacon scanner state window must be an integer.
+            ValueError: Beacon scanner state window must be strictly positive.
+        """
+        if not isinstance(value, int):
+            raise TypeError("Beacon scanner state window must be an integer.")
+        elif value <= 0:
+            raise ValueError("Beacon scanner state window must be strictly "
+                             "positive.")
+        self.__state_window = value
+
+    @property
+    def state_ttl(self) -> Optional[Union[float, int]]:
+        """BLE beacon scanner state table TTL getter."""
+        return self.__state_ttl
+
+    @state_ttl.setter
+    def state_ttl(self, value: Optional[Union[float, int]]):
+        """BLE beacon scanner state table TTL setter.
+
+        Takes effect from the next scan.
+
+        Raises:
+            TypeError: Beacon scanner state TTL must be a float, integer, or
+                NoneType.
+            ValueError: Beacon scanner state TTL must be strictly positive.
+        """
+        if value is not None:
+            if not isinstance(value, (float, int)):
+                raise TypeError("Beacon scanner state TTL must be a float, "
+                                "integer, or NoneType.")
+            elif value <= 0:
+                raise ValueError("Beacon scanner state TTL must be strictly "
+                                 "positive.")
+        self.__state_ttl = value
+
+    @property
+    def state_memory(self) -> Union[float, int]:
+        """BLE beacon scanner state table memory cap getter."""
+        return self.__state_memory
+
+    @state_memory.setter
+    def state_memory(self, value: Union[float, int]):
+        """BLE beacon scanner state table memory cap setter.
+
+        Takes effect from the next scan.
+
+        Raises:
+            TypeError: Beacon scanner state memory must be a float or integer.
+            ValueError: Beacon scanner state memory must be strictly positive.
+        """
+        if not isinstance(value, (float, int)):
+            raise TypeError("Beacon scanner state memory must be a float or "
+                            "integer.")
+        elif value <= 0:
+            raise ValueError("Beacon scanner state memory must be strictly "
+                             "positive.")
+        self.__state_memory = value
+
+    @property
+    def state_table(self) -> pi_pact_state.BeaconStateTable:
+        """BLE beacon scanner state table getter."""
+        return self.__state_table
+
+    def __open_state(self):
+        """Create an empty state table, and an RSSI smoother on its slots."""
+        listener_bytes = 0 if self.smoothing is None else pi_pact_smoothing.smoother_slot_bytes(self.smoothing)
+        self.__state_table = pi_pact_state.BeaconStateTable(self.state_window, self.state_ttl, self.state_memory,
+                                                            listener_bytes)
+        self.__smoother = None
+        if self.smoothing is not None:
+            self.__smoother = pi_pact_smoothing.create_smoother(self.smoothing, self.__state_table.capacity)
+            self.__state_table.subscribe(self.__smoother.clear)
+
+    @property
+    def smoothing(self) -> Optional[Union[str, Dict[str, Any]]]:
+        """BLE beacon scanner RSSI smoothing getter."""
+        return self.__smoothing
+
+    @smoothing.setter
+    def smoothing(self, value: Optional[Union[str, Dict[str, Any]]]):
+        """BLE beacon scanner RSSI smoothing setter.
+
+        Raises:
+            TypeError: Beacon scanner smoothing must be a string, dictionary,
+                or NoneType.
+            ValueError: Beacon scanner smoothing method must be one of
+                allowable smoothing methods.
+        """
+        if value is not None and not isinstance(value, (str, dict)):
+            raise TypeError("Beacon scanner smoothing must be a string, "
+                            "dictionary, or NoneType.")
+        if value is not None:
+            pi_pact_smoothing.create_smoother(value, 1)  # Note: validates settings, the smoother is created with the state table
+        self.__smoothing = value
+
+    @property
+    def model(self) -> Optional[str]:
+        """BLE beacon scanner proximity model getter."""
+        return self.__model
+
+    @model.setter
+    def model(self, value: Optional[str]):
+        """BLE beacon scanner proximity model setter.
+
+        Loads the model once.
+
+        Raises:
+            TypeError: Beacon scanner model must be a string or NoneType.
+            FileNotFoundError: Beacon scanner model must exist.
+        """
+        if value is not None:
+            if not isinstance(value, str):
+                raise TypeError("Beacon scanner model must be a string or "
+                                "NoneType.")
+            elif not Path(value).is_file():
+                raise FileNotFoundError(f"Beacon scanner model {value} does "
+                                        "not exist.")
+        self.__proximity_model = pi_pact_inference.ProximityModel(value) if value is not None else None
+        self.__model = value
+
+    @property
+    def metrics_file(self) -> Optional[Path]:
+        """BLE beacon scanner metrics file path getter."""
+        return self.__metrics_file
+
+    @metrics_file.setter
+    def metrics_file(self, value: Optional[str]):
+        """BLE beacon scanner metrics file path setter.
+
+        Raises:
+            TypeError: Beacon scanner metrics file must be a string or NoneType.
+        """
+        if value is not None and not isinstance(value, str):
+            raise TypeError("Beacon scanner metrics file must be a string or NoneType.")
+        self.__metrics_file: Optional[Path] = Path(value).resolve() if value is not None else None
+
+    @property
+    def metrics_port(self) -> Optional[int]:
+        """BLE beacon scanner metrics port getter."""
+        return self.__metrics_port
+
+    @metrics_port.setter
+    def metrics_port(self, value: Optional[int]):
+        """BLE beacon scanner metrics port setter.
+
+        Raises:
+            TypeError: Beacon scanner metrics port must be an integer or NoneType.
+            ValueError: Beacon scanner metrics port must be in [1, 65535].
+        """
+        if value is not None:
+            if not isinstance(value, int):
+                raise TypeError("Beacon scanner metrics port must be an integer or NoneType.")
+            elif not 1 <= value <= 65535:
+                raise ValueError("Beacon scanner metrics port must be in [1, 65535].")
+        self.__metrics_port = value
+
+    def __open_metrics(self) -> Tuple[Metrics, Optional[MetricsExporter]]:
+        """Create the metrics of one run and, if exported, their exporter."""
+        enabled = self.metrics_file is not None or self.metrics_port is not None
+        metrics = Metrics('scanner', enabled)
+        if not enabled:
+            return metrics, None
+        return metrics, MetricsExporter(metrics, self.metrics_file, self.metrics_port)
+
+    def configure(self, settings: Dict[str, Any]):
+        """Reconfigure BLE beacon scanner settings.
+
+        Takes effect from the next scan if scanning.
+
+        Args:
+            settings (dict): Settings keyed by attribute name. Must be one of
+                {'revisit', 'distance', 'flush_interval', 'filters'}.
+
+        Raises:
+            KeyError: Beacon scanner setting must be reconfigurable.
+        """
+        for key in settings:
+            if key not in RECONFIGURABLE['scanner']:
+                raise KeyError("Beacon scanner setting must be one of "
+                               f"reconfigurable settings {RECONFIGURABLE['scanner']}.")
+        for key, value in settings.items():
+            setattr(self, key, value)
+
     def filter_advertisements(self, advertisements: pd.DataFrame) -> pd.DataFrame:
         """Filter received beacon advertisements based on filters.
         
@@ -537,21 +1539,47 @@ class Scanner(object):
             Advertisements with all entries that were not compliant with the 
             filters removed.
         """
-        key: str
-        value: Sequence[Union[float, int]]
-        for key, value in self.filters.items():
-            # Filter based on fixed identifiers
-            if key in ID_FILTERS:
-                advertisements = advertisements[advertisements[key].isin([value])]
-            # Filter based on measurements
-            else:
-                query_str = f"{value[0]} <= {key} and {key} <= {value[1]}"
-                advertisements = advertisements.query(query_str)
-        advertisements.reset_index(inplace=True, drop=True)
-        return advertisements
+        advertisements = advertisements[self.__compiled_filters.mask(advertisements)]
+        return advertisements.reset_index(drop=True)
+
+    def smooth_rssi(self, advertisements: pd.DataFrame, slots: np.ndarray) -> pd.DataFrame:
+        """Smooth the RSSI of filtered advertisements per beacon.
+
+        Smoothing state carries over between calls, so advertisements must be
+        passed in temporal order.
+
+        Args:
+            advertisements (pandas.DataFrame): Processed and filtered
+                advertisements.
+            slots (numpy.ndarray): State table slot of each advertisement, as
+                returned by recording them in the state table.
+
+        Returns:
+            Advertisements with an RSSI SMOOTHED column after RSSI, or
+            unchanged without smoothing.
+        """
+        if self.__smoother is None:
+            return advertisements
+        return self.__smoother.smooth(advertisements, slots)
+
+    def predict_proximity(self, advertisements: pd.DataFrame) -> pd.DataFrame:
+        """Predict the proximity of filtered advertisements with the model.
+
+        Args:
+            advertisements (pandas.DataFrame): Processed and filtered
+                advertisements.
+
+        Returns:
+            Advertisements with PREDICTION and LATENCY columns added, or
+            unchanged without a model.
+        """
+        if self.__proximity_model is None:
+            return advertisements
+        return self.__proximity_model.predict(advertisements)
 
     # noinspection PyMethodMayBeStatic
-    def process_scans(self, scans: List[Mapping[str, Sequence[Any]]], timestamps: List[datetime]) -> pd.DataFrame:
+    def process_scans(self, scans: List[Mapping[str, Sequence[Any]]], timestamps: List[datetime],
+                      adapters: Optional[List[str]] = None) -> pd.DataFrame:
         """Process collection of received beacon advertisement scans.
 
         Organize collection of received beacon advertisement scans according
@@ -562,6 +1590,8 @@ class Scanner(object):
                 contains all advertisements received from one scan. Elements
                 are in temporal order.
             timestamps (list): Timestamps associated with each scan.
+            adapters (list): Adapter which received each scan. Adds an
+                ADAPTER column if given.
 
         Returns:
             Advertisements organized in a pandas.DataFrame by address first,
@@ -569,38 +1599,302 @@ class Scanner(object):
             e.g., UUID, major, minor, etc.
         """
         # Collect all advertisements
-        advertisements = []
-        if self.__use_sense_hat:
-            for (scan, timestamp) in zip_longest(scans, timestamps):
-                for address, payload in scan.items():
-                    advertisement = {'ADDRESS': address, 'TIMESTAMP': timestamp, 'UUID': payload[0],
-                                     'MAJOR': payload[1], 'MINOR': payload[2], 'TX POWER': payload[3],
-                                     'RSSI': payload[4], 'DISTANCE': self.distance,
-                                     'TEMPERATURE': self.__sense_hat.get_temperature(),
-                                     'HUMIDITY': self.__sense_hat.get_humidity(),
-                                     # 'INTERNAL TEMPERATURE': os.popen("vcgencmd measure_temp").readline(),
-                                     'PRESSURE': self.__sense_hat.get_pressure(),
-                                     'PITCH': self.__sense_hat.get_orientation()['pitch'],
-                                     'ROLL': self.__sense_hat.get_orientation()['roll'],
-                                     'YAW': self.__sense_hat.get_orientation()['yaw']}
-                    advertisements.append(advertisement)
-            # Format into DataFrame
-            return pd.DataFrame(advertisements, columns=['ADDRESS', 'TIMESTAMP', 'UUID', 'MAJOR', 'MINOR',
-                                                         'TX POWER', 'RSSI', 'DISTANCE', 'TEMPERATURE', 'HUMIDITY',
-                                                         'PRESSURE', 'PITCH', 'ROLL', 'YAW'])
+        buffer = AdvertisementBuffer(sum(len(scan) for scan in scans), adapter_column=adapters is not None)
+        for (scan, timestamp, adapter) in zip_longest(scans, timestamps, adapters or []):
+            buffer.append(scan, timestamp, adapter)
+        # Format into DataFrame
+        advertisements = buffer.to_frame(self.distance)
+        if not self.__use_sense_hat:
+            return advertisements
+        # Use the Sense HAT values replayed with each advertisement, or else join it to the nearest sample
+        values = buffer.environment
+        if values is None and self.__sense_hat is None:
+            values = np.full((len(advertisements), len(SENSE_HAT_COLUMNS)), np.nan, dtype=np.float32)
+        elif values is None:
+            if self.__sampler is None:
+                self.__sampler = SenseHatSampler(self.__sense_hat, self.sense_hat_rate, 1)
+            values = self.__sampler.nearest(advertisements['TIMESTAMP'].to_numpy()).astype(np.float32)
+        for i, name in enumerate(SENSE_HAT_COLUMNS):
+            advertisements[name] = values[:, i]
+        return advertisements
+
+    def __analyze(self, advertisements: pd.DataFrame) -> pd.DataFrame:
+        """Filter processed advertisements and record them in the state table, then smooth and predict them."""
+        advertisements = self.filter_advertisements(advertisements)
+        self.__metrics.increment('advertisements_passed_total', len(advertisements))
+        slots = self.__state_table.record(advertisements)
+        return self.predict_proximity(self.smooth_rssi(advertisements, slots))
+
+    def __process(self, scans: List[Mapping[str, Sequence[Any]]], timestamps: List[datetime],
+                  adapters: List[str]) -> pd.DataFrame:
+        """Process and analyze received scans, timing them."""
+        start_time = time.perf_counter()
+        advertisements = self.process_scans(scans, timestamps, adapters if len(self.adapters) > 1 else None)
+        advertisements = self.__analyze(advertisements)
+        self.__metrics.observe('process_duration_seconds', time.perf_counter() - start_time)
+        return advertisements
+
+    def __write(self, writer, advertisements: pd.DataFrame):
+        """Write analyzed advertisements to the scan output file, timing them."""
+        start_time = time.perf_counter()
+        writer.write(advertisements)
+        self.__metrics.observe('write_duration_seconds', time.perf_counter() - start_time)
+
+    def __filter_scan(self, scan: Mapping[str, Sequence[Any]]) -> Mapping[str, Sequence[Any]]:
+        """Count the advertisements of a received scan and apply the ID filters to it."""
+        self.__metrics.increment('advertisements_received_total', len(scan))
+        self.__metrics.observe('scan_advertisements', len(scan))
+        return self.__compiled_filters.filter_scan(scan)
+
+    def __acknowledge(self, channel: ControlChannel):
+        """Record the latency of control commands received since the previous check."""
+        latency = channel.acknowledge()
+        if latency is not None:
+            self.__metrics.observe('control_latency_seconds', latency)
+
+    def __remaining(self, progress: Dict[str, Any]) -> Optional[float]:
+        """Time (s) left until the scanning timeout, or None without timeout."""
+        if progress['timeout'] is None:
+            return None
+        return progress['timeout'] - (time.monotonic() - progress['start_time'])
+
+    def __receive_scans(self) -> List[Tuple[str, datetime, Mapping[str, Sequence[Any]]]]:
+        """Perform one blocking scan on every adapter.
+
+        Returns:
+            Received (adapter, timestamp, scan) in timestamp order, with ID
+            filters applied to each scan.
+        """
+        start_time = time.perf_counter()
+        if self.__pool is not None:
+            received = self.__pool.scan(self.revisit)
+        else:
+            timestamp = datetime.now()
+            scan = self.__service.scan(math.ceil(self.revisit))  # Note: PyBluez scans whole seconds
+            received = [(self.adapters[0], timestamp, scan)]
+        self.__metrics.observe('scan_duration_seconds', time.perf_counter() - start_time)
+        return [(adapter, timestamp, self.__filter_scan(scan)) for adapter, timestamp, scan in received]
+
+    def __exhausted(self) -> bool:
+        """Whether every adapter's replay has finished."""
+        return getattr(self.__pool if self.__pool is not None else self.__service, 'exhausted', False)
+
+    def __scan_blocking(self, channel: ControlChannel, writer, frames: List[pd.DataFrame],
+                        progress: Dict[str, Any]):
+        """Blocking scanning engine.
+
+        Scans, control checks, and output run in series on the calling
+        thread while the Sense HAT is sampled in a background thread.
+        Received scans are processed at most twice per revisit interval, so
+        scans are processed as they arrive unless replayed at an accelerated
+        speed.
+
+        Args:
+            channel (ControlChannel): Started control channel.
+            writer (ScanWriter, ColumnarScanWriter): Streaming scan output
+                writer, or None to collect advertisements in memory.
+            frames (list): Processed advertisements are appended here if not
+                streaming.
+            progress (dict): Scan count, start time, and timeout.
+        """
+        scans: List[Mapping[str, Sequence[Any]]] = []
+        timestamps: List[datetime] = []
+        adapters: List[str] = []
+        if self.__sampler is not None:
+            self.__sampler.start()
+        process_time = time.monotonic()
+        run = True
+        while run:
+            self.__acknowledge(channel)
+            # Hold while paused until resumed, stopped, or timed out
+            while channel.paused and not channel.stopped:
+                remaining = self.__remaining(progress)
+                if remaining is not None and remaining <= 0:
+                    break
+                channel.wait(remaining)
+                self.__acknowledge(channel)
+            if not channel.paused and not channel.stopped:
+                progress['scans'] += 1
+                self.__metrics.increment('scans_total')
+                self.__logger.debug(f"Performing scan #{progress['scans']} at revisit "
+                                    f"{self.revisit}.")
+                for adapter, timestamp, scan in self.__receive_scans():
+                    adapters.append(adapter)
+                    timestamps.append(timestamp)
+                    scans.append(scan)
+                if self.__exhausted():
+                    self.__logger.debug("Beacon scanner replay finished.")
+                    run = False
+                # Process, filter, and output received scans, in batches when replayed at an accelerated speed
+                # Note: half an interval, so that scans received once per interval are each processed on arrival
+                if time.monotonic() - process_time >= self.revisit / 2:
+                    process_time = time.monotonic()
+                    self.__output_scans(writer, frames, scans, timestamps, adapters)
+            # Stop advertising based on either timeout or control command
+            remaining = self.__remaining(progress)
+            if remaining is not None and remaining < 0:
+                self.__logger.debug("Beacon scanner timed out.")
+                run = False
+            if channel.stopped:
+                self.__acknowledge(channel)
+                self.__logger.debug("Beacon scanner control flag set to stop.")
+                run = False
+        # Keep scans completed by other adapters while stopping
+        if self.__pool is not None:
+            for adapter, timestamp, scan in self.__pool.close():
+                adapters.append(adapter)
+                timestamps.append(timestamp)
+                scans.append(self.__filter_scan(scan))
+        if scans:
+            self.__output_scans(writer, frames, scans, timestamps, adapters)
+
+    def __output_scans(self, writer, frames: List[pd.DataFrame], scans: List[Mapping[str, Sequence[Any]]],
+                       timestamps: List[datetime], adapters: List[str]):
+        """Process, filter, and write scans to the scan output file, or keep them if not streaming, then clear them."""
+        advertisements = self.__process(scans, timestamps, adapters)
+        if writer is not None:
+            self.__write(writer, advertisements)
         else:
-            for (scan, timestamp) in zip_longest(scans, timestamps):
-                for address, payload in scan.items():
-                    advertisement = {'ADDRESS': address, 'TIMESTAMP': timestamp, 'UUID': payload[0],
-                                     'MAJOR': payload[1],
-                                     'MINOR': payload[2], 'TX POWER': payload[3], 'RSSI': payload[4],
-                                     'DISTANCE': self.distance}
-                    advertisements.append(advertisement)
-            # Format into DataFrame
-            return pd.DataFrame(advertisements, columns=['ADDRESS', 'TIMESTAMP', 'UUID', 'MAJOR', 'MINOR',
-                                                         'TX POWER', 'RSSI', 'DISTANCE'])
-
-    def scan(self, scan_prefix='', timeout: int = 0, revisit: int = 1) -> pd.DataFrame:
+            frames.append(advertisements)
+        scans.clear()
+        timestamps.clear()
+        adapters.clear()
+
+    async def __scan_async(self, channel: ControlChannel, writer, frames: List[pd.DataFrame],
+                           progress: Dict[str, Any]):
+        """Asyncio scanning engine.
+
+        Scanning, control handling, Sense HAT sampling, and processing and
+        writing of output run as concurrent tasks. The hardware backend scans
+        on a non-blocking raw HCI socket where possible, so consecutive scans
+        follow each other without a gap and may last a fraction of a second.
+        Otherwise blocking scans run in an executor thread. Received scans are
+        processed at most twice per revisit interval, as in the blocking
+        engine.
+
+        Args:
+            channel (ControlChannel): Started control channel.
+            writer (ScanWriter, ColumnarScanWriter): Streaming scan output
+                writer, or None to collect advertisements in memory.
+            frames (list): Processed advertisements are appended here if not
+                streaming.
+            progress (dict): Scan count, start time, and timeout.
+        """
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+        received: asyncio.Queue = asyncio.Queue()
+
+        def notify():
+            """Wake the scanning task after a control command."""
+            try:
+                loop.call_soon_threadsafe(changed.set)
+            except RuntimeError:
+                pass  # Note: event loop already closed
+
+        async def sample():
+            """Sample the Sense HAT at the configured rate."""
+            period = 1 / self.sense_hat_rate
+            next_time = time.monotonic()
+            while True:
+                next_time += period
+                await asyncio.sleep(max(0.0, next_time - time.monotonic()))
+                await loop.run_in_executor(None, self.__sampler.sample)
+
+        async def output():
+            """Process, filter, and output the scans received during each revisit interval."""
+            batch = []
+            process_time = time.monotonic()
+            while True:
+                batch.append(await received.get())
+                while not received.empty():
+                    batch.append(received.get_nowait())  # Note: catches up on scans received meanwhile
+                done = batch[-1] is None
+                batch = [item for item in batch if item is not None]
+                if batch and (done or time.monotonic() - process_time >= self.revisit / 2):
+                    process_time = time.monotonic()
+                    advertisements = self.__process([scan for _, _, scan in batch],
+                                                    [timestamp for _, timestamp, _ in batch],
+                                                    [adapter for adapter, _, _ in batch])
+                    if writer is not None:
+                        await loop.run_in_executor(None, self.__write, writer, advertisements)
+                    else:
+                        frames.append(advertisements)
+                    batch = []
+                if done:
+                    return
+
+        hci_socket = self.__open_beacon_socket() if self.__pool is None else None
+        channel.subscribe(notify)
+        tasks = [asyncio.ensure_future(output())]
+        if self.__sampler is not None:
+            self.__sampler.sample()
+            tasks.append(asyncio.ensure_future(sample()))
+        try:
+            while not tasks[0].done():
+                changed.clear()
+                self.__acknowledge(channel)
+                if channel.stopped:
+                    self.__logger.debug("Beacon scanner control flag set to stop.")
+                    break
+                remaining = self.__remaining(progress)
+                if remaining is not None and remaining < 0:
+                    self.__logger.debug("Beacon scanner timed out.")
+                    break
+                # Hold while paused until resumed, stopped, or timed out
+                if channel.paused:
+                    try:
+                        await asyncio.wait_for(changed.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                progress['scans'] += 1
+                self.__metrics.increment('scans_total')
+                self.__logger.debug(f"Performing scan #{progress['scans']} at revisit "
+                                    f"{self.revisit}.")
+                if hci_socket is not None:
+                    timestamp = datetime.now()
+                    start_time = time.perf_counter()
+                    scan = await hci_socket.scan(self.revisit)
+                    self.__metrics.observe('scan_duration_seconds', time.perf_counter() - start_time)
+                    batch = [(self.adapters[0], timestamp, self.__filter_scan(scan))]
+                else:
+                    batch = await loop.run_in_executor(None, self.__receive_scans)
+                for item in batch:
+                    received.put_nowait(item)
+                if self.__exhausted():
+                    self.__logger.debug("Beacon scanner replay finished.")
+                    break
+            # Keep scans completed by other adapters while stopping
+            if self.__pool is not None:
+                for adapter, timestamp, scan in await loop.run_in_executor(None, self.__pool.close):
+                    received.put_nowait((adapter, timestamp, self.__filter_scan(scan)))
+            received.put_nowait(None)
+            await tasks[0]
+        finally:
+            channel.unsubscribe(notify)
+            for task in tasks:
+                task.cancel()
+            if hci_socket is not None:
+                hci_socket.close()
+
+    def __open_beacon_socket(self):
+        """Open a non-blocking HCI socket of the backend, if available.
+
+        Returns:
+            An open pi_pact_backend.HciBeaconSocket, or None if the backend
+            has none or it could not be opened.
+        """
+        hci_socket = self.__open_backend().beacon_socket(self.adapters[0])
+        if hci_socket is None:
+            return None
+        try:
+            hci_socket.open()
+        except OSError as error:
+            self.__logger.warning(f"Unable to open HCI socket, scanning with PyBluez instead: {error}")
+            return None
+        return hci_socket
+
+    def scan(self, scan_prefix='', timeout: int = 0, revisit: int = 1) -> Optional[pd.DataFrame]:
         """Execute BLE beacon scan.
         
         Args:
@@ -609,15 +1903,28 @@ class Scanner(object):
                 configuration value.
             timeout (int, float): Time (s) for which to advertise beacon. If 
                 specified as None then advertises till user commanded stop via 
-                control file. Defaults to configuration value.
+                control socket, signal, or control file. Defaults to
+                configuration value.
             revisit (int): Time interval (s) between consecutive scans. 
                 Defaults to 1.
             
         Returns:
             Filtered advertisements organized in a pandas.DataFrame by address 
             first, timestamp second, and then remainder of advertisement 
-            payload, e.g., UUID, major, minor, etc.
+            payload, e.g., UUID, major, minor, etc. In streaming mode
+            advertisements are not retained in memory and None is returned.
         """
+        self.__metrics, exporter = self.__open_metrics()
+        if exporter is not None:
+            exporter.start()
+        try:
+            return self.__scan(scan_prefix, timeout)
+        finally:
+            if exporter is not None:
+                self.__logger.info(f"Beacon scanner metrics: {json.dumps(exporter.close())}")
+
+    def __scan(self, scan_prefix: str, timeout: Optional[Union[float, int]]) -> Optional[pd.DataFrame]:
+        """Execute BLE beacon scan with the metrics of this run open, see scan()."""
         # Parse inputs
         if scan_prefix == '':
             scan_prefix = self.scan_prefix
@@ -626,53 +1933,366 @@ class Scanner(object):
         # Update control file and scan output file
         with self.__control_file.open(mode='w') as f:
             f.write("0")
-        scan_file = Path(f"{scan_prefix}_{datetime.now():%Y%m%dT%H%M%S}.csv")
+        scan_file = Path(f"{scan_prefix}_{datetime.now():%Y%m%dT%H%M%S}"
+                         f"{OUTPUT_SUFFIXES[self.output_format]}")
+        while scan_file.exists():  # Note: back-to-back scans may start within the same second
+            time.sleep(1 - datetime.now().microsecond / 1e6)
+            scan_file = Path(f"{scan_prefix}_{datetime.now():%Y%m%dT%H%M%S}"
+                             f"{OUTPUT_SUFFIXES[self.output_format]}")
+        writer = None
+        if self.stream or self.segment_size is not None or self.segment_interval is not None:
+            writer = open_scan_writer(scan_file, self.output_format, self.flush_interval,
+                                      self.segment_size, self.segment_interval, self.retention)
+        if self.__use_sense_hat and self.__sense_hat is not None:
+            # Note: scans are joined to samples as they are processed, well within the retention
+            self.__sampler = SenseHatSampler(self.__sense_hat, self.sense_hat_rate,
+                                             math.ceil(SENSE_HAT_RETENTION * self.sense_hat_rate))
+        if self.__proximity_model is not None:
+            if not self.__use_sense_hat and len(self.__proximity_model.features) > 1:
+                raise ValueError(f"Beacon scanner model features {self.__proximity_model.features} "
+                                 "require use of sense hat.")
+            self.__proximity_model.reset()
+        self.__open_state()
         # Start scanning
         self.__logger.info(f"Starting beacon scanner with timeout {timeout}.")
-        self.__control_file_handle: IO[str] = self.__control_file.open(mode='r+')
-        run = True
-        timestamps: List[datetime] = []
-        scans: List[Mapping[str, Sequence[Any]]] = []
-        scan_count: int = 0
-        start_time: float = time.monotonic()
-        while run:
-            scan_count += 1
-            self.__logger.debug(f"Performing scan #{scan_count} at revisit "
-                                f"{self.revisit}.")
-            timestamps.append(datetime.now())
-            scans.append(self.__service.scan(self.revisit))
-            # Stop advertising based on either timeout or control file
-            if timeout is not None:
-                if (time.monotonic() - start_time) > timeout:
-                    self.__logger.debug("Beacon scanner timed out.")
-                    run = False
-            self.__control_file_handle.seek(0)
-            control_flag = self.__control_file_handle.read()
-            if control_flag != "0":
-                self.__logger.debug("Beacon scanner control flag set to stop.")
-                run = False
-        self.__logger.info("Stopping beacon scanner.")
-        # Cleanup
-        self.__control_file_handle.close()
-        with self.__control_file.open('w') as f:
-            f.write("0")
-        # Process, filter, and output received scans
-        advertisements = self.process_scans(scans, timestamps)
-        advertisements = self.filter_advertisements(advertisements)
-        advertisements.to_csv(scan_file, index_label='SCAN')
+        frames: List[pd.DataFrame] = []
+        progress: Dict[str, Any] = {'scans': 0, 'start_time': time.monotonic(), 'timeout': timeout}
+        channel = ControlChannel(
+            self.__logger, self.control_socket, self.__control_file,
+            status=lambda: {'mode': 'scanner', 'engine': self.engine,
+                            'elapsed': time.monotonic() - progress['start_time'],
+                            'scans': progress['scans'],
+                            'scan_file': str(writer.scan_file if writer is not None else scan_file),
+                            'segments': len(getattr(writer, 'segments', [])) or None,
+                            'rows': writer.rows if writer is not None else None,
+                            'revisit': self.revisit, 'distance': self.distance,
+                            'filters': self.filters,
+                            'beacons': self.__state_table.status(),
+                            'metrics': self.__metrics.summary() if self.__metrics.enabled else None,
+                            'proximity': (self.__proximity_model.latest
+                                          if self.__proximity_model is not None else None),
+                            'adapters': self.__pool.stats if self.__pool is not None else self.adapters},
+            configure=self.configure, poll_interval=CONTROL_INTERVAL)
+        if len(self.adapters) > 1:
+            self.__pool = pi_pact_adapters.AdapterPool(
+                self.__logger, self.adapters, self.backend, self.replay_path, self.replay_speed, self.revisit,
+                self.stagger, use_socket=(self.engine == 'asyncio'))
+            channel.subscribe(lambda: self.__pool.pause() if channel.paused else self.__pool.resume())
+            self.__pool.start()
+        channel.start()
+        try:
+            if self.engine == 'asyncio':
+                asyncio.run(self.__scan_async(channel, writer, frames, progress))
+            else:
+                self.__scan_blocking(channel, writer, frames, progress)
+        finally:
+            self.__logger.info("Stopping beacon scanner.")
+            # Cleanup
+            channel.close()
+            if self.__pool is not None:
+                self.__pool.close()
+                self.__pool = None
+            if self.__sampler is not None:
+                self.__sampler.stop()
+            with self.__control_file.open('w') as f:
+                f.write("0")
+            if writer is not None:
+                writer.close()
+        if writer is not None and self.__proximity_model is not None:
+            self.__logger.info(self.__proximity_model.summary())
+        if isinstance(writer, SegmentedScanWriter):
+            self.__logger.info(f"Streamed {writer.rows} advertisements to "
+                               f"{len(writer.segments)} segments listed in {writer.manifest_file}.")
+            return None
+        elif writer is not None:
+            self.__logger.info(f"Streamed {writer.rows} advertisements to "
+                               f"{scan_file}.")
+            return None
+        # Output advertisements processed while scanning
+        if not frames:
+            frames.append(self.__process([], [], []))
+        advertisements = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        # Note: categorical batches with different categories are concatenated as objects
+        for column in ['ADDRESS', 'UUID', 'ADAPTER']:
+            if column in advertisements.columns and advertisements[column].dtype != 'category':
+                advertisements[column] = advertisements[column].astype('category')
+        if self.__proximity_model is not None:
+            self.__logger.info(self.__proximity_model.summary())
+        writer = open_scan_writer(scan_file, self.output_format, self.flush_interval)
+        self.__write(writer, advertisements)
+        writer.close()
         return advertisements
 
 
+def open_scan_writer(scan_file: Path, output_format: str, flush_interval: Union[float, int],
+                     segment_size: Optional[Union[float, int]] = None,
+                     segment_interval: Optional[Union[float, int]] = None,
+                     retention: Optional[Union[float, int]] = None):
+    """Open a scan output file writer for the given output format.
+
+    Args:
+        scan_file (pathlib.Path): Scan output file path.
+        output_format (str): One of {'csv', 'parquet', 'arrow'}.
+        flush_interval (float, int): Interval (s) between syncs to disk.
+        segment_size (float, int): Segment size (MiB), or None.
+        segment_interval (float, int): Segment interval (s), or None.
+        retention (float, int): Total size (MiB) of retained segments, or
+            None to retain every segment.
+
+    Returns:
+        A SegmentedScanWriter if either segment size or interval is given,
+        otherwise a ScanWriter for CSV output or a
+        pi_pact_columnar.ColumnarScanWriter.
+    """
+    if segment_size is not None or segment_interval is not None:
+        return SegmentedScanWriter(scan_file, output_format, flush_interval, segment_size,
+                                   segment_interval, retention)
+    if output_format == 'csv':
+        return ScanWriter(scan_file, flush_interval)
+    from pi_pact_columnar import ColumnarScanWriter  # Note: pyarrow is only required for columnar output
+    return ColumnarScanWriter(scan_file, output_format, flush_interval)
+
+
+class SegmentedScanWriter(object):
+    """Writes processed advertisements to a series of rotating segment files.
+
+    Segment files are named after the scan output file with a running index,
+    e.g. pi_pact_scan_20200620T101242_000001.csv, and each is a complete scan
+    file of the output format. A new segment is started with the first write
+    after the current one reaches the segment size, as written whether or not
+    synced to disk yet, or has been open for the segment interval. Rows are numbered continuously across
+    segments, so concatenated segments match a single scan output file.
+
+    Every segment is listed in a YAML manifest next to them, rewritten
+    atomically whenever a segment starts or ends, with its file name, time
+    range, number of rows, and size. Once the total size of the retained
+    segments exceeds the retention limit, the oldest completed segments are
+    deleted and marked as such in the manifest. The newest segment is always
+    retained, even if larger than the retention limit on its own.
+
+    Attributes:
+        scan_file (pathlib.Path): Current segment file path.
+        manifest_file (pathlib.Path): Manifest file path.
+        output_format (str): One of {'csv', 'parquet', 'arrow'}.
+        flush_interval (float, int): Interval (s) between syncs to disk.
+        segment_size (float, int): Segment size (MiB), or None.
+        segment_interval (float, int): Segment interval (s), or None.
+        retention (float, int): Total size (MiB) of retained segments, or
+            None to retain every segment.
+        rows (int): Number of advertisements written so far across all
+            segments.
+        segments (list): Manifest entry of every segment started so far.
+    """
+
+    def __init__(self, scan_file: Path, output_format: str, flush_interval: Union[float, int],
+                 segment_size: Optional[Union[float, int]] = None,
+                 segment_interval: Optional[Union[float, int]] = None,
+                 retention: Optional[Union[float, int]] = None):
+        """Instance initialization. Starts the first segment.
+
+        Args:
+            scan_file (pathlib.Path): Scan output file path from which segment
+                and manifest file names are derived. Not written itself.
+            output_format (str): One of {'csv', 'parquet', 'arrow'}.
+            flush_interval (float, int): Interval (s) between syncs to disk.
+            segment_size (float, int): Segment size (MiB), or None.
+            segment_interval (float, int): Segment interval (s), or None.
+            retention (float, int): Total size (MiB) of retained segments, or
+                None to retain every segment.
+        """
+        scan_file = Path(scan_file)
+        self.manifest_file: Path = scan_file.with_name(f"{scan_file.stem}{MANIFEST_SUFFIX}")
+        self.output_format: str = output_format
+        self.flush_interval: Union[float, int] = flush_interval
+        self.segment_size: Optional[Union[float, int]] = segment_size
+        self.segment_interval: Optional[Union[float, int]] = segment_interval
+        self.retention: Optional[Union[float, int]] = retention
+        self.rows: int = 0
+        self.segments: List[Dict[str, Any]] = []
+        self.__scan_file: Path = scan_file
+        self.__writer = None
+        self.__first_row: int = 0
+        self.__start_time: float = time.monotonic()
+        self.__start_segment()
+
+    @property
+    def scan_file(self) -> Path:
+        """Current segment file path."""
+        return self.__writer.scan_file
+
+    def write(self, advertisements: pd.DataFrame):
+        """Append advertisements to the current segment, starting a new one if due.
+
+        Args:
+            advertisements (pandas.DataFrame): Processed and filtered
+                advertisements with a default integer index.
+        """
+        if self.__rotation_due():
+            self.__end_segment()
+            self.__start_segment()
+        self.__writer.write(advertisements)
+        self.rows = self.__writer.rows
+
+    def sync(self):
+        """Flush buffered output of the current segment and sync it to disk."""
+        self.__writer.sync()
+
+    def close(self):
+        """Sync and close the current segment and update the manifest."""
+        if self.__writer is not None:
+            self.__end_segment()
+            self.__writer = None
+
+    def __rotation_due(self) -> bool:
+        """Whether the current segment has reached its size or interval."""
+        if self.__writer.rows == self.__first_row:
+            return False  # Note: never leaves an empty segment behind
+        if self.segment_interval is not None and time.monotonic() - self.__start_time >= self.segment_interval:
+            return True
+        return self.segment_size is not None and self.__writer.bytes >= self.segment_size * 2 ** 20
+
+    def __start_segment(self):
+        """Open the next segment file and list it in the manifest."""
+        segment_file = self.__scan_file.with_name(
+            f"{self.__scan_file.stem}_{len(self.segments) + 1:06d}{self.__scan_file.suffix}")
+        self.__writer = open_scan_writer(segment_file, self.output_format, self.flush_interval)
+        self.__writer.rows = self.rows  # Note: continues row numbering from the previous segment
+        self.__first_row = self.rows
+        self.__start_time = time.monotonic()
+        self.segments.append({'file': segment_file.name, 'start': datetime.now().isoformat(), 'end': None,
+                              'rows': 0, 'bytes': 0, 'deleted': False})
+        self.__write_manifest()
+
+    def __end_segment(self):
+        """Close the current segment, apply retention, and update the manifest."""
+        self.__writer.close()
+        segment = self.segments[-1]
+        segment.update({'end': datetime.now().isoformat(), 'rows': self.__writer.rows - self.__first_row,
+                        'bytes': self.__writer.scan_file.stat().st_size})
+        if self.retention is not None:
+            retained = [segment for segment in self.segments if not segment['deleted']]
+            total = sum(segment['bytes'] for segment in retained)
+            for oldest in retained[:-1]:  # Note: never deletes the segment just completed
+                if total <= self.retention * 2 ** 20:
+                    break
+                try:
+                    self.__scan_file.with_name(oldest['file']).unlink()
+                except FileNotFoundError:
+                    pass  # Note: already removed by hand
+                oldest['deleted'] = True
+                total -= oldest['bytes']
+        self.__write_manifest()
+
+    def __write_manifest(self):
+        """Atomically replace the manifest with the current segment list."""
+        manifest = {'output_format': self.output_format, 'segment_size': self.segment_size,
+                    'segment_interval': self.segment_interval, 'retention': self.retention,
+                    'rows': self.rows, 'segments': self.segments}
+        write_atomic(self.manifest_file, yaml.safe_dump(manifest, sort_keys=False))
+
+
+class Session(object):
+    """Long-lived beacon advertiser or scanner for repeated runs.
+
+    Arguments are parsed, the configuration loaded, and the logger and
+    advertiser or scanner, including its BeaconService and Sense HAT,
+    created once. Each run then only changes the settings that differ from
+    the previous run, so consecutive runs start almost immediately.
+
+    Attributes:
+        config (dict): Loaded configuration.
+        logger (logging.Logger): Configured logger.
+        mode (str): Either 'advertiser' or 'scanner'.
+        beacon (Advertiser, Scanner): The advertiser or scanner.
+    """
+
+    def __init__(self, args: List[str]):
+        """Instance initialization.
+
+        Args:
+            args (list): Arguments as provided by sys.argv.
+        """
+        parsed_args: Dict[str, str] = parse_args(args)
+        self.config: dict = load_config(parsed_args)
+        self.logger: logging.Logger = setup_logger(self.config['logger'])
+        self.mode: str = 'advertiser' if parsed_args['advertiser'] else 'scanner'
+        try:
+            if self.mode == 'advertiser':
+                self.logger.info("Beacon advertiser mode selected.")
+                self.beacon: Union[Advertiser, Scanner] = Advertiser(self.logger, **self.config['advertiser'])
+            else:
+                self.logger.info("Beacon scanner mode selected.")
+                self.beacon = Scanner(self.logger, **self.config['scanner'])
+        except Exception:
+            self.logger.exception("Fatal exception encountered")
+            close_logger(self.logger)
+            raise
+
+    def __enter__(self) -> 'Session':
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def run(self, **settings) -> Optional[pd.DataFrame]:
+        """Apply changed settings and advertise or scan once.
+
+        Args:
+            **settings: Settings keyed by attribute name to change before this
+                run, e.g. distance=1.5. Settings which are unchanged or do
+                not apply to the mode are ignored.
+
+        Returns:
+            If advertising, or scanning in streaming mode, then no output
+            (None) is returned. Otherwise scanned advertisements are returned
+            in pandas.DataFrame.
+
+        Raises:
+            Exception: Any exception of the run is logged and raised again,
+                leaving the session usable for further runs.
+        """
+        try:
+            for key, value in settings.items():
+                if key in DEFAULT_CONFIG[self.mode] and getattr(self.beacon, key) != value:
+                    self.logger.debug(f"Changing {self.mode} setting {key} to {value}.")
+                    setattr(self.beacon, key, value)
+            if self.mode == 'advertiser':
+                self.beacon.advertise()
+                return None
+            return self.beacon.scan()
+        except Exception:
+            self.logger.exception("Fatal exception encountered")
+            raise
+
+    def close(self):
+        """Close the logger."""
+        close_logger(self.logger)
+
+
 def setup_logger(config: dict) -> logging.Logger:
-    """Setup and return logger based on configuration."""
+    """Setup and return logger based on configuration.
+
+    With 'rate_limit' set, debug messages are limited to that many per second
+    per call site. With 'queue' set, records are only enqueued by the logging
+    thread and written by a background thread.
+    """
     log_file: Path = Path(LOG_NAME).resolve()
     log_file.chmod(0o777)
     logging.config.dictConfig(config['config'])
-    return logging.getLogger(config['name'])
+    logger = logging.getLogger(config['name'])
+    if config.get('rate_limit') is not None:
+        logger.addFilter(RateLimitFilter(config['rate_limit']))
+    if config.get('queue', False):
+        start_queue(logger)
+    return logger
 
 
 def close_logger(logger):
-    """Close logger."""
+    """Close logger, first writing any queued records."""
+    stop_queue(logger)
+    for log_filter in logger.filters[:]:
+        if isinstance(log_filter, RateLimitFilter):
+            logger.removeFilter(log_filter)
     for handler in logger.handlers[:]:
         handler.close()
         logger.removeHandler(handler)
@@ -747,6 +2367,7 @@ def parse_args(args: List[str]) -> Dict[str, str]:
                             help="Beacon scanner mode.")
     parser.add_argument('--config_yml', help="Configuration YAML.")
     parser.add_argument('--control_file', help="Control file.")
+    parser.add_argument('--control_socket', help="Control socket.")
     parser.add_argument('--scan_prefix', help="Scan output file prefix.")
     parser.add_argument('--timeout', type=float,
                         help="Timeout (s) for both beacon advertiser and  scanner modes.")
@@ -759,25 +2380,56 @@ def parse_args(args: List[str]) -> Dict[str, str]:
                         help="Beacon advertiser TX power.")
     parser.add_argument('--interval', type=int,
                         help="Beacon advertiser interval (ms).")
-    parser.add_argument('--revisit', type=int,
+    parser.add_argument('--revisit', type=float,
                         help="Beacon scanner revisit interval (s)")
+    parser.add_argument('--engine', choices=ENGINES,
+                        help="Beacon scanner engine.")
+    parser.add_argument('--adapters', nargs='+',
+                        help="Bluetooth adapters on which to scan in parallel, e.g. hci0 hci1.")
+    parser.add_argument('--stagger', action='store_true', default=None,
+                        help="Beacon scanner offsets the scans of multiple adapters.")
     parser.add_argument('--distance', type=float,
                         help="Pre-measured distance between the devices (m).")
     parser.add_argument('--use_sense_hat', type=bool,
                         help="Toggles use of sense hat.")
+    parser.add_argument('--stream', action='store_true', default=None,
+                        help="Beacon scanner streams each scan to the output file.")
+    parser.add_argument('--backend', choices=BACKENDS,
+                        help="Beacon scanner backend.")
+    parser.add_argument('--replay_path',
+                        help="Recorded scan file, folder, or glob pattern to replay.")
+    parser.add_argument('--replay_speed', type=float,
+                        help="Replay speed relative to real time ('inf' for as fast as possible).")
+    parser.add_argument('--segment_size', type=float,
+                        help="Size (MiB) at which streamed output starts a new segment file.")
+    parser.add_argument('--segment_interval', type=float,
+                        help="Time (s) after which streamed output starts a new segment file.")
+    parser.add_argument('--retention', type=float,
+                        help="Total size (MiB) of segment files retained on disk.")
+    parser.add_argument('--output_format', choices=list(OUTPUT_SUFFIXES),
+                        help="Beacon scanner output file format.")
+    parser.add_argument('--smoothing', choices=['ema', 'median', 'kalman'],
+                        help="Beacon scanner per-beacon RSSI smoothing method.")
+    parser.add_argument('--model',
+                        help="Pickled proximity model applied to scanned advertisements.")
+    parser.add_argument('--metrics_file',
+                        help="Prometheus text format file to which metrics are exported.")
+    parser.add_argument('--metrics_port', type=int,
+                        help="Port of a local HTTP endpoint serving metrics.")
     return vars(parser.parse_args(args))
 
 
 # noinspection PyBroadException
-def main(args: List[str]) -> Union[None, pd.DataFrame]:
+def main(args: List[str]) -> Optional[pd.DataFrame]:
     """Creates beacon and either starts advertising or scanning.
     
     Args:
         args (list): Arguments as provided by sys.argv.
 
     Returns:
-        If advertising then no output (None) is returned. If scanning 
-        then scanned advertisements are returned in pandas.DataFrame.
+        If advertising, or scanning in streaming mode, then no output (None)
+        is returned. Otherwise scanned advertisements are returned in
+        pandas.DataFrame.
     """
     # Initial setup
     parsed_args: Dict[str, str] = parse_args(args)
@@ -798,7 +2450,7 @@ def main(args: List[str]) -> Union[None, pd.DataFrame]:
             logger.info("Beacon scanner mode selected.")
             scanner = Scanner(logger, **config['scanner'])
             advertisements = scanner.scan()
-            output: pd.DataFrame = advertisements
+            output: Optional[pd.DataFrame] = advertisements
     except Exception:
         logger.exception("Fatal exception encountered")
     finally:
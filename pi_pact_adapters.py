@@ -0,0 +1,234 @@
+"""Parallel beacon scanning on multiple Bluetooth adapters.
+
+Each adapter scans in its own worker process and sends its scans to the
+scanner process through one bounded queue. When the scanner falls behind the
+queue fills up and workers block until it catches up, so memory use stays
+bounded. Scans from all adapters are merged into a single stream ordered by
+scan timestamp and tagged with the adapter that received them.
+"""
+
+from datetime import datetime, timedelta
+import heapq
+import logging
+import math
+import multiprocessing
+from pi_pact_backend import create_backend
+import queue
+import signal
+import time
+from typing import *
+
+ADAPTER_QUEUE_SIZE = 64  # Scans buffered across all adapters before workers block
+ADAPTER_PAUSE_POLL = 0.1  # (s) Interval at which paused workers check for a stop
+ADAPTER_JOIN_TIMEOUT = 5  # (s)
+
+
+def _scan_adapter(adapter: str, backend: str, replay_path: Optional[str], replay_speed: Union[float, int],
+                  use_socket: bool, shard: int, shards: int, offset: float, revisit, running, stopped, scans):
+    """Worker process scanning on one adapter.
+
+    Sends (adapter, timestamp, scan, blocked) for every scan, where blocked
+    is the total time (s) spent waiting on a full queue, and finally
+    (adapter, None, error, blocked) once it stops. With the replay backend
+    the worker replays every shards-th recorded scan, starting at shard.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Note: the scanner process handles stop signals
+    blocked = 0.0
+    error = None
+    hci_socket = None
+    try:
+        source = create_backend(backend, replay_path, replay_speed, replay_shard=shard, replay_shards=shards)
+        service = source.beacon_service(adapter)
+        if use_socket:
+            hci_socket = source.beacon_socket(adapter)
+            try:
+                if hci_socket is not None:
+                    hci_socket.open()
+            except OSError:
+                hci_socket = None
+        stopped.wait(offset)
+        while not stopped.is_set():
+            if not running.wait(ADAPTER_PAUSE_POLL):
+                continue
+            timestamp = datetime.now()
+            if hci_socket is not None:
+                scan = hci_socket.collect(revisit.value)
+            else:
+                scan = service.scan(math.ceil(revisit.value))  # Note: PyBluez scans whole seconds
+            start_time = time.monotonic()
+            scans.put((adapter, timestamp, scan, blocked))
+            blocked += time.monotonic() - start_time
+            if getattr(service, 'exhausted', False):
+                break
+    except Exception as exception:
+        error = f"{type(exception).__name__}: {exception}"
+    finally:
+        if hci_socket is not None:
+            hci_socket.close()
+        scans.put((adapter, None, error, blocked))
+
+
+class AdapterPool(object):
+    """Scans on several Bluetooth adapters in parallel worker processes.
+
+    Scans are released in timestamp order once every adapter that is still
+    scanning has reported a later scan, or once they are older than two
+    revisit intervals, so a stalled adapter cannot hold back the others.
+
+    Attributes:
+        adapters (list): Bluetooth adapter names, e.g. ['hci0', 'hci1'].
+        stagger (bool): Whether adapters start scanning evenly offset over
+            one revisit interval, so they cover each other's scan gaps.
+        stats (dict): Per-adapter statistics keyed by adapter name: number
+            of scans and advertisements received, time (s) spent blocked on a
+            full queue, and whether the adapter is still scanning.
+        exhausted (bool): Whether every adapter has stopped scanning and all
+            of their scans have been released.
+    """
+
+    def __init__(self, logger: logging.Logger, adapters: List[str], backend: str,
+                 replay_path: Optional[str], replay_speed: Union[float, int], revisit: Union[float, int],
+                 stagger: bool = False, use_socket: bool = False):
+        """Instance initialization.
+
+        Args:
+            logger (logging.Logger): Configured logger.
+            adapters (list): Bluetooth adapter names.
+            backend (str): Backend each worker scans with.
+            replay_path (str): Recorded scans replayed by the workers of the
+                replay backend, each replaying its own share of the scans.
+            replay_speed (float, int): Replay speed relative to real time.
+            revisit (float, int): Initial revisit interval (s).
+            stagger (bool): Start adapters evenly offset over one revisit
+                interval.
+            use_socket (bool): Scan on a raw HCI socket where possible.
+        """
+        self.adapters: List[str] = list(adapters)
+        self.stagger: bool = stagger
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self.exhausted: bool = False
+        self.__logger: logging.Logger = logger
+        self.__worker_args: Tuple[Any, ...] = (backend, replay_path, replay_speed, use_socket)
+        self.__context = multiprocessing.get_context('spawn')
+        self.__revisit = self.__context.Value('d', revisit, lock=False)
+        self.__running = self.__context.Event()
+        self.__stopped = self.__context.Event()
+        self.__scans = self.__context.Queue(ADAPTER_QUEUE_SIZE)
+        self.__workers: List[multiprocessing.process.BaseProcess] = []
+        self.__pending: List[Tuple[datetime, int, str, Dict[str, List[Any]]]] = []
+        self.__latest: Dict[str, datetime] = {}
+        self.__count: int = 0
+
+    def start(self):
+        """Start a worker process per adapter."""
+        self.__running.set()
+        self.__stopped.clear()
+        for i, adapter in enumerate(self.adapters):
+            self.stats[adapter] = {'scans': 0, 'advertisements': 0, 'blocked': 0.0, 'scanning': True}
+            offset = i * self.__revisit.value / len(self.adapters) if self.stagger else 0.0
+            worker = self.__context.Process(
+                target=_scan_adapter, name=f"AdapterPool-{adapter}", daemon=True,
+                args=(adapter, *self.__worker_args, i, len(self.adapters), offset, self.__revisit, self.__running,
+                      self.__stopped, self.__scans))
+            worker.start()
+            self.__workers.append(worker)
+        self.__logger.debug(f"Started scanning on adapters {self.adapters}.")
+
+    def pause(self):
+        """Pause scanning on every adapter after its current scan."""
+        self.__running.clear()
+
+    def resume(self):
+        """Resume scanning on every adapter."""
+        self.__running.set()
+
+    def scan(self, timeout: Union[float, int]) -> List[Tuple[str, datetime, Dict[str, List[Any]]]]:
+        """Receive scans from every adapter for the given time.
+
+        Args:
+            timeout (float, int): Time (s) to receive scans for. Also sets the
+                revisit interval of subsequent scans on every adapter.
+
+        Returns:
+            Released (adapter, timestamp, scan) in timestamp order, where scan
+            holds the advertisements keyed by address with payload [UUID,
+            MAJOR, MINOR, TX POWER, RSSI].
+        """
+        self.__revisit.value = timeout
+        deadline = time.monotonic() + timeout
+        while any(stats['scanning'] for stats in self.stats.values()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                self.__receive(self.__scans.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return self.__release(2 * math.ceil(timeout))
+
+    def close(self) -> List[Tuple[str, datetime, Dict[str, List[Any]]]]:
+        """Stop every worker once its current scan completes.
+
+        Returns:
+            Every scan not yet released, in timestamp order.
+        """
+        if not self.__workers:
+            return self.__release(None)
+        self.__stopped.set()
+        self.__running.set()
+        deadline = time.monotonic() + ADAPTER_JOIN_TIMEOUT + math.ceil(self.__revisit.value)
+        while any(stats['scanning'] for stats in self.stats.values()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                self.__receive(self.__scans.get(timeout=remaining))
+            except queue.Empty:
+                break
+        for worker in self.__workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+            if worker.is_alive():
+                worker.terminate()
+        self.__workers.clear()
+        for adapter, stats in self.stats.items():
+            self.__logger.info(f"Adapter {adapter} received {stats['advertisements']} advertisements in "
+                               f"{stats['scans']} scans, blocked for {stats['blocked']:.1f} s.")
+            stats['scanning'] = False
+        return self.__release(None)
+
+    def __receive(self, item: Tuple[str, Optional[datetime], Any, float]):
+        """Record one item sent by a worker."""
+        adapter, timestamp, scan, blocked = item
+        stats = self.stats[adapter]
+        stats['blocked'] = blocked
+        if timestamp is None:
+            stats['scanning'] = False
+            if scan is not None:
+                self.__logger.error(f"Adapter {adapter} stopped scanning: {scan}")
+            return
+        stats['scans'] += 1
+        stats['advertisements'] += len(scan)
+        self.__latest[adapter] = timestamp
+        heapq.heappush(self.__pending, (timestamp, self.__count, adapter, scan))
+        self.__count += 1
+
+    def __release(self, lateness: Optional[float]) -> List[Tuple[str, datetime, Dict[str, List[Any]]]]:
+        """Pop pending scans that can no longer be preceded by another adapter's scan.
+
+        Args:
+            lateness (float): Scans older than this (s) are released
+                regardless of other adapters. None releases every scan.
+        """
+        scanning = [adapter for adapter, stats in self.stats.items() if stats['scanning']]
+        if lateness is None or not scanning:
+            watermark = None
+        else:
+            watermark = datetime.now() - timedelta(seconds=lateness)
+            if all(adapter in self.__latest for adapter in scanning):
+                watermark = max(watermark, min(self.__latest[adapter] for adapter in scanning))
+        released = []
+        while self.__pending and (watermark is None or self.__pending[0][0] <= watermark):
+            timestamp, _, adapter, scan = heapq.heappop(self.__pending)
+            released.append((adapter, timestamp, scan))
+        self.exhausted = not scanning and not self.__pending
+        return released
@@ -0,0 +1,402 @@
+"""Pluggable hardware backends for beacon advertisement, scanning, and sensing.
+
+The hardware backend wraps PyBluez's BeaconService and the Sense HAT, which
+are only imported when used, and can also receive iBeacon advertisements
+continuously on a non-blocking raw HCI socket. The replay backend feeds recorded scan files
+back through the same interfaces at real-time or accelerated speed, along
+with the Sense HAT values recorded with each advertisement, so the scanner
+pipeline can be profiled and regression tested without Bluetooth hardware or
+a Sense HAT.
+"""
+
+from __future__ import annotations  # Note: annotations such as pd.DataFrame do not import pandas
+import glob
+from pathlib import Path
+from pi_pact_imports import lazy_import
+import select
+import socket
+import struct
+import time
+from typing import *
+
+# Imported on first use, so the hardware advertiser does not load them
+asyncio = lazy_import('asyncio')
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+BACKENDS = ['hardware', 'replay']
+REPLAY_SUFFIXES = ['.csv', '.parquet', '.arrow']
+REPLAY_COLUMNS = ['ADDRESS', 'TIMESTAMP', 'UUID', 'MAJOR', 'MINOR', 'TX POWER', 'RSSI']
+REPLAY_SENSE_HAT_COLUMNS = ['TEMPERATURE', 'HUMIDITY', 'PRESSURE', 'PITCH', 'ROLL', 'YAW']
+REPLAY_FALLBACK_INTERVAL = 0.1  # (s) Time between recorded scans without valid timestamps
+
+# HCI constants (see Bluetooth Core Specification Vol 4 Part E)
+HCI_COMMAND_PKT = 0x01
+HCI_EVENT_PKT = 0x04
+EVT_LE_META_EVENT = 0x3E
+EVT_LE_ADVERTISING_REPORT = 0x02
+OGF_LE_CTL = 0x08
+OCF_LE_SET_SCAN_PARAMETERS = 0x000B
+OCF_LE_SET_SCAN_ENABLE = 0x000C
+LE_SCAN_INTERVAL = 0x0010  # (0.625 ms) Continuous passive scanning
+LE_SCAN_WINDOW = 0x0010  # (0.625 ms)
+IBEACON_PREFIX = bytes([0xFF, 0x4C, 0x00, 0x02, 0x15])  # Note: manufacturer data, Apple, iBeacon
+
+
+class HardwareBackend(object):
+    """Bluetooth adapter and Sense HAT of the local device."""
+
+    # noinspection PyMethodMayBeStatic
+    def beacon_service(self, device: str):
+        """Create a PyBluez BeaconService on the given adapter."""
+        from bluetooth.ble import BeaconService
+        return BeaconService(device)
+
+    # noinspection PyMethodMayBeStatic
+    def beacon_socket(self, device: str) -> 'HciBeaconSocket':
+        """Create a raw HCI socket receiver on the given adapter."""
+        return HciBeaconSocket(device)
+
+    # noinspection PyMethodMayBeStatic
+    def sense_hat(self):
+        """Create a SenseHat."""
+        from sense_hat import SenseHat
+        return SenseHat()
+
+
+class HciBeaconSocket(object):
+    """Receives iBeacon advertisements continuously on a raw HCI socket.
+
+    LE scanning is enabled once with duplicate filtering disabled, so every
+    advertisement is reported along with its RSSI. Reports are read without
+    blocking and grouped into scans in the same format as PyBluez's
+    BeaconService.scan. Unlike BeaconService, scans can last a fraction of a
+    second and there is no gap between consecutive scans. Requires Python
+    built with Bluetooth socket support and root (CAP_NET_RAW) privileges.
+
+    Attributes:
+        device (int): Bluetooth adapter index, e.g. 0 for hci0.
+    """
+
+    def __init__(self, device: str):
+        """Instance initialization.
+
+        Args:
+            device (str): Bluetooth adapter name, e.g. 'hci0'.
+        """
+        self.device: int = int(device[len('hci'):]) if device.startswith('hci') else int(device)
+        self.__socket: Optional[socket.socket] = None
+
+    def open(self):
+        """Open the HCI socket and enable LE scanning.
+
+        Raises:
+            OSError: The HCI socket could not be opened, e.g. due to missing
+                privileges or Bluetooth socket support.
+        """
+        try:
+            sock = socket.socket(socket.AF_BLUETOOTH, socket.SOCK_RAW, socket.BTPROTO_HCI)
+        except AttributeError as error:
+            raise OSError("Python was built without Bluetooth socket support.") from error
+        try:
+            sock.bind((self.device,))
+            # Note: struct hci_filter {type_mask, event_mask[2], opcode}
+            sock.setsockopt(socket.SOL_HCI, socket.HCI_FILTER,
+                            struct.pack('<IIIH', 1 << HCI_EVENT_PKT, 0, 1 << (EVT_LE_META_EVENT - 32), 0))
+            self.__command(sock, OCF_LE_SET_SCAN_ENABLE, struct.pack('<BB', 0, 0))
+            self.__command(sock, OCF_LE_SET_SCAN_PARAMETERS,
+                           struct.pack('<BHHBB', 0, LE_SCAN_INTERVAL, LE_SCAN_WINDOW, 0, 0))
+            self.__command(sock, OCF_LE_SET_SCAN_ENABLE, struct.pack('<BB', 1, 0))
+        except OSError:
+            sock.close()
+            raise
+        sock.setblocking(False)
+        self.__socket = sock
+
+    def close(self):
+        """Disable LE scanning and close the HCI socket."""
+        if self.__socket is not None:
+            try:
+                self.__command(self.__socket, OCF_LE_SET_SCAN_ENABLE, struct.pack('<BB', 0, 0))
+            except OSError:
+                pass
+            self.__socket.close()
+            self.__socket = None
+
+    def fileno(self) -> int:
+        """File descriptor of the HCI socket."""
+        return self.__socket.fileno()
+
+    @staticmethod
+    def __command(sock: socket.socket, ocf: int, parameters: bytes):
+        """Send an LE controller command."""
+        sock.send(struct.pack('<BHB', HCI_COMMAND_PKT, (OGF_LE_CTL << 10) | ocf, len(parameters)) + parameters)
+
+    def read(self) -> Dict[str, List[Any]]:
+        """Read every pending advertising report without blocking.
+
+        Returns:
+            iBeacon advertisements keyed by address. Each value is the
+            payload [UUID, MAJOR, MINOR, TX POWER, RSSI]. Later reports from
+            the same address replace earlier ones.
+        """
+        advertisements: Dict[str, List[Any]] = {}
+        while True:
+            try:
+                packet = self.__socket.recv(260)
+            except (BlockingIOError, InterruptedError):
+                return advertisements
+            if len(packet) < 5 or packet[1] != EVT_LE_META_EVENT or packet[3] != EVT_LE_ADVERTISING_REPORT:
+                continue
+            offset = 5
+            for _ in range(packet[4]):
+                if offset + 9 > len(packet):
+                    break
+                length = packet[offset + 8]
+                if offset + 10 + length > len(packet):
+                    break
+                address = ':'.join(f"{octet:02X}" for octet in reversed(packet[offset + 2:offset + 8]))
+                data = packet[offset + 9:offset + 9 + length]
+                rssi = struct.unpack_from('b', packet, offset + 9 + length)[0]
+                offset += 10 + length
+                payload = self.__parse_ibeacon(data)
+                if payload is not None:
+                    advertisements[address] = payload + [rssi]
+
+    @staticmethod
+    def __parse_ibeacon(data: bytes) -> Optional[List[Any]]:
+        """Parse [UUID, MAJOR, MINOR, TX POWER] from advertising data, if an iBeacon."""
+        offset = 0
+        while offset < len(data):
+            length = data[offset]
+            if length == 0:
+                break
+            if length == 26 and data[offset + 1:offset + 6] == IBEACON_PREFIX:
+                beacon = data[offset + 6:offset + 27]
+                uuid = beacon[:16].hex()
+                major, minor, tx_power = struct.unpack_from('>HHB', beacon, 16)
+                return [f"{uuid[:8]}-{uuid[8:12]}-{uuid[12:16]}-{uuid[16:20]}-{uuid[20:]}",
+                        major, minor, tx_power]
+            offset += length + 1
+        return None
+
+    def collect(self, timeout: Union[float, int]) -> Dict[str, List[Any]]:
+        """Block while collecting advertisements received during one scan.
+
+        Args:
+            timeout (float, int): Scan duration (s).
+
+        Returns:
+            iBeacon advertisements keyed by address. Each value is the
+            payload [UUID, MAJOR, MINOR, TX POWER, RSSI].
+        """
+        advertisements: Dict[str, List[Any]] = {}
+        deadline = time.monotonic() + timeout
+        remaining = timeout
+        while remaining > 0:
+            readable, _, _ = select.select([self.__socket], [], [], remaining)
+            if readable:
+                advertisements.update(self.read())
+            remaining = deadline - time.monotonic()
+        advertisements.update(self.read())
+        return advertisements
+
+    async def scan(self, timeout: Union[float, int]) -> Dict[str, List[Any]]:
+        """Collect advertisements received during one scan.
+
+        Reports arriving between consecutive scans are buffered by the
+        socket and included in the next scan.
+
+        Args:
+            timeout (float, int): Scan duration (s).
+
+        Returns:
+            iBeacon advertisements keyed by address. Each value is the
+            payload [UUID, MAJOR, MINOR, TX POWER, RSSI].
+        """
+        loop = asyncio.get_running_loop()
+        advertisements: Dict[str, List[Any]] = {}
+        loop.add_reader(self.fileno(), lambda: advertisements.update(self.read()))
+        try:
+            await asyncio.sleep(timeout)
+        finally:
+            loop.remove_reader(self.fileno())
+        advertisements.update(self.read())
+        return advertisements
+
+
+class ReplayBackend(object):
+    """Replays recorded scan files in place of the Bluetooth adapter and Sense HAT.
+
+    Advertisements recorded with the same TIMESTAMP are returned by one call
+    to scan(), paced by the recorded time between scans divided by the replay
+    speed. Files are read one at a time, so memory use does not depend on the
+    size of the recording. The payload of every replayed advertisement is
+    followed by the Sense HAT values recorded with it, or NaN if none were
+    recorded, so they line up with their advertisement at any replay speed.
+    A recording can be split into shards, e.g. one per adapter of a scanner
+    scanning on several adapters, each replaying every shards-th scan at its
+    recorded time, so that together they replay every scan once.
+
+    Attributes:
+        files (list): Recorded scan files, in replay order.
+        speed (float, int): Replay speed relative to real time. Infinity
+            replays as fast as possible.
+        loop (bool): Restart from the first file once all files are replayed.
+        shard (int): Index of the replayed shard.
+        shards (int): Number of shards the recorded scans are split into.
+        exhausted (bool): Whether every recorded scan has been replayed.
+    """
+
+    def __init__(self, path: Union[str, Path], speed: Union[float, int] = 1, loop: bool = False,
+                 shard: int = 0, shards: int = 1):
+        """Instance initialization.
+
+        Args:
+            path (str, pathlib.Path): Recorded scan file, folder of scan files,
+                or glob pattern of scan files.
+            speed (float, int): Replay speed relative to real time. Infinity
+                replays as fast as possible.
+            loop (bool): Restart from the first file once all files are
+                replayed.
+            shard (int): Index of the shard to replay, from 0 to shards - 1.
+            shards (int): Number of shards the recorded scans are split into.
+
+        Raises:
+            FileNotFoundError: No recorded scan files found.
+            ValueError: Shard must be one of the shards.
+        """
+        path = Path(path)
+        if path.is_dir():
+            files = [file for file in path.iterdir() if file.suffix in REPLAY_SUFFIXES]
+        elif path.is_file():
+            files = [path]
+        else:
+            files = [Path(file) for file in glob.glob(str(path))]
+        self.files: List[Path] = sorted(files)
+        if not self.files:
+            raise FileNotFoundError(f"No recorded scan files found at {path}.")
+        if not 0 <= shard < shards:
+            raise ValueError(f"Replay shard must be in [0, {shards}).")
+        self.speed: Union[float, int] = speed
+        self.loop: bool = loop
+        self.shard: int = shard
+        self.shards: int = shards
+        self.exhausted: bool = False
+        self.__scans: Iterator[Tuple[float, Dict[str, List[Any]]]] = self.__replay()
+        self.__start_time: Optional[float] = None
+
+    def __read(self, file: Path) -> pd.DataFrame:
+        """Read the replayed columns of a recorded scan file."""
+        if file.suffix == '.csv':
+            header = pd.read_csv(file, nrows=0).columns
+            return pd.read_csv(file, usecols=[column for column in header
+                                              if column in REPLAY_COLUMNS + REPLAY_SENSE_HAT_COLUMNS])
+        from pi_pact_columnar import read_scan_file  # Note: pyarrow is only required for columnar files
+        return read_scan_file(file)
+
+    def __replay(self) -> Iterator[Tuple[float, Dict[str, List[Any]]]]:
+        """Generate the recorded scans of the shard with their replay time (s) since the start."""
+        offset = 0.0
+        count = 0  # Note: recorded scans of every shard so far
+        while True:
+            for file in self.files:
+                recording = self.__read(file)
+                if recording.empty:
+                    continue
+                timestamps = pd.to_datetime(recording['TIMESTAMP'], errors='coerce').ffill()
+                if timestamps.isna().any():
+                    times = np.arange(len(recording)) * REPLAY_FALLBACK_INTERVAL
+                    starts = np.arange(len(recording))
+                else:
+                    nanoseconds = timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+                    times = (nanoseconds - nanoseconds[0]) / 1e9
+                    starts = np.flatnonzero(np.diff(nanoseconds, prepend=nanoseconds[0] - 1))
+                ends = np.append(starts[1:], len(recording))
+                # Note: Sense HAT columns missing from the recording are replayed as NaN
+                payloads = recording.reindex(columns=REPLAY_COLUMNS[2:] + REPLAY_SENSE_HAT_COLUMNS)
+                payloads = payloads.to_numpy().tolist()
+                addresses = recording['ADDRESS'].tolist()
+                # Note: only the scans of the shard are built
+                shard_starts = starts[(count + np.arange(len(starts))) % self.shards == self.shard]
+                count += len(starts)
+                for start, end in zip(shard_starts, ends[np.searchsorted(starts, shard_starts)]):
+                    yield offset + times[start], {addresses[row]: payloads[row] for row in range(start, end)}
+                offset += times[-1] + REPLAY_FALLBACK_INTERVAL  # Note: files are replayed back to back
+            if not self.loop:
+                return
+
+    def scan(self, timeout: Union[float, int]) -> Dict[str, List[Any]]:
+        """Replay the next recorded scan.
+
+        Args:
+            timeout (float, int): Scan duration (s). Unused, recorded scans
+                are paced by their recorded timestamps.
+
+        Returns:
+            Recorded advertisements keyed by address. Each value is the
+            payload [UUID, MAJOR, MINOR, TX POWER, RSSI] followed by the
+            recorded [TEMPERATURE, HUMIDITY, PRESSURE, PITCH, ROLL, YAW].
+            Empty once every recorded scan has been replayed.
+        """
+        try:
+            replay_time, scan = next(self.__scans)
+        except StopIteration:
+            self.exhausted = True
+            return {}
+        if self.__start_time is None:
+            self.__start_time = time.monotonic() - replay_time / self.speed
+        delay = self.__start_time + replay_time / self.speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return scan
+
+    def beacon_service(self, device: str) -> 'ReplayBackend':
+        """Return this backend, which implements the BeaconService scan interface."""
+        return self
+
+    # noinspection PyMethodMayBeStatic
+    def beacon_socket(self, device: str) -> None:
+        """Recorded scans are only replayed through scan(), so there is no HCI socket."""
+        return None
+
+    # noinspection PyMethodMayBeStatic
+    def sense_hat(self) -> None:
+        """Sense HAT values are replayed with every advertisement, so there is no Sense HAT to sample."""
+        return None
+
+    def start_advertising(self, uuid: str, major: int, minor: int, tx_power: int, interval: int):
+        """Advertising is not replayed."""
+
+    def stop_advertising(self):
+        """Advertising is not replayed."""
+
+
+def create_backend(name: str, replay_path: Optional[str] = None, replay_speed: Union[float, int] = 1,
+                   replay_loop: bool = False, replay_shard: int = 0,
+                   replay_shards: int = 1) -> Union[HardwareBackend, ReplayBackend]:
+    """Create a backend by name.
+
+    Args:
+        name (str): One of {'hardware', 'replay'}.
+        replay_path (str): Recorded scan file, folder, or glob pattern for the
+            replay backend.
+        replay_speed (float, int): Replay speed relative to real time.
+            Infinity replays as fast as possible.
+        replay_loop (bool): Restart the replay once all files are replayed.
+        replay_shard (int): Index of the shard of the recorded scans to
+            replay.
+        replay_shards (int): Number of shards the recorded scans are split
+            into.
+
+    Returns:
+        The backend.
+
+    Raises:
+        ValueError: Backend must be one of the available backends.
+    """
+    if name == 'hardware':
+        return HardwareBackend()
+    elif name == 'replay':
+        return ReplayBackend(replay_path, replay_speed, replay_loop, replay_shard, replay_shards)
+    raise ValueError(f"Backend must be one of the available backends {BACKENDS}.")
@@ -0,0 +1,616 @@
+"""Benchmarks of beacon scanner processing and startup, and of dataset loading.
+
+Each process_scans variant runs in a fresh process so that its peak resident
+set size (RSS) is measured in isolation. Scans are synthetic, so no Bluetooth
+hardware or Sense HAT is required. Startup is measured in a fresh
+interpreter per mode; the advertiser requires PyBluez. Dataset loading,
+sampling, aggregation, and density estimation read the recorded data folders
+of this repository.
+"""
+
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import json
+import logging
+import multiprocessing
+import numpy as np
+import os
+import pandas as pd
+from pathlib import Path
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import *
+
+# Default configuration
+DEFAULT_ARGS = {'scans': 20000, 'beacons': 20, 'repeats': 3}
+# Times the startup phases of one mode in a fresh interpreter and prints them as JSON
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import json, sys
+import pi_pact
+times = {'import (ms)': 1e3 * (time.perf_counter() - start)}
+try:
+    with pi_pact.Session(sys.argv[2:]) as session:
+        times['ready (ms)'] = 1e3 * (time.perf_counter() - start)
+        session.beacon.advertise() if sys.argv[1] == 'advertiser' else session.beacon.scan()
+        times['first (ms)'] = 1e3 * (time.perf_counter() - start)
+except Exception as error:
+    times['error'] = f"{type(error).__name__}: {error}"
+times['modules'] = len(sys.modules)
+times['pandas loaded'] = type(sys.modules.get('pandas')).__name__ == 'module'
+print(json.dumps(times))
+"""
+
+
+def make_scans(scans: int, beacons: int) -> Tuple[List[Dict[str, List[Any]]], List[datetime]]:
+    """Generate synthetic beacon advertisement scans.
+
+    Args:
+        scans (int): Number of scans.
+        beacons (int): Number of distinct beacons received in every scan.
+
+    Returns:
+        Scans as returned by BeaconService.scan and their timestamps.
+    """
+    rng = np.random.default_rng(0)
+    addresses = [f"DC:A6:32:33:{i // 256:02X}:{i % 256:02X}" for i in range(beacons)]
+    uuids = [f"{i:08x}-0000-1000-8000-00805f9b34fb" for i in range(beacons)]
+    rssis = rng.integers(-90, -30, size=(scans, beacons)).tolist()
+    start = datetime.now()
+    scan_list = [{address: [uuid, 1, i + 1, 197, rssi]
+                  for i, (address, uuid, rssi) in enumerate(zip(addresses, uuids, row))} for row in rssis]
+    timestamps = [start + timedelta(seconds=0.1 * i) for i in range(scans)]
+    return scan_list, timestamps
+
+
+def process_scans_dicts(scans: List[Mapping[str, Sequence[Any]]], timestamps: List[datetime],
+                        distance: float) -> pd.DataFrame:
+    """Reference implementation building one dict per advertisement."""
+    from pi_pact import ADVERTISEMENT_COLUMNS
+    advertisements = []
+    for (scan, timestamp) in zip(scans, timestamps):
+        for address, payload in scan.items():
+            advertisements.append({'ADDRESS': address, 'TIMESTAMP': timestamp, 'UUID': payload[0],
+                                   'MAJOR': payload[1], 'MINOR': payload[2], 'TX POWER': payload[3],
+                                   'RSSI': payload[4], 'DISTANCE': distance})
+    return pd.DataFrame(advertisements, columns=ADVERTISEMENT_COLUMNS)
+
+
+def process_scans_buffer(scans: List[Mapping[str, Sequence[Any]]], timestamps: List[datetime],
+                         distance: float) -> pd.DataFrame:
+    """Columnar implementation used by Scanner.process_scans."""
+    from pi_pact import AdvertisementBuffer
+    buffer = AdvertisementBuffer()
+    for (scan, timestamp) in zip(scans, timestamps):
+        buffer.append(scan, timestamp)
+    return buffer.to_frame(distance)
+
+
+PROCESS_VARIANTS: Dict[str, Callable[..., pd.DataFrame]] = {'dicts': process_scans_dicts,
+                                                             'buffer': process_scans_buffer}
+
+
+def peak_rss() -> int:
+    """Peak resident set size (bytes) of the current process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else 1024 * peak  # Note: Linux reports kilobytes
+
+
+def run_process_variant(variant: str, scans: int, beacons: int, repeats: int) -> Dict[str, float]:
+    """Time one process_scans variant. Runs in a child process.
+
+    Returns:
+        Rows processed per second (best of repeats), peak RSS (MiB) of the
+        process, peak RSS increase (MiB) while processing, and memory (MiB)
+        of the resulting DataFrame.
+    """
+    import pi_pact  # Note: imported before measuring the baseline
+    scan_list, timestamps = make_scans(scans, beacons)
+    baseline = peak_rss()
+    best = float('inf')
+    advertisements = pd.DataFrame()
+    for _ in range(repeats):
+        advertisements = None
+        start = time.perf_counter()
+        advertisements = PROCESS_VARIANTS[variant](scan_list, timestamps, 0.2)
+        best = min(best, time.perf_counter() - start)
+    return {'rows/s': len(advertisements) / best, 'peak RSS (MiB)': peak_rss() / 2 ** 20,
+            'processing RSS (MiB)': (peak_rss() - baseline) / 2 ** 20,
+            'DataFrame (MiB)': advertisements.memory_usage(deep=True).sum() / 2 ** 20}
+
+
+def benchmark_process(scans: int, beacons: int, repeats: int) -> pd.DataFrame:
+    """Compare process_scans variants, each in a fresh process.
+
+    Args:
+        scans (int): Number of synthetic scans.
+        beacons (int): Number of beacons received in every scan.
+        repeats (int): Number of timed repeats per variant.
+
+    Returns:
+        Benchmark results indexed by variant.
+    """
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for variant in PROCESS_VARIANTS:
+        with context.Pool(1) as pool:
+            results[variant] = pool.apply(run_process_variant, (variant, scans, beacons, repeats))
+    return pd.DataFrame.from_dict(results, orient='index')
+
+
+def benchmark_smoothing(scans: int, beacons: int, repeats: int) -> pd.DataFrame:
+    """Time streaming RSSI smoothing of one scan at a time with each method.
+
+    Args:
+        scans (int): Number of synthetic scans.
+        beacons (int): Number of beacons received in every scan.
+        repeats (int): Number of timed repeats per method.
+
+    Returns:
+        Benchmark results indexed by smoothing method.
+    """
+    from pi_pact_smoothing import SMOOTHING_METHODS, create_smoother, smoother_slot_bytes
+    from pi_pact_state import BeaconStateTable
+    scan_list, timestamps = make_scans(min(scans, 1000), beacons)
+    batches = [process_scans_buffer([scan], [timestamp], 0.2) for scan, timestamp in zip(scan_list, timestamps)]
+    results = {}
+    for method in SMOOTHING_METHODS:
+        table = BeaconStateTable(listener_bytes=smoother_slot_bytes(method))
+        smoother = create_smoother(method, table.capacity)
+        table.subscribe(smoother.clear)
+        best = float('inf')
+        for _ in range(repeats):
+            table.clear()
+            smoother.clear()
+            start = time.perf_counter()
+            for batch in batches:
+                smoother.smooth(batch, table.record(batch))
+            best = min(best, time.perf_counter() - start)
+        results[method] = {'rows/s': len(batches) * beacons / best, 'ms per scan': 1e3 * best / len(batches)}
+    return pd.DataFrame.from_dict(results, orient='index')
+
+
+def benchmark_state(scans: int, beacons: int, repeats: int) -> pd.DataFrame:
+    """Time recording scans in the beacon state table with stable and rotating addresses.
+
+    With rotating addresses every scan receives only beacons never seen
+    before, so the table evicts as many beacons as it receives once full.
+
+    Args:
+        scans (int): Number of synthetic scans.
+        beacons (int): Number of beacons received in every scan.
+        repeats (int): Number of timed repeats per case.
+
+    Returns:
+        Benchmark results indexed by case.
+    """
+    from pi_pact_state import BeaconStateTable
+    scan_list, timestamps = make_scans(min(scans, 1000), beacons)
+    stable = [process_scans_buffer([scan], [timestamp], 0.2) for scan, timestamp in zip(scan_list, timestamps)]
+    rotating = []
+    for i, batch in enumerate(stable):
+        batch = batch.copy()
+        batch['ADDRESS'] = [f"{i:06X}{j:06X}" for j in range(len(batch))]
+        rotating.append(batch)
+    results = {}
+    for case, batches in {'stable': stable, 'rotating': rotating}.items():
+        table = BeaconStateTable(max_memory=1)
+        best = float('inf')
+        for _ in range(repeats):
+            table.clear()
+            start = time.perf_counter()
+            for batch in batches:
+                table.record(batch)
+            best = min(best, time.perf_counter() - start)
+        results[case] = {'rows/s': len(batches) * beacons / best, 'ms per scan': 1e3 * best / len(batches),
+                         'beacons': len(table), 'capacity': table.capacity,
+                         'evictions': table.stats['lru_evictions']}
+    return pd.DataFrame.from_dict(results, orient='index')
+
+
+def benchmark_metrics(scans: int, beacons: int, repeats: int) -> pd.DataFrame:
+    """Time the metric updates the scanner makes per scan, with metrics disabled and enabled.
+
+    Args:
+        scans (int): Number of simulated scans.
+        beacons (int): Number of beacons received in every scan.
+        repeats (int): Number of timed repeats per case.
+
+    Returns:
+        Benchmark results indexed by case.
+    """
+    from pi_pact_metrics import Metrics
+    results = {}
+    for case, enabled in {'disabled': False, 'enabled': True}.items():
+        metrics = Metrics('scanner', enabled)
+        best = float('inf')
+        for _ in range(repeats):
+            metrics.reset()
+            start = time.perf_counter()
+            for _ in range(scans):
+                metrics.increment('scans_total')
+                metrics.observe('scan_duration_seconds', time.perf_counter() - start)
+                metrics.increment('advertisements_received_total', beacons)
+                metrics.observe('scan_advertisements', beacons)
+                metrics.increment('advertisements_passed_total', beacons)
+                metrics.observe('process_duration_seconds', time.perf_counter() - start)
+                metrics.observe('write_duration_seconds', time.perf_counter() - start)
+            best = min(best, time.perf_counter() - start)
+        results[case] = {'us per scan': 1e6 * best / scans, 'us per advertisement': 1e6 * best / (scans * beacons)}
+    return pd.DataFrame.from_dict(results, orient='index')
+
+
+class SyncedFileHandler(logging.FileHandler):
+    """File handler syncing every record to disk, like a log file on a slow SD card."""
+
+    def emit(self, record: logging.LogRecord):
+        super().emit(record)
+        os.fsync(self.stream.fileno())
+
+
+def benchmark_logging(scans: int, beacons: int, repeats: int) -> pd.DataFrame:
+    """Time per scan debug messages logged synchronously, through the log queue, and rate limited.
+
+    Args:
+        scans (int): Number of messages logged, at most 2000.
+        beacons (int): Unused.
+        repeats (int): Number of timed repeats per case.
+
+    Returns:
+        Benchmark results indexed by case.
+    """
+    from pi_pact_logging import RateLimitFilter, start_queue, stop_queue
+    scans = min(scans, 2000)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for case in ['synchronous', 'queue', 'queue, rate limit 10/s']:
+            logger = logging.getLogger(f"benchmark_logging.{case}")
+            logger.setLevel(logging.DEBUG)
+            logger.propagate = False
+            handler = SyncedFileHandler(Path(directory, 'benchmark.log'))
+            handler.setFormatter(logging.Formatter('%(asctime)s   %(module)-10s   %(levelname)-8s   %(message)s'))
+            logger.addHandler(handler)
+            if case.startswith('queue'):
+                start_queue(logger)
+            if 'rate limit' in case:
+                logger.addFilter(RateLimitFilter(10))
+            durations = []
+            for _ in range(repeats):
+                for scan in range(scans):
+                    start = time.perf_counter()
+                    logger.debug(f"Performing scan #{scan} at revisit 0.1.")
+                    durations.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            stop_queue(logger)
+            drain = time.perf_counter() - start
+            handler.close()
+            logger.removeHandler(handler)
+            results[case] = {'median us per call': 1e6 * np.median(durations),
+                             'p99 us per call': 1e6 * np.percentile(durations, 99), 'drain (ms)': 1e3 * drain}
+    return pd.DataFrame.from_dict(results, orient='index')
+
+
+def benchmark_startup(scans: int, beacons: int, repeats: int) -> pd.DataFrame:
+    """Time cold starts of the advertiser and scanner, each in a fresh interpreter.
+
+    Times are measured from the start of the interpreter's first statement:
+    import is the time to import pi_pact, ready the time until the
+    advertiser or scanner has been created, and first the time until the
+    first advertisement or scan has completed and stopped. The scanner
+    replays a recorded scan file, while the advertiser requires PyBluez.
+
+    Args:
+        scans (int): Unused.
+        beacons (int): Unused.
+        repeats (int): Number of cold starts per mode.
+
+    Returns:
+        Benchmark results (best of repeats) indexed by mode.
+    """
+    from pi_pact import DEFAULT_CONFIG
+    package = Path(__file__).resolve().parent
+    replay_file = sorted((package / DEFAULT_CONFIG['scanner']['replay_path']).glob('*.csv'))[0]
+    arguments = {'advertiser': ['-a', '--timeout', '0.001'],
+                 'scanner': ['-s', '--timeout', '0.001', '--backend', 'replay', '--replay_path', str(replay_file),
+                             '--replay_speed', 'inf']}
+    environment = {**os.environ, 'PYTHONPATH': os.pathsep.join([str(package), os.environ.get('PYTHONPATH', '')])}
+    results = {}
+    for mode, mode_arguments in arguments.items():
+        runs = []
+        for _ in range(repeats):
+            with tempfile.TemporaryDirectory() as directory:
+                Path(directory, DEFAULT_CONFIG['logger']['name']).touch()
+                output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, mode, *mode_arguments], cwd=directory,
+                                        env=environment, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        check=True, universal_newlines=True).stdout
+            runs.append(json.loads(output.splitlines()[-1]))
+        runs = pd.DataFrame(runs)
+        result = runs.iloc[0].to_dict()
+        result.update(runs.filter(like='(ms)').min().to_dict())
+        results[mode] = result
+    results = pd.DataFrame.from_dict(results, orient='index')
+    return results[[column for column in results.columns if column != 'error']
+                   + [column for column in results.columns if column == 'error']]
+
+
+def best_of(function: Callable[[], Any], repeats: int) -> Tuple[float, Any]:
+    """Time repeated calls of a function.
+
+    Args:
+        function (callable): Function taking no arguments.
+        repeats (int): Number of timed calls.
+
+    Returns:
+        Shortest duration (s) of the calls and the result of the last call.
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+@contextmanager
+def dataset_cache(package: Path) -> Iterator[Path]:
+    """Temporary compiled dataset cache of the recorded data folders, built before any timing.
+
+    Args:
+        package (pathlib.Path): Repository root containing the data folders.
+
+    Yields:
+        Cache directory, removed afterwards.
+    """
+    from pi_pact_dataset import load_dataset
+    with tempfile.TemporaryDirectory() as cache_dir:
+        load_dataset(['RSSI'], root=package, cache=True, cache_dir=cache_dir)
+        yield Path(cache_dir)
+
+
+def benchmark_dataset(repeats: int) -> pd.DataFrame:
+    """Time loading the 4var training data of the recorded Sense HAT data folder.
+
+    Compares the notebooks' former loop, reading every column of each file
+    and appending it to the data read so far, with pi_pact_dataset reading
+    only the needed columns with compact types, in this process and in one
+    worker process per CPU, and with building and then loading a compiled
+    dataset cache in a temporary directory.
+
+    Args:
+        repeats (int): Number of timed repeats per variant. The cache is
+            built once.
+
+    Returns:
+        Benchmark results (best of repeats) indexed by variant.
+    """
+    from pi_pact_dataset import DEFAULT_PATTERN, dataset_files, load_dataset
+    package = Path(__file__).resolve().parent
+    columns = ['DISTANCE', 'RSSI', 'HUMIDITY', 'PRESSURE']
+
+    def append_loop() -> pd.DataFrame:
+        data = pd.DataFrame(columns=columns)
+        for csv_file in dataset_files(DEFAULT_PATTERN, package):
+            datapart = pd.read_csv(csv_file)
+            data = pd.concat([data, datapart.drop(columns=[column for column in datapart.columns
+                                                           if column not in columns])])
+        return data
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        variants = {'append loop': append_loop,
+                    'loader, 1 process': lambda: load_dataset(columns, root=package, processes=1),
+                    f"loader, {os.cpu_count()} CPUs": lambda: load_dataset(columns, root=package),
+                    'cache build': lambda: load_dataset(columns, root=package, cache=True, cache_dir=cache_dir),
+                    'cache': lambda: load_dataset(columns, root=package, cache=True, cache_dir=cache_dir)}
+        results = {}
+        for variant, load in variants.items():
+            duration, data = best_of(load, 1 if variant == 'cache build' else repeats)
+            results[variant] = {'ms': 1e3 * duration, 'rows': len(data),
+                                'DataFrame (MiB)': data.memory_usage(deep=True).sum() / 2 ** 20}
+    return pd.DataFrame.from_dict(results, orient='index')
+
+
+def benchmark_sampling(repeats: int) -> pd.DataFrame:
+    """Time sampling a class balanced binary training set of the recorded Sense HAT data folder.
+
+    Compares the notebooks' former loop, masking, sampling, and appending
+    each class of the loaded dataset in turn, with pi_pact_sampling sampling
+    the loaded dataset in one grouped pass and streaming the files one at a
+    time through a reservoir sampler.
+
+    Args:
+        repeats (int): Number of timed repeats per variant.
+
+    Returns:
+        Benchmark results (best of repeats) indexed by variant.
+    """
+    from pi_pact_dataset import load_dataset
+    from pi_pact_sampling import stratified_sample, stream_sample
+    package = Path(__file__).resolve().parent
+    columns = ['RSSI', 'HUMIDITY', 'PRESSURE']
+    sample_size = 30000
+    with dataset_cache(package) as cache_dir:
+        data_copy = load_dataset(columns, root=package, cache=True, cache_dir=cache_dir, label_scheme='binary')
+
+    def append_loop() -> pd.DataFrame:
+        data = pd.DataFrame(columns=columns + ['LABEL'])
+        for value in data_copy['LABEL'].unique():
+            datapart = data_copy[data_copy.LABEL == value]
+            data = pd.concat([data, datapart.sample(sample_size, random_state=1)])
+        return data
+
+    variants = {'append loop': append_loop,
+                'stratified': lambda: stratified_sample(data_copy, sample_size, random_state=1),
+                'stream': lambda: stream_sample(columns, sample_size, 'binary', root=package, random_state=1)}
+    results = {}
+    for variant, sample in variants.items():
+        duration, data = best_of(sample, repeats)
+        results[variant] = {'ms': 1e3 * duration, 'rows': len(data),
+                            'sample (MiB)': data.memory_usage(deep=True).sum() / 2 ** 20}
+    return pd.DataFrame.from_dict(results, orient='index')
+
+
+def benchmark_aggregation(repeats: int) -> pd.DataFrame:
+    """Time taking the mode RSSI of every DISTANCE and PRESSURE value of the recorded Sense HAT data folder.
+
+    Compares the plot scripts' former loops, sorting the loaded dataset then
+    masking (DISTANCE) or querying (PRESSURE) it and taking the mode for
+    each distinct value, with pi_pact_histogram aggregating RSSI histograms
+    from the dataset cache and from the CSV files one at a time. The
+    PRESSURE query loop is extrapolated from its first 100 values, as it
+    takes minutes over the tens of thousands of distinct pressures.
+
+    Args:
+        repeats (int): Number of timed repeats per variant.
+
+    Returns:
+        Benchmark results (best of repeats) indexed by variant.
+    """
+    from pi_pact_dataset import load_dataset
+    from pi_pact_histogram import aggregate_dataset
+    package = Path(__file__).resolve().parent
+    query_values = 100
+
+    def mask_loop(cache_dir: Path) -> int:
+        data = load_dataset(['RSSI', 'DISTANCE'], root=package, cache=True, cache_dir=cache_dir).copy()
+        data.sort_values(by=['DISTANCE', 'RSSI'], inplace=True)
+        modes = [data[data.DISTANCE == distance].agg(func='mode') for distance in data['DISTANCE'].unique()]
+        return len(modes)
+
+    def query_loop(cache_dir: Path) -> Tuple[int, float]:
+        data = load_dataset(['RSSI', 'PRESSURE'], root=package, cache=True, cache_dir=cache_dir).copy()
+        data.sort_values(by=['PRESSURE', 'RSSI'], inplace=True)
+        values = data['PRESSURE'].dropna().unique()
+        start = time.perf_counter()
+        for value in values[:query_values]:
+            data.query(f'PRESSURE == {value}').agg(func='mode')
+        return len(values), (time.perf_counter() - start) * (len(values) / query_values - 1)  # Note: remaining values
+
+    def histogram(key: str, cache_dir: Optional[Path], key_width: Optional[float] = None) -> int:
+        return len(aggregate_dataset(key, root=package, key_width=key_width, cache=cache_dir is not None,
+                                     cache_dir=cache_dir).mode())
+
+    results = {}
+    with dataset_cache(package) as cache_dir:
+        variants = {'mask loop, DISTANCE': lambda: mask_loop(cache_dir),
+                    'histogram, DISTANCE': lambda: histogram('DISTANCE', cache_dir),
+                    'query loop, PRESSURE (extrapolated)': lambda: query_loop(cache_dir),
+                    'histogram, PRESSURE': lambda: histogram('PRESSURE', cache_dir),
+                    'histogram, PRESSURE, 1 mbar bins': lambda: histogram('PRESSURE', cache_dir, 1),
+                    'histogram stream, PRESSURE': lambda: histogram('PRESSURE', None)}
+        for variant, aggregate in variants.items():
+            duration, groups = best_of(aggregate, repeats)
+            remaining = 0
+            if isinstance(groups, tuple):
+                groups, remaining = groups
+            results[variant] = {'ms': 1e3 * (duration + remaining), 'groups': groups}
+    return pd.DataFrame.from_dict(results, orient='index')
+
+
+def benchmark_kde(repeats: int) -> pd.DataFrame:
+    """Time estimating the RSSI density of each distance class of the recorded Sense HAT data folder.
+
+    Compares an exact Gaussian sum over 15,000 sampled advertisements per
+    class at the 1,000 evaluation points of pandas.DataFrame.plot.kde, as
+    the distance plot script formerly did through scipy, with pi_pact_kde
+    convolving the binned RSSI counts of the full corpus by FFT, including
+    and excluding aggregating the counts from the dataset cache.
+
+    Args:
+        repeats (int): Number of timed repeats per variant.
+
+    Returns:
+        Benchmark results (best of repeats) indexed by variant.
+    """
+    from pi_pact_dataset import load_dataset
+    from pi_pact_histogram import aggregate_dataset
+    from pi_pact_kde import binned_kde, kde_dataset
+    from pi_pact_sampling import stratified_sample
+    from pi_pact_sort import LABEL_SCHEMES
+    package = Path(__file__).resolve().parent
+    results = {}
+    with dataset_cache(package) as cache_dir:
+        sample = stratified_sample(load_dataset(['RSSI'], root=package, cache=True, cache_dir=cache_dir,
+                                                label_scheme='3b'), 15000, random_state=1)
+        histogram = aggregate_dataset('DISTANCE', root=package, cache=True, cache_dir=cache_dir)
+        counts = histogram.counts.groupby(LABEL_SCHEMES['3b'](histogram.keys)).sum()
+
+        def gaussian_sum() -> int:
+            rssi = [sample.loc[sample['LABEL'] == label, 'RSSI'].to_numpy(dtype=np.float64)
+                    for label in np.unique(sample['LABEL'])]
+            grid = np.linspace(min(values.min() for values in rssi) - 10, max(values.max() for values in rssi) + 10,
+                               1000)
+            for values in rssi:
+                sigma = values.std(ddof=1)
+                np.exp(-0.5 * ((grid[:, np.newaxis] - values[np.newaxis, :]) / sigma) ** 2).sum(axis=1)
+            return len(sample)
+
+        def corpus(bandwidths: List[float]) -> int:
+            return kde_dataset('3b', bandwidths, root=package, relative=True, cache_dir=cache_dir).counts.sum()
+
+        variants = {'Gaussian sum, 15,000 per class': gaussian_sum,
+                    'binned FFT, corpus': lambda: corpus([1]),
+                    'binned FFT, corpus, 4 bandwidths': lambda: corpus([0.5, 1, 2, 4]),
+                    'binned FFT, counts only': lambda: binned_kde(counts, [1], relative=True).counts.sum()}
+        for variant, estimate in variants.items():
+            duration, rows = best_of(estimate, repeats)
+            results[variant] = {'ms': 1e3 * duration, 'rows': rows}
+    return pd.DataFrame.from_dict(results, orient='index')
+
+
+BENCHMARKS: Dict[str, Callable[..., pd.DataFrame]] = {'process': benchmark_process,
+                                                      'smoothing': benchmark_smoothing,
+                                                      'state': benchmark_state,
+                                                      'metrics': benchmark_metrics,
+                                                      'logging': benchmark_logging,
+                                                      'startup': benchmark_startup}
+# Benchmarks of the recorded data folders, which only take the number of repeats
+DATASET_BENCHMARKS: Dict[str, Callable[[int], pd.DataFrame]] = {'dataset': benchmark_dataset,
+                                                                'sampling': benchmark_sampling,
+                                                                'aggregation': benchmark_aggregation,
+                                                                'kde': benchmark_kde}
+
+
+def parse_args(args: List[str]) -> Dict[str, Any]:
+    """Input argument parser.
+
+    Args:
+        args (list): Input arguments as taken from sys.argv.
+
+    Returns:
+        Dictionary containing parsed input arguments. Keys are argument names.
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks of beacon scanner processing.")
+    parser.add_argument('benchmark', choices=list(BENCHMARKS) + list(DATASET_BENCHMARKS), help="Benchmark to run.")
+    parser.add_argument('--scans', type=int, default=DEFAULT_ARGS['scans'],
+                        help="Number of synthetic scans. Not used by dataset benchmarks.")
+    parser.add_argument('--beacons', type=int, default=DEFAULT_ARGS['beacons'],
+                        help="Number of beacons received in every scan. Not used by dataset benchmarks.")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_ARGS['repeats'],
+                        help="Number of timed repeats per variant.")
+    return vars(parser.parse_args(args))
+
+
+def main(args: List[str]):
+    """Runs a benchmark and prints its results.
+
+    Args:
+        args (list): Arguments as provided by sys.argv.
+    """
+    parsed_args = parse_args(args)
+    name = parsed_args.pop('benchmark')
+    if name in DATASET_BENCHMARKS:
+        results = DATASET_BENCHMARKS[name](parsed_args['repeats'])
+    else:
+        results = BENCHMARKS[name](**parsed_args)
+    print(results.to_string(float_format=lambda x: f"{x:,.1f}"))
+
+
+if __name__ == '__main__':
+    """Script execution."""
+    main(sys.argv[1:])
@@ -0,0 +1,189 @@
+"""Catalog of the recorded scan files in the data folders.
+
+Scan files are named following the convention of
+Lee_Winston_CollectedDataOverview,
+
+    <'indoor' or 'icePack'>_<Distance>_noObstruct_<'SenseHat', if applicable>_scan_<Date>T<Time>.csv
+
+e.g. indoor_116in_noObstruct_SenseHat_scan_20200715T232655.csv. The catalog
+holds one row per file with the fields of its name, distances converted to
+meters, along with its row count and time range taken from the compiled
+dataset cache (pi_pact_dataset.DatasetCache). Selecting files from the
+catalog before loading them makes loading a subset of the data, e.g. only
+files recorded under 2 m, scale with the subset rather than the corpus:
+
+    catalog = load_catalog()
+    data = load_dataset(['DISTANCE', 'RSSI'], files=select_files(catalog, distance=(0, 2)))
+
+Command line usage:
+
+    python3 pi_pact_catalog.py --pattern 'indoor*/*.csv' --environment indoor --max_distance 2
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from pi_pact_dataset import CACHE_DIR, DatasetCache, dataset_files
+import re
+import sys
+from typing import *
+
+# Scan file name convention. Tolerates the misspellings and separators found in the recorded data folders.
+FILE_NAME_PATTERN = re.compile(r'^(?P<environment>[a-z]+\d*)_(?P<distance>\d+(?:\.\d+)?)_?(?P<unit>in|cm|ft|m)_'
+                               r'(?P<obstruction>[a-z]+)_(?:(?P<sense_hat>sensehat)_)?scan_'
+                               r'(?P<recorded>\d{8}T\d{6})\.csv$', re.IGNORECASE)
+DISTANCE_UNITS: Dict[str, float] = {'in': 0.0254, 'cm': 0.01, 'ft': 0.3048, 'm': 1.0}  # (m) per unit
+CATALOG_COLUMNS = ['FILE', 'FOLDER', 'ENVIRONMENT', 'DISTANCE', 'SENSE HAT', 'RECORDED', 'ROWS', 'START', 'END']
+
+
+def parse_file_name(name: str) -> Dict[str, Any]:
+    """Fields of a scan file name.
+
+    Args:
+        name (str): Scan file name, e.g.
+            'indoor_116in_noObstruct_SenseHat_scan_20200715T232655.csv'.
+
+    Returns:
+        Dictionary of the ENVIRONMENT, e.g. 'indoor' or 'icePack2', the
+        pre-measured DISTANCE (m), whether a SENSE HAT was used, and the time
+        the file was RECORDED. Fields are null if the name does not follow
+        the convention.
+    """
+    match = FILE_NAME_PATTERN.match(name)
+    if match is None:
+        return {'ENVIRONMENT': None, 'DISTANCE': np.nan, 'SENSE HAT': None, 'RECORDED': pd.NaT}
+    return {'ENVIRONMENT': match['environment'],
+            'DISTANCE': round(float(match['distance']) * DISTANCE_UNITS[match['unit'].lower()], 4),
+            'SENSE HAT': match['sense_hat'] is not None,
+            'RECORDED': pd.to_datetime(match['recorded'], format='%Y%m%dT%H%M%S')}
+
+
+def load_catalog(pattern: str = '*/*.csv', root: Union[str, Path] = '.',
+                 cache_dir: Optional[Union[str, Path]] = None, processes: Optional[int] = None) -> pd.DataFrame:
+    """Catalog of the scan files matching a pattern.
+
+    Row counts and time ranges are read from the dataset cache of each data
+    folder, which is first updated with any files added since, so only new
+    files are parsed.
+
+    Args:
+        pattern (str): Glob pattern of CSV scan files relative to the root.
+            Defaults to every data folder.
+        root (str, pathlib.Path): Directory the pattern is relative to.
+        cache_dir (str, pathlib.Path): Dataset cache directory. Defaults to
+            CACHE_DIR within the root.
+        processes (int): Number of worker processes parsing new files.
+            Defaults to the number of CPUs.
+
+    Returns:
+        One row per file, sorted by file, with columns CATALOG_COLUMNS. FILE
+        can be passed to pi_pact_dataset.load_dataset.
+    """
+    if cache_dir is None:
+        cache_dir = Path(root) / CACHE_DIR
+    files = dataset_files(pattern, root)
+    stats = []
+    for folder in sorted(set(csv_file.parent for csv_file in files)):
+        folder_cache = DatasetCache(folder, cache_dir)
+        folder_cache.update(processes)
+        folder_stats = folder_cache.file_stats()
+        folder_stats['FILE'] = [folder / name for name in folder_stats['NAME']]
+        stats.append(folder_stats)
+    catalog = pd.DataFrame([{'FILE': csv_file, 'FOLDER': csv_file.parent.name, **parse_file_name(csv_file.name)}
+                            for csv_file in files],
+                           columns=['FILE', 'FOLDER', 'ENVIRONMENT', 'DISTANCE', 'SENSE HAT', 'RECORDED'])
+    if stats:
+        catalog = catalog.merge(pd.concat(stats, ignore_index=True).drop(columns='NAME'), on='FILE', how='left')
+    else:
+        catalog = catalog.reindex(columns=CATALOG_COLUMNS)
+    catalog['FOLDER'] = catalog['FOLDER'].astype('category')
+    catalog['ENVIRONMENT'] = catalog['ENVIRONMENT'].astype('category')
+    return catalog[CATALOG_COLUMNS]
+
+
+def select_files(catalog: pd.DataFrame, distance: Optional[Tuple[float, float]] = None,
+                 environment: Optional[Union[str, Iterable[str]]] = None, sense_hat: Optional[bool] = None,
+                 recorded: Optional[Tuple[Any, Any]] = None) -> List[Path]:
+    """Files of a catalog matching every given condition.
+
+    Args:
+        catalog (pandas.DataFrame): Catalog from load_catalog.
+        distance (tuple): Pre-measured distance range (m) [minimum, maximum).
+            Either bound may be None.
+        environment (str, iterable): Environment or environments, e.g.
+            'indoor'.
+        sense_hat (bool): Whether files were recorded with a Sense HAT.
+        recorded (tuple): Recording time range [start, end), as anything
+            accepted by pandas.Timestamp, e.g. '2020-07-01'. Either bound may
+            be None.
+
+    Returns:
+        Selected file paths.
+    """
+    selected = pd.Series(True, index=catalog.index)
+    if distance is not None:
+        minimum, maximum = distance
+        if minimum is not None:
+            selected &= catalog['DISTANCE'] >= minimum
+        if maximum is not None:
+            selected &= catalog['DISTANCE'] < maximum
+    if environment is not None:
+        selected &= catalog['ENVIRONMENT'].isin([environment] if isinstance(environment, str) else environment)
+    if sense_hat is not None:
+        selected &= catalog['SENSE HAT'] == sense_hat
+    if recorded is not None:
+        start, end = recorded
+        if start is not None:
+            selected &= catalog['RECORDED'] >= pd.Timestamp(start)
+        if end is not None:
+            selected &= catalog['RECORDED'] < pd.Timestamp(end)
+    return catalog.loc[selected, 'FILE'].tolist()
+
+
+def parse_args(args: List[str]) -> Dict[str, Any]:
+    """Input argument parser.
+
+    Args:
+        args (list): Input arguments as taken from sys.argv.
+
+    Returns:
+        Dictionary containing parsed input arguments. Keys are argument names.
+    """
+    parser = argparse.ArgumentParser(description="Catalog the recorded scan files and summarize a selection.")
+    parser.add_argument('--pattern', default='*/*.csv', help="Glob pattern of CSV scan files.")
+    parser.add_argument('--min_distance', type=float, help="Minimum pre-measured distance (m).")
+    parser.add_argument('--max_distance', type=float, help="Maximum pre-measured distance (m), exclusive.")
+    parser.add_argument('--environment', nargs='+', help="Environments to select, e.g. indoor.")
+    parser.add_argument('--sense_hat', type=lambda value: value.lower() in ['true', '1', 'yes'],
+                        help="Select files recorded with (True) or without (False) a Sense HAT.")
+    parser.add_argument('--since', help="Select files recorded at or after this time, e.g. 2020-07-01.")
+    parser.add_argument('--until', help="Select files recorded before this time.")
+    return vars(parser.parse_args(args))
+
+
+def main(args: List[str]):
+    """Prints the number of files, rows, and time range per distance of a catalog selection.
+
+    Args:
+        args (list): Arguments as provided by sys.argv.
+    """
+    parsed_args = parse_args(args)
+    catalog = load_catalog(parsed_args['pattern'])
+    distance = None
+    if parsed_args['min_distance'] is not None or parsed_args['max_distance'] is not None:
+        distance = (parsed_args['min_distance'], parsed_args['max_distance'])
+    recorded = None
+    if parsed_args['since'] is not None or parsed_args['until'] is not None:
+        recorded = (parsed_args['since'], parsed_args['until'])
+    files = select_files(catalog, distance, parsed_args['environment'], parsed_args['sense_hat'], recorded)
+    selection = catalog[catalog['FILE'].isin(files)]
+    summary = selection.groupby(['ENVIRONMENT', 'DISTANCE'], observed=True).agg(
+        files=('FILE', 'size'), rows=('ROWS', 'sum'), start=('START', 'min'), end=('END', 'max'))
+    print(summary.to_string())
+    print(f"Selected {len(selection)} of {len(catalog)} files with {selection['ROWS'].sum()} rows.")
+
+
+if __name__ == '__main__':
+    """Script execution."""
+    main(sys.argv[1:])
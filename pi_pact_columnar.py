@@ -0,0 +1,258 @@
+"""Typed columnar storage of beacon scanner sessions.
+
+Scan output written as CSV stores timestamps as strings and every measurement
+as float64 text. This module defines a compact Apache Arrow schema for scan
+output, a writer for Parquet and Arrow IPC scan files, a reader for any scan
+file, and a converter for existing CSV data folders. Requires pyarrow
+(https://arrow.apache.org/docs/python/).
+"""
+
+import argparse
+import os
+import pandas as pd
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+import sys
+import time
+from typing import *
+
+# Compact column types of scan output. Columns not listed are inferred.
+SCAN_TYPES: Dict[str, pa.DataType] = {
+    'SCAN': pa.int64(),
+    'ADDRESS': pa.dictionary(pa.int32(), pa.string()),
+    'TIMESTAMP': pa.timestamp('ns'),
+    'UUID': pa.dictionary(pa.int32(), pa.string()),
+    'MAJOR': pa.uint16(),
+    'MINOR': pa.uint16(),
+    'TX POWER': pa.int16(),  # Note: received as either a signed or unsigned byte
+    'RSSI': pa.int8(),
+    'RSSI SMOOTHED': pa.float32(),
+    'DISTANCE': pa.float32(),
+    'TEMPERATURE': pa.float32(),
+    'HUMIDITY': pa.float32(),
+    'PRESSURE': pa.float32(),
+    'PITCH': pa.float32(),
+    'ROLL': pa.float32(),
+    'YAW': pa.float32(),
+    'ADAPTER': pa.dictionary(pa.int32(), pa.string()),
+    'PREDICTION': pa.int8(),
+    'LATENCY': pa.float32()
+}
+COLUMNAR_SUFFIXES: Dict[str, str] = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def to_table(advertisements: pd.DataFrame) -> pa.Table:
+    """Convert advertisements to an Arrow table with compact column types.
+
+    Args:
+        advertisements (pandas.DataFrame): Advertisements, including the SCAN
+            column, as written to or read from a scan output file.
+
+    Returns:
+        Arrow table with RSSI as int8, environment values as float32,
+        timestamps as int64 nanoseconds since epoch, and dictionary encoded
+        ADDRESS and UUID.
+    """
+    arrays: List[pa.Array] = []
+    for name in advertisements.columns:
+        values = advertisements[name]
+        if name == 'TIMESTAMP':
+            values = pd.to_datetime(values, errors='coerce')  # Note: malformed timestamps become null
+        data_type: Optional[pa.DataType] = SCAN_TYPES.get(name)
+        if data_type is None:
+            arrays.append(pa.array(values, from_pandas=True))
+        elif pa.types.is_dictionary(data_type):
+            arrays.append(pa.array(values, type=pa.string(), from_pandas=True).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, from_pandas=True).cast(data_type))
+    return pa.Table.from_arrays(arrays, names=[str(name) for name in advertisements.columns])
+
+
+class ColumnarScanWriter(object):
+    """Incrementally writes processed advertisements to a columnar scan file.
+
+    Written advertisements are buffered and appended as one Parquet row group
+    or Arrow IPC record batch every flush interval, then synced to disk. Arrow
+    IPC output uses the streaming format, so it remains readable up to the
+    last synced batch after a crash or power loss. Parquet output is only
+    readable once the writer has been closed.
+
+    Attributes:
+        scan_file (pathlib.Path): Scan output file path.
+        output_format (str): Either 'parquet' or 'arrow'.
+        flush_interval (float, int): Interval (s) between syncs to disk.
+        rows (int): Number of advertisements written so far.
+        bytes (int): Number of bytes written so far, with buffered
+            advertisements counted at their in-memory Arrow size until
+            encoded.
+    """
+
+    def __init__(self, scan_file: Path, output_format: str, flush_interval: Union[float, int]):
+        """Instance initialization.
+
+        Args:
+            scan_file (pathlib.Path): Scan output file path. Any existing file
+                is overwritten.
+            output_format (str): Either 'parquet' or 'arrow'.
+            flush_interval (float, int): Interval (s) between syncs to disk.
+
+        Raises:
+            ValueError: Output format must be one of the columnar formats.
+        """
+        if output_format not in COLUMNAR_SUFFIXES:
+            raise ValueError("Output format must be one of the columnar "
+                             f"formats {list(COLUMNAR_SUFFIXES)}.")
+        self.scan_file: Path = Path(scan_file)
+        self.output_format: str = output_format
+        self.flush_interval: Union[float, int] = flush_interval
+        self.rows: int = 0
+        self.bytes: int = 0
+        self.__handle: BinaryIO = self.scan_file.open(mode='wb')
+        self.__writer: Optional[Union[pq.ParquetWriter, pa.ipc.RecordBatchStreamWriter]] = None
+        self.__pending: List[pa.Table] = []
+        self.__pending_bytes: int = 0
+        self.__last_sync: float = time.monotonic()
+
+    def write(self, advertisements: pd.DataFrame):
+        """Append advertisements to the scan output file.
+
+        The schema is fixed by the first batch, even if empty.
+
+        Args:
+            advertisements (pandas.DataFrame): Processed and filtered
+                advertisements with a default integer index.
+        """
+        advertisements = advertisements.set_axis(
+            range(self.rows, self.rows + len(advertisements)), axis=0)
+        table = to_table(advertisements.rename_axis('SCAN').reset_index())
+        if self.__writer is None:
+            if self.output_format == 'parquet':
+                self.__writer = pq.ParquetWriter(self.__handle, table.schema)
+            else:
+                self.__writer = pa.ipc.new_stream(self.__handle, table.schema)
+        self.__pending.append(table)
+        self.__pending_bytes += table.nbytes
+        self.rows += len(advertisements)
+        self.bytes = self.__handle.tell() + self.__pending_bytes
+        if (time.monotonic() - self.__last_sync) >= self.flush_interval:
+            self.sync()
+
+    def sync(self):
+        """Write buffered advertisements and sync them to disk."""
+        if self.__pending:
+            table = pa.concat_tables(self.__pending).unify_dictionaries().combine_chunks()
+            self.__pending.clear()
+            self.__pending_bytes = 0
+            if table.num_rows > 0:
+                self.__writer.write_table(table)
+        self.__handle.flush()
+        self.bytes = self.__handle.tell()
+        os.fsync(self.__handle.fileno())
+        self.__last_sync = time.monotonic()
+
+    def close(self):
+        """Sync and close the scan output file."""
+        if not self.__handle.closed:
+            self.sync()
+            if self.__writer is not None:
+                self.__writer.close()
+            self.bytes = self.__handle.tell()
+            self.__handle.close()
+
+
+def read_scan_file(scan_file: Union[str, Path]) -> pd.DataFrame:
+    """Read a CSV, Parquet, or Arrow IPC scan output file.
+
+    Args:
+        scan_file (str, pathlib.Path): Scan output file path. Format is
+            determined by the file suffix.
+
+    Returns:
+        Advertisements, including the SCAN column.
+    """
+    scan_file = Path(scan_file)
+    if scan_file.suffix == COLUMNAR_SUFFIXES['parquet']:
+        return pq.read_table(scan_file).to_pandas()
+    elif scan_file.suffix == COLUMNAR_SUFFIXES['arrow']:
+        with pa.OSFile(str(scan_file), 'rb') as f:
+            return pa.ipc.open_stream(f).read_all().to_pandas()
+    else:
+        return pd.read_csv(scan_file)
+
+
+def convert_folder(folder: Path, output_format: str, output_folder: Optional[Path] = None,
+                   overwrite: bool = False) -> List[Path]:
+    """Convert every CSV scan file in a data folder to a columnar format.
+
+    Args:
+        folder (pathlib.Path): Data folder containing CSV scan files.
+        output_format (str): Either 'parquet' or 'arrow'.
+        output_folder (pathlib.Path): Folder to write converted files to.
+            Defaults to the data folder itself.
+        overwrite (bool): Convert files even if an up-to-date converted file
+            already exists.
+
+    Returns:
+        Paths of the converted files that were written.
+    """
+    if output_folder is None:
+        output_folder = folder
+    output_folder.mkdir(parents=True, exist_ok=True)
+    converted: List[Path] = []
+    csv_file: Path
+    for csv_file in sorted(folder.glob('*.csv')):
+        output_file = output_folder / csv_file.with_suffix(COLUMNAR_SUFFIXES[output_format]).name
+        if not overwrite and output_file.exists() and output_file.stat().st_mtime >= csv_file.stat().st_mtime:
+            continue
+        advertisements = pd.read_csv(csv_file, index_col='SCAN')
+        writer = ColumnarScanWriter(output_file, output_format, float('inf'))
+        writer.write(advertisements.reset_index(drop=True))
+        writer.close()
+        converted.append(output_file)
+    return converted
+
+
+def parse_args(args: List[str]) -> Dict[str, Any]:
+    """Input argument parser.
+
+    Args:
+        args (list): Input arguments as taken from sys.argv.
+
+    Returns:
+        Dictionary containing parsed input arguments. Keys are argument names.
+    """
+    parser = argparse.ArgumentParser(description="Convert CSV scan files in data folders to a typed "
+                                                 "columnar format.")
+    parser.add_argument('folders', nargs='+', help="Data folders containing CSV scan files.")
+    parser.add_argument('--output_format', choices=list(COLUMNAR_SUFFIXES), default='parquet',
+                        help="Columnar output format.")
+    parser.add_argument('--output_dir',
+                        help="Directory in which to mirror the data folders. Defaults to writing "
+                             "converted files alongside the CSV files.")
+    parser.add_argument('--overwrite', action='store_true',
+                        help="Convert files even if an up-to-date converted file exists.")
+    return vars(parser.parse_args(args))
+
+
+def main(args: List[str]):
+    """Converts CSV scan files in the given data folders.
+
+    Args:
+        args (list): Arguments as provided by sys.argv.
+    """
+    parsed_args = parse_args(args)
+    for folder in parsed_args['folders']:
+        folder = Path(folder)
+        output_folder = None
+        if parsed_args['output_dir'] is not None:
+            output_folder = Path(parsed_args['output_dir']) / folder.name
+        converted = convert_folder(folder, parsed_args['output_format'], output_folder,
+                                   parsed_args['overwrite'])
+        print(f"Converted {len(converted)} files in {folder}.")
+
+
+if __name__ == '__main__':
+    """Script execution."""
+    main(sys.argv[1:])
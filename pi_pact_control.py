@@ -0,0 +1,447 @@
+"""Event driven control of a running beacon advertiser or scanner.
+
+A control channel accepts commands to stop, pause, resume, reconfigure, or
+report the status of a running advertiser or scanner as soon as they are
+issued. Commands arrive over a Unix domain socket as newline delimited JSON,
+from POSIX signals, or from the legacy control file, which is watched with
+inotify where available and polled otherwise.
+
+Command line usage:
+
+    python3 pi_pact_control.py scanner_control.sock status
+    python3 pi_pact_control.py scanner_control.sock configure --set revisit=2
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+from pathlib import Path
+import selectors
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+from typing import *
+
+COMMANDS = ['stop', 'pause', 'resume', 'status', 'configure']
+# Note: SIGINT is left to raise KeyboardInterrupt, so Ctrl-C also aborts scripts running repeated sessions
+SIGNAL_COMMANDS = {signal.SIGTERM: 'stop', signal.SIGUSR1: 'pause', signal.SIGUSR2: 'resume'}
+CLIENT_TIMEOUT = 5  # (s)
+MAX_REQUEST = 2 ** 16  # (bytes) Longest request line accepted from a client
+
+# inotify constants (see inotify(7))
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def _inotify_watch(directory: Path) -> Optional[int]:
+    """Create an inotify file descriptor watching a directory for written files.
+
+    Args:
+        directory (pathlib.Path): Directory to watch.
+
+    Returns:
+        inotify file descriptor, or None if inotify is unavailable.
+    """
+    library = ctypes.util.find_library('c')
+    if library is None:
+        return None
+    try:
+        libc = ctypes.CDLL(library, use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+    except (AttributeError, OSError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _inotify_names(data: bytes) -> List[str]:
+    """Parse the file names of a buffer of inotify events."""
+    names = []
+    offset = 0
+    while offset + INOTIFY_EVENT.size <= len(data):
+        _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+        offset += INOTIFY_EVENT.size
+        names.append(os.fsdecode(data[offset:offset + length].rstrip(b'\0')))
+        offset += length
+    return names
+
+
+class ControlChannel(object):
+    """Receives control commands for a running advertiser or scanner.
+
+    Commands are handled on a background thread. The controlled loop checks
+    the stopped and paused flags and blocks in wait(), which returns as soon
+    as any command arrives. Event loops can instead subscribe() to be called
+    back after every command.
+
+    Attributes:
+        socket_path (pathlib.Path): Unix domain socket path, or None to
+            disable the socket.
+        control_file (pathlib.Path): Legacy control file. Writing any value
+            other than "0" to it requests a stop.
+    """
+
+    def __init__(self, logger: logging.Logger, socket_path: Optional[Union[str, Path]] = None,
+                 control_file: Optional[Path] = None,
+                 status: Optional[Callable[[], Dict[str, Any]]] = None,
+                 configure: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 poll_interval: Union[float, int] = 1):
+        """Instance initialization.
+
+        Args:
+            logger (logging.Logger): Configured logger.
+            socket_path (str, pathlib.Path): Unix domain socket path. None
+                disables the socket.
+            control_file (pathlib.Path): Legacy control file. None disables it.
+            status (callable): Returns a dictionary describing the controlled
+                loop, included in every reply.
+            configure (callable): Applies a dictionary of settings to the
+                controlled object. Should raise on invalid settings.
+            poll_interval (float, int): Interval (s) at which the control
+                file is polled when inotify is unavailable.
+        """
+        self.socket_path: Optional[Path] = Path(socket_path).resolve() if socket_path else None
+        self.control_file: Optional[Path] = control_file
+        self.__logger: logging.Logger = logger
+        self.__status: Optional[Callable[[], Dict[str, Any]]] = status
+        self.__configure: Optional[Callable[[Dict[str, Any]], None]] = configure
+        self.__poll_interval: Union[float, int] = poll_interval
+        self.__condition: threading.Condition = threading.Condition()
+        self.__generation: int = 0
+        self.__stopped: bool = False
+        self.__paused: bool = False
+        self.__selector: Optional[selectors.BaseSelector] = None
+        self.__server: Optional[socket.socket] = None
+        self.__clients: Dict[socket.socket, bytearray] = {}  # Note: partial request line of each open client
+        self.__inotify: Optional[int] = None
+        self.__wakeup: Optional[Tuple[socket.socket, socket.socket]] = None
+        self.__thread: Optional[threading.Thread] = None
+        self.__signal_handlers: Dict[int, Any] = {}
+        self.__listeners: List[Callable[[], None]] = []
+        self.__received: Optional[float] = None
+
+    @property
+    def stopped(self) -> bool:
+        """Whether a stop has been requested."""
+        return self.__stopped
+
+    @property
+    def paused(self) -> bool:
+        """Whether the controlled loop should currently be paused."""
+        return self.__paused
+
+    def start(self):
+        """Open the socket, control file watch, and signal handlers."""
+        self.__stopped = False
+        self.__paused = False
+        self.__received = None
+        self.__selector = selectors.DefaultSelector()
+        self.__wakeup = socket.socketpair()
+        self.__wakeup[0].setblocking(False)
+        self.__selector.register(self.__wakeup[0], selectors.EVENT_READ, self.__on_wakeup)
+        if self.socket_path is not None:
+            if self.socket_path.is_socket():
+                self.socket_path.unlink()  # Note: removes stale socket
+            self.__server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.__server.bind(str(self.socket_path))
+            self.socket_path.chmod(0o777)
+            self.__server.listen()
+            self.__server.setblocking(False)
+            self.__selector.register(self.__server, selectors.EVENT_READ, self.__on_connection)
+        if self.control_file is not None:
+            self.__inotify = _inotify_watch(self.control_file.parent)
+            if self.__inotify is not None:
+                self.__selector.register(self.__inotify, selectors.EVENT_READ, self.__on_inotify)
+            else:
+                self.__logger.debug("inotify unavailable, polling control file.")
+        if threading.current_thread() is threading.main_thread():
+            for signal_number in SIGNAL_COMMANDS:
+                self.__signal_handlers[signal_number] = signal.signal(signal_number, self.__on_signal)
+        self.__thread = threading.Thread(target=self.__run, name='ControlChannel', daemon=True)
+        self.__thread.start()
+
+    def close(self):
+        """Close the socket, control file watch, and signal handlers."""
+        for signal_number, handler in self.__signal_handlers.items():
+            signal.signal(signal_number, handler)
+        self.__signal_handlers.clear()
+        if self.__thread is not None:
+            self.__wakeup[1].send(b'\0')
+            self.__thread.join()
+            self.__thread = None
+        for connection in list(self.__clients):
+            self.__close_client(connection)
+        self.__selector.close()
+        for sock in self.__wakeup:
+            sock.close()
+        if self.__server is not None:
+            self.__server.close()
+            self.__server = None
+            if self.socket_path.is_socket():
+                self.socket_path.unlink()
+        if self.__inotify is not None:
+            os.close(self.__inotify)
+            self.__inotify = None
+
+    def acknowledge(self) -> Optional[float]:
+        """Acknowledge that the controlled loop has acted on received commands.
+
+        Returns:
+            Time (s) since the earliest command received after the previous
+            acknowledgement, or None if there was none.
+        """
+        received, self.__received = self.__received, None
+        if received is None:
+            return None
+        return time.monotonic() - received
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until a command is received or the timeout elapses.
+
+        Args:
+            timeout (float): Maximum time (s) to block. None blocks until a
+                command is received.
+        """
+        with self.__condition:
+            generation = self.__generation
+            self.__condition.wait_for(lambda: self.__generation != generation, timeout)
+
+    def subscribe(self, listener: Callable[[], None]):
+        """Call a listener after every handled command.
+
+        Args:
+            listener (callable): Called without arguments from the command
+                thread, so it must be thread safe, e.g. scheduling a callback
+                with asyncio's loop.call_soon_threadsafe.
+        """
+        self.__listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[], None]):
+        """Stop calling a subscribed listener."""
+        self.__listeners.remove(listener)
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle a control command.
+
+        Args:
+            request (dict): Command with key 'command' and, for 'configure',
+                a 'settings' dictionary.
+
+        Returns:
+            Reply with key 'ok', the controlled loop's 'status', and an
+            'error' message if the command failed.
+        """
+        command = request.get('command')
+        reply: Dict[str, Any] = {'ok': True}
+        try:
+            if command not in COMMANDS:
+                raise ValueError(f"Control command must be one of {COMMANDS}.")
+            self.__logger.debug(f"Received control command {command}.")
+            if command != 'status' and self.__received is None:
+                self.__received = time.monotonic()
+            if command == 'stop':
+                self.__stopped = True
+            elif command == 'pause':
+                self.__paused = True
+            elif command == 'resume':
+                self.__paused = False
+            elif command == 'configure':
+                if self.__configure is None:
+                    raise ValueError("Configuration is not supported.")
+                self.__configure(dict(request.get('settings', {})))
+        except Exception as error:
+            reply = {'ok': False, 'error': f"{type(error).__name__}: {error}"}
+        with self.__condition:
+            self.__generation += 1
+            self.__condition.notify_all()
+        for listener in list(self.__listeners):
+            listener()
+        reply['status'] = self.status()
+        return reply
+
+    def status(self) -> Dict[str, Any]:
+        """Current state of the controlled loop."""
+        state = 'stopping' if self.__stopped else 'paused' if self.__paused else 'running'
+        status: Dict[str, Any] = {'state': state}
+        if self.__status is not None:
+            status.update(self.__status())
+        return status
+
+    def __run(self):
+        """Background command loop."""
+        running = True
+        while running:
+            timeout = self.__poll_interval if self.control_file is not None and self.__inotify is None else None
+            events = self.__selector.select(timeout)
+            if not events:
+                self.__check_control_file()
+            for key, _ in events:
+                running = key.data(key.fileobj) and running
+
+    def __on_wakeup(self, sock: socket.socket) -> bool:
+        """Handle signal commands and the close request."""
+        running = True
+        for code in sock.recv(64):
+            if code == 0:
+                running = False
+            else:
+                self.handle({'command': list(SIGNAL_COMMANDS.values())[code - 1]})
+        return running
+
+    def __on_signal(self, signal_number: int, _):
+        """Forward a signal to the command loop."""
+        self.__wakeup[1].send(bytes([list(SIGNAL_COMMANDS).index(signal_number) + 1]))
+
+    def __on_connection(self, server: socket.socket) -> bool:
+        """Accept a client connection, whose requests are then read as they arrive."""
+        try:
+            connection, _ = server.accept()
+        except BlockingIOError:
+            return True
+        connection.setblocking(False)  # Note: an idle client never holds up other commands
+        self.__clients[connection] = bytearray()
+        self.__selector.register(connection, selectors.EVENT_READ, self.__on_client)
+        return True
+
+    def __on_client(self, connection: socket.socket) -> bool:
+        """Handle every complete request line received from a client and reply to each."""
+        try:
+            data = connection.recv(4096)
+        except BlockingIOError:
+            return True
+        except OSError:
+            data = b''
+        if not data:
+            self.__close_client(connection)
+            return True
+        *lines, remainder = (self.__clients[connection] + data).split(b'\n')
+        if len(remainder) > MAX_REQUEST:
+            self.__logger.debug(f"Control request longer than {MAX_REQUEST} bytes.")
+            self.__close_client(connection)
+            return True
+        self.__clients[connection] = remainder
+        try:
+            for line in lines:
+                line = line.decode('utf-8', errors='replace').strip()
+                if not line:
+                    continue
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    request = {'command': line}  # Note: accepts bare command names
+                connection.sendall((json.dumps(self.handle(request), default=str) + '\n').encode('utf-8'))
+        except OSError as error:  # Note: includes a client not reading its replies
+            self.__logger.debug(f"Control connection error: {error}")
+            self.__close_client(connection)
+        return True
+
+    def __close_client(self, connection: socket.socket):
+        """Stop reading from a client and close its connection."""
+        self.__selector.unregister(connection)
+        del self.__clients[connection]
+        connection.close()
+
+    def __on_inotify(self, fd: int) -> bool:
+        """Re-read the control file when it is written."""
+        try:
+            data = os.read(fd, 4096)
+        except BlockingIOError:
+            return True
+        if self.control_file.name in _inotify_names(data):
+            self.__check_control_file()
+        return True
+
+    def __check_control_file(self):
+        """Request a stop if the control file holds anything other than "0"."""
+        try:
+            control_flag = self.control_file.read_text().strip()
+        except OSError:
+            return
+        if control_flag and control_flag != "0" and not self.__stopped:
+            self.__logger.debug("Control file set to stop.")
+            self.handle({'command': 'stop'})
+
+
+def send_command(socket_path: Union[str, Path], command: str,
+                 settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Send a command to a running advertiser or scanner.
+
+    Args:
+        socket_path (str, pathlib.Path): Control socket path.
+        command (str): One of {'stop', 'pause', 'resume', 'status',
+            'configure'}.
+        settings (dict): Settings to apply with the 'configure' command.
+
+    Returns:
+        Reply with key 'ok', the controlled loop's 'status', and an 'error'
+        message if the command failed.
+    """
+    request: Dict[str, Any] = {'command': command}
+    if settings:
+        request['settings'] = settings
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CLIENT_TIMEOUT)
+        sock.connect(str(socket_path))
+        with sock.makefile('rw') as stream:
+            stream.write(json.dumps(request) + '\n')
+            stream.flush()
+            return json.loads(stream.readline())
+
+
+def parse_args(args: List[str]) -> Dict[str, Any]:
+    """Input argument parser.
+
+    Args:
+        args (list): Input arguments as taken from sys.argv.
+
+    Returns:
+        Dictionary containing parsed input arguments. Keys are argument names.
+    """
+    parser = argparse.ArgumentParser(description="Control a running beacon advertiser or scanner.")
+    parser.add_argument('socket', help="Control socket of the advertiser or scanner.")
+    parser.add_argument('command', choices=COMMANDS, help="Control command.")
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help="Setting to apply with the configure command. Values are parsed as "
+                             "JSON where possible.")
+    return vars(parser.parse_args(args))
+
+
+def main(args: List[str]) -> Dict[str, Any]:
+    """Sends a control command and prints the reply.
+
+    Args:
+        args (list): Arguments as provided by sys.argv.
+
+    Returns:
+        Reply to the command.
+    """
+    parsed_args = parse_args(args)
+    settings: Dict[str, Any] = {}
+    for setting in parsed_args['set']:
+        key, _, value = setting.partition('=')
+        try:
+            settings[key] = json.loads(value)
+        except json.JSONDecodeError:
+            settings[key] = value
+    start_time = time.monotonic()
+    reply = send_command(parsed_args['socket'], parsed_args['command'], settings)
+    reply['latency'] = time.monotonic() - start_time
+    print(json.dumps(reply, indent=2, default=str))
+    return reply
+
+
+if __name__ == '__main__':
+    """Script execution."""
+    main(sys.argv[1:])
@@ -0,0 +1,497 @@
+"""Shared loader of the recorded scan data folders.
+
+Reads only the requested columns of every CSV scan file matching a pattern,
+with compact column types, in parallel worker processes, and concatenates
+the parts once. Used by the training notebooks and data analysis scripts in
+place of reading and appending every file in turn, e.g.
+
+    data = load_dataset(['DISTANCE', 'RSSI', 'PRESSURE'])
+    X, y = feature_arrays(data, '3varP', 'binary')
+
+With cache=True each data folder is compiled once into a memory mapped
+column store (see DatasetCache), which later loads read without parsing.
+
+Command line usage:
+
+    python3 pi_pact_dataset.py --feature_set 4var --label_scheme binary --cache
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import numpy as np
+import os
+import pandas as pd
+from pathlib import Path
+from pi_pact_metrics import write_atomic
+from pi_pact_sort import FEATURE_SETS, LABEL_SCHEMES, LabelScheme
+import sys
+import time
+from typing import *
+
+DEFAULT_PATTERN = 'indoor-noObstruct-SenseHat*/*.csv'  # Note: relative to the repository root
+# Compact column types of recorded scan files. TIMESTAMP is parsed separately.
+DATASET_DTYPES: Dict[str, str] = {
+    'SCAN': 'int32',
+    'ADDRESS': 'category',
+    'UUID': 'category',
+    'MAJOR': 'uint16',
+    'MINOR': 'uint16',
+    'TX POWER': 'int16',
+    'RSSI': 'int8',
+    'DISTANCE': 'float32',
+    'TEMPERATURE': 'float32',
+    'HUMIDITY': 'float32',
+    'PRESSURE': 'float32',
+    'PITCH': 'float32',
+    'ROLL': 'float32',
+    'YAW': 'float32'
+}
+CACHE_DIR = '.pi_pact_cache'  # Note: relative to the repository root
+CACHE_MANIFEST = 'manifest.json'
+CACHE_VERSION = 1
+# Columns of compiled dataset caches and their stored types
+CACHE_COLUMNS: List[str] = ['SCAN', 'ADDRESS', 'TIMESTAMP', 'UUID', 'MAJOR', 'MINOR', 'TX POWER', 'RSSI', 'DISTANCE',
+                            'TEMPERATURE', 'HUMIDITY', 'PRESSURE', 'PITCH', 'ROLL', 'YAW']
+CACHE_DTYPES: Dict[str, str] = {**{column: 'int32' if dtype == 'category' else dtype
+                                   for column, dtype in DATASET_DTYPES.items()}, 'TIMESTAMP': 'int64'}
+LABEL_DTYPE = 'int16'  # Note: type of the LABEL column
+
+
+def dataset_files(pattern: str = DEFAULT_PATTERN, root: Union[str, Path] = '.') -> List[Path]:
+    """Recorded scan files matching a pattern, in a stable order.
+
+    Args:
+        pattern (str): Glob pattern of CSV scan files relative to the root.
+        root (str, pathlib.Path): Directory the pattern is relative to.
+
+    Returns:
+        Sorted file paths.
+    """
+    return sorted(Path(root).glob(pattern))
+
+
+def read_dataset_file(csv_file: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read columns of one recorded scan file with compact types.
+
+    Args:
+        csv_file (pathlib.Path): CSV scan file.
+        columns (list): Columns to read, or None for every column. Columns
+            missing from the file, e.g. Sense HAT values in files recorded
+            without one, are filled with NaN.
+
+    Returns:
+        The file's advertisements.
+    """
+    wanted = None if columns is None else set(columns)
+    data = pd.read_csv(csv_file, usecols=None if wanted is None else lambda column: column in wanted,
+                       dtype={column: dtype for column, dtype in DATASET_DTYPES.items()
+                              if wanted is None or column in wanted})
+    if columns is not None:
+        data = data.reindex(columns=columns)
+    if 'TIMESTAMP' in data.columns:
+        # Note: malformed timestamps, e.g. '52:23.0', become null
+        data['TIMESTAMP'] = pd.to_datetime(data['TIMESTAMP'], format='ISO8601', errors='coerce').astype(
+            'datetime64[ns]')
+    return data
+
+
+def _read_dataset_file(arguments: Tuple[Path, Optional[List[str]]]) -> pd.DataFrame:
+    """Worker process entry point of read_dataset_file."""
+    return read_dataset_file(*arguments)
+
+
+def _read_files(files: List[Path], columns: Optional[List[str]], processes: Optional[int]) -> List[pd.DataFrame]:
+    """Read columns of recorded scan files, in parallel worker processes if more than one."""
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(files))
+    tasks = [(csv_file, columns) for csv_file in files]
+    if processes > 1:
+        # Note: spawned workers, as forking a process with threads running is unsafe
+        with multiprocessing.get_context('spawn').Pool(processes) as pool:
+            return pool.map(_read_dataset_file, tasks, chunksize=math.ceil(len(tasks) / (4 * processes)))
+    return [_read_dataset_file(task) for task in tasks]
+
+
+class DatasetCache(object):
+    """Compiled on-disk copy of one data folder's CSV scan files.
+
+    Every cached column is stored as one raw binary file of fixed width
+    values, so a column of the whole folder is loaded as a single read-only
+    memory map without parsing or copying. ADDRESS and UUID are stored as
+    int32 category codes and TIMESTAMP as int64 nanoseconds since epoch. A
+    JSON manifest records the name, size, modification time, and row range of
+    every cached CSV file. Files added to the folder are parsed and appended
+    to the column files; if a cached file was changed or removed the cache
+    is rebuilt. The manifest is replaced atomically after the column files
+    are written, so rows appended by an interrupted update are ignored and
+    overwritten by the next one.
+
+    Attributes:
+        folder (pathlib.Path): Data folder containing CSV scan files.
+        directory (pathlib.Path): Directory of the column files and manifest.
+    """
+
+    def __init__(self, folder: Union[str, Path], cache_dir: Union[str, Path] = CACHE_DIR):
+        """Instance initialization.
+
+        Args:
+            folder (str, pathlib.Path): Data folder containing CSV scan files.
+            cache_dir (str, pathlib.Path): Directory holding the cache of
+                every data folder, one subdirectory per folder name.
+        """
+        self.folder: Path = Path(folder)
+        self.directory: Path = Path(cache_dir) / self.folder.resolve().name
+        self.__manifest: Dict[str, Any] = self.__read_manifest()
+
+    @property
+    def rows(self) -> int:
+        """Number of cached advertisements."""
+        return self.__manifest['rows']
+
+    @property
+    def files(self) -> List[str]:
+        """Names of the cached CSV files, in row order."""
+        return [entry['name'] for entry in self.__manifest['files']]
+
+    def update(self, processes: Optional[int] = None) -> int:
+        """Parse CSV files not yet cached and append them to the cache.
+
+        Args:
+            processes (int): Number of worker processes parsing files.
+                Defaults to the number of CPUs.
+
+        Returns:
+            Number of files parsed.
+        """
+        current = {csv_file.name: csv_file.stat() for csv_file in self.folder.glob('*.csv')}
+        cached = {entry['name']: entry for entry in self.__manifest['files']}
+        if any(name not in current or current[name].st_size != entry['size']
+               or current[name].st_mtime_ns != entry['mtime_ns'] for name, entry in cached.items()):
+            self.__manifest = _empty_manifest()
+            cached = {}
+        new_files = sorted(name for name in current if name not in cached)
+        if not new_files:
+            return 0
+        parts = _read_files([self.folder / name for name in new_files], CACHE_COLUMNS, processes)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        rows = self.rows
+        columns: Dict[str, List[np.ndarray]] = {column: [] for column in CACHE_COLUMNS}
+        for name, part in zip(new_files, parts):
+            self.__manifest['files'].append({'name': name, 'size': current[name].st_size,
+                                             'mtime_ns': current[name].st_mtime_ns, 'start': rows,
+                                             'rows': len(part)})
+            rows += len(part)
+            for column in CACHE_COLUMNS:
+                columns[column].append(self.__encode(column, part[column]))
+        for column, values in columns.items():
+            with self.__column_file(column).open('ab') as f:
+                f.truncate(self.rows * np.dtype(CACHE_DTYPES[column]).itemsize)  # Note: drops interrupted appends
+                np.concatenate(values).tofile(f)
+        self.__manifest['rows'] = rows
+        write_atomic(self.directory / CACHE_MANIFEST, json.dumps(self.__manifest) + '\n')
+        return len(new_files)
+
+    def load(self, columns: Optional[Iterable[str]] = None,
+             files: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Load cached columns as memory mapped arrays.
+
+        Args:
+            columns (iterable): Columns to load, or None for every cached
+                column.
+            files (iterable): Names of the cached files to load, or None for
+                every file. Selected rows of only some files are copied into
+                memory.
+
+        Returns:
+            Advertisements of the selected files in file order.
+
+        Raises:
+            ValueError: Dataset cache columns must be cached.
+        """
+        columns = CACHE_COLUMNS if columns is None else list(columns)
+        if any(column not in CACHE_DTYPES for column in columns):
+            raise ValueError(f"Dataset cache columns must be in {CACHE_COLUMNS}.")
+        selection = self.__selection(files)
+        data = {}
+        for column in columns:
+            values = self.__map(self.__column_file(column), CACHE_DTYPES[column], self.rows)
+            if selection is not None:
+                values = values[selection]
+            data[column] = self.__decode(column, values)
+        return pd.DataFrame(data, columns=columns, copy=False)
+
+    def labels(self, scheme: LabelScheme, files: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Labels of the cached DISTANCE column under a label scheme.
+
+        Labels are computed with one vectorized call and cached alongside
+        the columns, so later calls only memory map them. Labels of rows
+        appended since are computed and appended, and labels of a scheme
+        whose definition has changed are recomputed.
+
+        Args:
+            scheme (pi_pact_sort.LabelScheme): Label scheme.
+            files (iterable): Names of the cached files to label, or None for
+                every file.
+
+        Returns:
+            Read-only labels of the selected files in file order.
+        """
+        path = self.directory / f"LABEL_{scheme.name}.bin"
+        itemsize = np.dtype(LABEL_DTYPE).itemsize
+        cached = self.__manifest.setdefault('labels', {}).get(scheme.name)
+        if cached is None or cached['definition'] != scheme.definition() or cached['rows'] > self.rows:
+            cached = {'definition': scheme.definition(), 'rows': 0}
+        if cached['rows'] < self.rows:
+            distances = self.load(['DISTANCE'])['DISTANCE'].to_numpy()[cached['rows']:]
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with path.open('ab') as f:
+                f.truncate(cached['rows'] * itemsize)
+                scheme(distances).astype(LABEL_DTYPE).tofile(f)
+            self.__manifest['labels'][scheme.name] = {**cached, 'rows': self.rows}
+            write_atomic(self.directory / CACHE_MANIFEST, json.dumps(self.__manifest) + '\n')
+        labels = self.__map(path, LABEL_DTYPE, self.rows)
+        selection = self.__selection(files)
+        return labels if selection is None else labels[selection]
+
+    def file_stats(self) -> pd.DataFrame:
+        """Row count and time range of every cached file.
+
+        Returns:
+            DataFrame of the file NAME, ROWS, and the first (START) and last
+            (END) valid TIMESTAMP, in row order. Times are null for files
+            without valid timestamps.
+        """
+        entries = self.__manifest['files']
+        starts = np.array([entry['start'] for entry in entries], dtype=np.int64)
+        rows = np.array([entry['rows'] for entry in entries], dtype=np.int64)
+        first = np.full(len(entries), np.datetime64('NaT'), dtype='datetime64[ns]')
+        last = first.copy()
+        filled = rows > 0  # Note: reduceat is undefined for empty segments
+        if filled.any():
+            timestamps = self.load(['TIMESTAMP'])['TIMESTAMP'].to_numpy()
+            first[filled] = np.fmin.reduceat(timestamps, starts[filled])  # Note: fmin and fmax skip NaT
+            last[filled] = np.fmax.reduceat(timestamps, starts[filled])
+        return pd.DataFrame({'NAME': [entry['name'] for entry in entries], 'ROWS': rows, 'START': first,
+                             'END': last})
+
+    def __encode(self, column: str, values: pd.Series) -> np.ndarray:
+        """Values of a parsed column as stored in its column file."""
+        if column == 'TIMESTAMP':
+            return values.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        if DATASET_DTYPES.get(column) == 'category':
+            categories = self.__manifest['categories'].setdefault(column, [])
+            index = pd.Index(categories)
+            new = pd.unique(values[~values.isin(index)].astype(str))
+            categories.extend(new.tolist())
+            return pd.Index(categories).get_indexer(values.astype(str)).astype(CACHE_DTYPES[column])
+        return values.to_numpy(dtype=CACHE_DTYPES[column])
+
+    def __decode(self, column: str, values: np.ndarray) -> Union[np.ndarray, pd.Categorical]:
+        """Column file values as returned by read_dataset_file."""
+        if column == 'TIMESTAMP':
+            return values.view('datetime64[ns]')
+        if DATASET_DTYPES.get(column) == 'category':
+            return pd.Categorical.from_codes(values, self.__manifest['categories'].get(column, []))
+        return values
+
+    def __selection(self, files: Optional[Iterable[str]]) -> Optional[np.ndarray]:
+        """Row indices of the given cached files, or None if every file is selected."""
+        if files is None:
+            return None
+        selected = set(files)
+        ranges = [(entry['start'], entry['start'] + entry['rows']) for entry in self.__manifest['files']
+                  if entry['name'] in selected]
+        if len(ranges) == len(self.__manifest['files']):
+            return None
+        return np.concatenate([np.arange(start, end) for start, end in ranges] or [np.empty(0, dtype=np.int64)])
+
+    @staticmethod
+    def __map(path: Path, dtype: str, rows: int) -> np.ndarray:
+        """Read-only memory map of the first rows of a binary column file."""
+        if rows == 0:
+            return np.empty(0, dtype=dtype)  # Note: empty files cannot be memory mapped
+        return np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+
+    def __column_file(self, column: str) -> Path:
+        """Binary file of a cached column."""
+        return self.directory / f"{column.replace(' ', '_')}.bin"
+
+    def __read_manifest(self) -> Dict[str, Any]:
+        """Cache manifest, or an empty manifest if there is no valid cache."""
+        try:
+            manifest = json.loads((self.directory / CACHE_MANIFEST).read_text())
+        except (OSError, ValueError):
+            return _empty_manifest()
+        if manifest.get('version') != CACHE_VERSION:
+            return _empty_manifest()
+        return manifest
+
+
+def _empty_manifest() -> Dict[str, Any]:
+    """Manifest of an empty dataset cache."""
+    return {'version': CACHE_VERSION, 'rows': 0, 'files': [], 'categories': {}, 'labels': {}}
+
+
+def restore_categories(data: pd.DataFrame) -> pd.DataFrame:
+    """Cast categorical dataset columns back to categories after concatenating parts.
+
+    Categorical parts with different categories are concatenated as objects.
+
+    Args:
+        data (pandas.DataFrame): Concatenated advertisements.
+
+    Returns:
+        The same DataFrame, with every categorical column of DATASET_DTYPES
+        it includes cast back to a category in place.
+    """
+    for column, dtype in DATASET_DTYPES.items():
+        if dtype == 'category' and column in data.columns and data[column].dtype != 'category':
+            data[column] = data[column].astype('category')
+    return data
+
+
+def load_dataset(columns: Optional[Iterable[str]] = None, pattern: str = DEFAULT_PATTERN,
+                 root: Union[str, Path] = '.', processes: Optional[int] = None, cache: bool = False,
+                 cache_dir: Optional[Union[str, Path]] = None,
+                 files: Optional[Iterable[Union[str, Path]]] = None,
+                 label_scheme: Optional[Union[str, LabelScheme]] = None) -> pd.DataFrame:
+    """Load columns of every recorded scan file matching a pattern.
+
+    Args:
+        columns (iterable): Columns to load, e.g. ['DISTANCE', 'RSSI'], or
+            None for every column.
+        pattern (str): Glob pattern of CSV scan files relative to the root.
+        root (str, pathlib.Path): Directory the pattern is relative to, e.g.
+            '..' from the data-analysis folder.
+        processes (int): Number of worker processes reading files. Defaults
+            to the number of CPUs. Files are read in this process if 1.
+        cache (bool): Load from the compiled cache of each data folder,
+            parsing only files added since the cache was last updated.
+        cache_dir (str, pathlib.Path): Cache directory. Defaults to
+            CACHE_DIR within the root.
+        files (iterable): CSV scan files to load instead of those matching
+            the pattern, e.g. the FILE column of a selection from
+            pi_pact_catalog.
+        label_scheme (str, pi_pact_sort.LabelScheme): Label scheme, or the
+            name of one in pi_pact_sort.LABEL_SCHEMES, with which to label
+            DISTANCE in an additional LABEL column. Labels are cached along
+            with the cached columns.
+
+    Returns:
+        Advertisements of every file in file order, with a fresh index.
+        Cached columns of a whole data folder are read-only memory maps.
+
+    Raises:
+        FileNotFoundError: At least one file must match or be selected.
+    """
+    if files is None:
+        files = dataset_files(pattern, root)
+        if not files:
+            raise FileNotFoundError(f"No recorded scan files match {Path(root) / pattern}.")
+    else:
+        files = [Path(csv_file) for csv_file in files]
+        if not files:
+            raise FileNotFoundError("No recorded scan files selected.")
+    columns = None if columns is None else list(columns)
+    if isinstance(label_scheme, str):
+        label_scheme = LABEL_SCHEMES[label_scheme]
+    if cache:
+        if cache_dir is None:
+            cache_dir = Path(root) / CACHE_DIR
+        parts = []
+        for folder in sorted(set(csv_file.parent for csv_file in files)):
+            folder_cache = DatasetCache(folder, cache_dir)
+            folder_cache.update(processes)
+            names = [csv_file.name for csv_file in files if csv_file.parent == folder]
+            part = folder_cache.load(columns, names)
+            if label_scheme is not None:
+                part['LABEL'] = folder_cache.labels(label_scheme, names)
+            parts.append(part)
+        if len(parts) == 1:
+            return parts[0]
+        data = pd.concat(parts, ignore_index=True)
+    else:
+        read_columns = columns
+        if label_scheme is not None and columns is not None and 'DISTANCE' not in columns:
+            read_columns = columns + ['DISTANCE']
+        data = pd.concat(_read_files(files, read_columns, processes), ignore_index=True)
+        if label_scheme is not None:
+            labels = label_scheme(data['DISTANCE'].to_numpy()).astype(LABEL_DTYPE)
+            data = data[columns] if read_columns is not columns else data
+            data['LABEL'] = labels
+    return restore_categories(data)
+
+
+def feature_arrays(data: pd.DataFrame, feature_set: str,
+                   label_scheme: Optional[Union[str, LabelScheme]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Feature matrix and labels of a model feature set.
+
+    Args:
+        data (pandas.DataFrame): Advertisements including DISTANCE and the
+            features of the feature set.
+        feature_set (str): One of {'2var', '3varH', '3varP', '4var'}.
+        label_scheme (str, pi_pact_sort.LabelScheme): Label scheme, or the
+            name of one in pi_pact_sort.LABEL_SCHEMES, e.g. 'binary' for
+            near/far or '3b' for distance bins, or None to use the LABEL
+            column if present and DISTANCE otherwise.
+
+    Returns:
+        float32 features in training order, one row per advertisement, and
+        integer labels.
+    """
+    X = data[FEATURE_SETS[feature_set]].to_numpy(dtype='float32')
+    if isinstance(label_scheme, str):
+        label_scheme = LABEL_SCHEMES[label_scheme]
+    if label_scheme is not None:
+        return X, label_scheme(data['DISTANCE'].to_numpy())
+    return X, data['LABEL' if 'LABEL' in data.columns else 'DISTANCE'].to_numpy(dtype=int)
+
+
+def parse_args(args: List[str]) -> Dict[str, Any]:
+    """Input argument parser.
+
+    Args:
+        args (list): Input arguments as taken from sys.argv.
+
+    Returns:
+        Dictionary containing parsed input arguments. Keys are argument names.
+    """
+    parser = argparse.ArgumentParser(description="Load recorded scan files and summarize the dataset.")
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help="Glob pattern of CSV scan files.")
+    parser.add_argument('--feature_set', choices=list(FEATURE_SETS), default='2var',
+                        help="Model feature set to load.")
+    parser.add_argument('--label_scheme', choices=list(LABEL_SCHEMES), default='binary',
+                        help="Distance binning method of the labels.")
+    parser.add_argument('--processes', type=int,
+                        help="Number of worker processes. Defaults to the number of CPUs.")
+    parser.add_argument('--cache', action='store_true',
+                        help="Load from the compiled dataset cache, updating it with new files first.")
+    return vars(parser.parse_args(args))
+
+
+def main(args: List[str]):
+    """Loads a model feature set and prints its size, load time, and label counts.
+
+    Args:
+        args (list): Arguments as provided by sys.argv.
+    """
+    parsed_args = parse_args(args)
+    start = time.perf_counter()
+    data = load_dataset(FEATURE_SETS[parsed_args['feature_set']], parsed_args['pattern'],
+                        processes=parsed_args['processes'], cache=parsed_args['cache'],
+                        label_scheme=parsed_args['label_scheme'])
+    X, y = feature_arrays(data, parsed_args['feature_set'])
+    duration = time.perf_counter() - start
+    print(f"Loaded {X.shape[0]} advertisements with features {FEATURE_SETS[parsed_args['feature_set']]} "
+          f"({data.memory_usage(deep=True).sum() / 2 ** 20:.1f} MiB) in {duration:.2f} s.")
+    labels, counts = np.unique(y, return_counts=True)
+    for label, count in zip(labels, counts):
+        print(f"Label {label}: {count} advertisements.")
+
+
+if __name__ == '__main__':
+    """Script execution."""
+    main(sys.argv[1:])
@@ -0,0 +1,106 @@
+"""Compiled beacon scanner filters.
+
+Scanner filters are compiled once into a single vectorized evaluator. ID
+filters can additionally be pushed down to raw scan results, so that
+advertisements from beacons that are not of interest are dropped before any
+row is built for them.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import *
+
+# Position of each ID filter in a raw scan result, keyed by address with
+# payload [UUID, MAJOR, MINOR, TX POWER, RSSI]. None denotes the address.
+ID_FILTER_POSITIONS: Dict[str, Optional[int]] = {'ADDRESS': None, 'UUID': 0, 'MAJOR': 1, 'MINOR': 2,
+                                                 'TX POWER': 3}
+
+
+class CompiledFilters(object):
+    """Beacon scanner filters compiled into a single boolean mask evaluator.
+
+    ID filters match exactly against one value or any of a list of values.
+    Measurement filters match within an inclusive [lower, upper] range;
+    advertisements with a missing measurement never match.
+
+    Attributes:
+        id_filters (dict): Accepted values keyed by ID filter.
+        measurement_filters (list): (key, lower, upper) of each measurement
+            filter.
+    """
+
+    def __init__(self, filters: Mapping[str, Any]):
+        """Instance initialization.
+
+        Args:
+            filters (dict): Filters keyed by ID filter or measurement filter.
+                ID filter values are a value or list of values. Measurement
+                filter values are a 2-element list of lower and upper bound.
+
+        Raises:
+            KeyError: Filters must be one of the ID or measurement filters.
+        """
+        self.id_filters: Dict[str, FrozenSet[Any]] = {}
+        self.measurement_filters: List[Tuple[str, Any, Any]] = []
+        for key, value in filters.items():
+            if key in ID_FILTER_POSITIONS:
+                values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+                self.id_filters[key] = frozenset(values)
+            elif key == 'TIMESTAMP':
+                self.measurement_filters.append((key, np.datetime64(pd.Timestamp(value[0]), 'ns'),
+                                                 np.datetime64(pd.Timestamp(value[1]), 'ns')))
+            else:
+                self.measurement_filters.append((key, value[0], value[1]))
+        self.__positions: List[Tuple[Optional[int], FrozenSet[Any]]] = [
+            (ID_FILTER_POSITIONS[key], values) for key, values in self.id_filters.items()]
+
+    def accepts(self, address: str, payload: Sequence[Any]) -> bool:
+        """Whether a raw scan result passes every ID filter.
+
+        Args:
+            address (str): Beacon address.
+            payload (list): Beacon payload [UUID, MAJOR, MINOR, TX POWER,
+                RSSI].
+
+        Returns:
+            True if the advertisement passes every ID filter.
+        """
+        for position, values in self.__positions:
+            if (address if position is None else payload[position]) not in values:
+                return False
+        return True
+
+    def filter_scan(self, scan: Mapping[str, Sequence[Any]]) -> Mapping[str, Sequence[Any]]:
+        """Drop raw scan results that do not pass every ID filter.
+
+        Args:
+            scan (dict): Raw scan results keyed by address.
+
+        Returns:
+            Raw scan results passing every ID filter. The scan itself if there
+            are no ID filters.
+        """
+        if not self.__positions:
+            return scan
+        return {address: payload for address, payload in scan.items() if self.accepts(address, payload)}
+
+    def mask(self, advertisements: pd.DataFrame) -> np.ndarray:
+        """Evaluate every filter on parsed advertisements.
+
+        Args:
+            advertisements (pandas.DataFrame): Parsed advertisements.
+
+        Returns:
+            Boolean array which is True for advertisements passing every
+            filter.
+        """
+        mask = np.ones(len(advertisements), dtype=bool)
+        for key, values in self.id_filters.items():
+            mask &= advertisements[key].isin(list(values)).to_numpy(dtype=bool)
+        for key, lower, upper in self.measurement_filters:
+            if key == 'TIMESTAMP':
+                column = advertisements[key].to_numpy(dtype='datetime64[ns]')
+            else:
+                column = advertisements[key].to_numpy(dtype=float, na_value=np.nan)
+            mask &= (lower <= column) & (column <= upper)
+        return mask
@@ -0,0 +1,286 @@
+"""Streaming per-group histograms of RSSI values.
+
+RSSI is an integer within the range of an int8, so the distribution of RSSI
+values of a group of advertisements, e.g. those recorded at the same
+pre-measured distance or pressure, is held exactly by a histogram of at
+most 256 counts. GroupedHistogram accumulates one histogram per key value
+from parts of the data as they are read, with one hash factorization of the
+keys and one bincount per part, and derives the count, mean, mode, median, and other
+percentiles of every group from the histograms. Memory is bounded by the
+number of groups rather than the number of rows, and continuous keys can be
+binned to a fixed width:
+
+    histogram = aggregate_dataset('PRESSURE', key_width=0.5, cache=True)
+    summary = histogram.summary()  # Note: one row per PRESSURE bin with COUNT, MEAN, MODE, P25, P50, P75
+
+Command line usage:
+
+    python3 pi_pact_histogram.py --key DISTANCE --pattern 'indoor*/*.csv'
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from pi_pact_dataset import CACHE_DIR, DEFAULT_PATTERN, DatasetCache, dataset_files, read_dataset_file
+import sys
+import time
+from typing import *
+
+RSSI_RANGE: Tuple[int, int] = (-128, 127)  # Note: inclusive range of int8 RSSI values (dBm)
+SUMMARY_QUANTILES = [0.25, 0.5, 0.75]
+CHUNK_ROWS = 2 ** 20  # Note: rows of memory mapped cache columns aggregated at a time
+
+
+class GroupedHistogram(object):
+    """Histograms of an integer value for every value of a key.
+
+    Histograms only span the values seen so far, and are widened as values
+    outside of them arrive, so e.g. RSSI values of -100 to -40 dBm take 61
+    counts per group.
+
+    Attributes:
+        key_width (float): Width of the key bins, or None to group by exact
+            key values. Keys are rounded to the nearest multiple of the
+            width, e.g. 1 groups PRESSURE by whole millibars.
+        value_range (tuple): Inclusive range (minimum, maximum) of valid
+            values.
+    """
+
+    def __init__(self, key_width: Optional[float] = None, value_range: Tuple[int, int] = RSSI_RANGE):
+        """Instance initialization.
+
+        Args:
+            key_width (float): Width of the key bins, or None to group by
+                exact key values.
+            value_range (tuple): Inclusive range (minimum, maximum) of valid
+                values.
+
+        Raises:
+            ValueError: Key width must be strictly positive and the value
+                range must not be empty.
+        """
+        if key_width is not None and key_width <= 0:
+            raise ValueError("Key width must be strictly positive.")
+        if value_range[1] < value_range[0]:
+            raise ValueError("Value range maximum must not be less than its minimum.")
+        self.key_width: Optional[float] = key_width
+        self.value_range: Tuple[int, int] = (int(value_range[0]), int(value_range[1]))
+        self.__keys: pd.Index = pd.Index([])
+        self.__counts: np.ndarray = np.zeros((0, 0), dtype=np.int64)
+        self.__offset: int = 0  # Note: value of the first count of every histogram
+
+    @property
+    def keys(self) -> np.ndarray:
+        """Key values, or bins, of the groups in ascending order."""
+        return np.sort(self.__keys.to_numpy())
+
+    @property
+    def counts(self) -> pd.DataFrame:
+        """Histogram of every group, indexed by key with one column per value."""
+        keys, counts = self.__sorted()
+        return pd.DataFrame(counts, index=keys, columns=self.__offset + np.arange(counts.shape[1]))
+
+    def update(self, keys: Union[np.ndarray, pd.Series], values: Union[np.ndarray, pd.Series]):
+        """Add values to the histograms of their keys.
+
+        Pairs with a null key or value, e.g. Sense HAT values of files
+        recorded without one, are ignored.
+
+        Args:
+            keys (numpy.ndarray, pandas.Series): Key of each value.
+            values (numpy.ndarray, pandas.Series): Integer values.
+
+        Raises:
+            ValueError: Values must be within the value range.
+        """
+        keys = np.asarray(keys)
+        values = np.asarray(values)
+        valid = np.ones(len(keys), dtype=bool)
+        if keys.dtype.kind == 'f':
+            valid &= ~np.isnan(keys)
+        if values.dtype.kind == 'f':
+            valid &= ~np.isnan(values)
+        if not valid.all():
+            keys, values = keys[valid], values[valid]
+        if len(keys) == 0:
+            return
+        if self.key_width is not None:
+            keys = np.round(keys / self.key_width) * self.key_width
+        values = values.astype(np.int64)
+        minimum, maximum = int(values.min()), int(values.max())
+        if minimum < self.value_range[0] or maximum > self.value_range[1]:
+            raise ValueError(f"Histogram values must be within [{self.value_range[0]}, {self.value_range[1]}].")
+        self.__widen(minimum, maximum)
+        codes, uniques = pd.factorize(keys)
+        bins = self.__counts.shape[1]
+        counts = np.bincount(codes * bins + (values - self.__offset),
+                             minlength=len(uniques) * bins).reshape(-1, bins)
+        rows = self.__keys.get_indexer(uniques)
+        new = rows < 0
+        if new.any():
+            rows[new] = np.arange(len(self.__keys), len(self.__keys) + new.sum())
+            self.__keys = self.__keys.append(pd.Index(uniques[new]))
+            self.__counts = np.vstack([self.__counts, np.zeros((new.sum(), bins), dtype=np.int64)])
+        self.__counts[rows] += counts
+
+    def count(self) -> pd.Series:
+        """Number of values of every group, indexed by key."""
+        keys, counts = self.__sorted()
+        return pd.Series(counts.sum(axis=1), index=keys)
+
+    def mean(self) -> pd.Series:
+        """Mean value of every group, indexed by key."""
+        keys, counts = self.__sorted()
+        return pd.Series(counts @ (self.__offset + np.arange(counts.shape[1])) / counts.sum(axis=1), index=keys)
+
+    def mode(self) -> pd.Series:
+        """Most frequent value of every group, indexed by key. Ties are broken by the smallest value."""
+        keys, counts = self.__sorted()
+        return pd.Series(self.__offset + counts.argmax(axis=1), index=keys)
+
+    def quantile(self, quantile: float) -> pd.Series:
+        """Quantile of every group, indexed by key.
+
+        Args:
+            quantile (float): Quantile in [0, 1], e.g. 0.5 for the median.
+
+        Returns:
+            Quantiles linearly interpolated between the nearest values, as
+            numpy.quantile and pandas.Series.quantile.
+
+        Raises:
+            ValueError: Quantile must be in [0, 1].
+        """
+        if not 0 <= quantile <= 1:
+            raise ValueError("Quantile must be in [0, 1].")
+        keys, counts = self.__sorted()
+        cumulative = counts.cumsum(axis=1)
+        position = quantile * (counts.sum(axis=1) - 1)
+        lower = self.__offset + (cumulative <= np.floor(position)[:, np.newaxis]).sum(axis=1)
+        upper = self.__offset + (cumulative <= np.ceil(position)[:, np.newaxis]).sum(axis=1)
+        return pd.Series(lower + (position - np.floor(position)) * (upper - lower), index=keys)
+
+    def median(self) -> pd.Series:
+        """Median value of every group, indexed by key."""
+        return self.quantile(0.5)
+
+    def summary(self, quantiles: Iterable[float] = SUMMARY_QUANTILES) -> pd.DataFrame:
+        """Statistics of every group.
+
+        Args:
+            quantiles (iterable): Quantiles to include, e.g. [0.5].
+
+        Returns:
+            DataFrame indexed by key, in ascending order, of the COUNT, MEAN,
+            and MODE of every group and a column per quantile, e.g. P50 for
+            the median.
+        """
+        summary = pd.DataFrame({'COUNT': self.count(), 'MEAN': self.mean(), 'MODE': self.mode()})
+        for quantile in quantiles:
+            summary[f"P{100 * quantile:g}"] = self.quantile(quantile)
+        return summary
+
+    def __sorted(self) -> Tuple[pd.Index, np.ndarray]:
+        """Keys in ascending order and their histograms."""
+        order = np.argsort(self.__keys.to_numpy(), kind='stable')
+        return self.__keys[order], self.__counts[order]
+
+    def __widen(self, minimum: int, maximum: int):
+        """Widen every histogram to span the given values."""
+        bins = self.__counts.shape[1]
+        if bins == 0:
+            self.__offset = minimum
+            self.__counts = np.zeros((len(self.__keys), maximum - minimum + 1), dtype=np.int64)
+            return
+        below = max(self.__offset - minimum, 0)
+        above = max(maximum - (self.__offset + bins - 1), 0)
+        if below or above:
+            self.__counts = np.pad(self.__counts, ((0, 0), (below, above)))
+            self.__offset -= below
+
+
+def aggregate_dataset(key: str, value: str = 'RSSI', pattern: str = DEFAULT_PATTERN, root: Union[str, Path] = '.',
+                      files: Optional[Iterable[Union[str, Path]]] = None, key_width: Optional[float] = None,
+                      cache: bool = False, cache_dir: Optional[Union[str, Path]] = None) -> GroupedHistogram:
+    """Histograms of a value for every value of a key across recorded scan files.
+
+    Args:
+        key (str): Column to group by, e.g. 'DISTANCE' or 'PRESSURE'.
+        value (str): Integer column to count, e.g. 'RSSI'.
+        pattern (str): Glob pattern of CSV scan files relative to the root.
+        root (str, pathlib.Path): Directory the pattern is relative to.
+        files (iterable): CSV scan files to aggregate instead of those
+            matching the pattern.
+        key_width (float): Width of the key bins, or None to group by exact
+            key values.
+        cache (bool): Aggregate the memory mapped columns of the compiled
+            cache of each data folder, a chunk at a time, instead of reading
+            one CSV file at a time.
+        cache_dir (str, pathlib.Path): Cache directory. Defaults to
+            CACHE_DIR within the root.
+
+    Returns:
+        Histograms of every key value.
+
+    Raises:
+        FileNotFoundError: At least one file must match or be selected.
+    """
+    files = dataset_files(pattern, root) if files is None else [Path(csv_file) for csv_file in files]
+    if not files:
+        raise FileNotFoundError("No recorded scan files matched or selected.")
+    histogram = GroupedHistogram(key_width)
+    if cache:
+        if cache_dir is None:
+            cache_dir = Path(root) / CACHE_DIR
+        for folder in sorted(set(csv_file.parent for csv_file in files)):
+            folder_cache = DatasetCache(folder, cache_dir)
+            folder_cache.update()
+            part = folder_cache.load([key, value], [csv_file.name for csv_file in files if csv_file.parent == folder])
+            keys, values = part[key].to_numpy(), part[value].to_numpy()
+            for start in range(0, len(part), CHUNK_ROWS):
+                histogram.update(keys[start:start + CHUNK_ROWS], values[start:start + CHUNK_ROWS])
+    else:
+        for csv_file in files:
+            part = read_dataset_file(csv_file, [key, value])
+            histogram.update(part[key].to_numpy(), part[value].to_numpy())
+    return histogram
+
+
+def parse_args(args: List[str]) -> Dict[str, Any]:
+    """Input argument parser.
+
+    Args:
+        args (list): Input arguments as taken from sys.argv.
+
+    Returns:
+        Dictionary containing parsed input arguments. Keys are argument names.
+    """
+    parser = argparse.ArgumentParser(description="Summarize the RSSI distribution of every value of a column.")
+    parser.add_argument('--key', default='DISTANCE', help="Column to group by, e.g. DISTANCE or PRESSURE.")
+    parser.add_argument('--key_width', type=float, help="Width of the key bins. Defaults to exact key values.")
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help="Glob pattern of CSV scan files.")
+    parser.add_argument('--cache', action='store_true',
+                        help="Aggregate the compiled dataset cache, updating it with new files first.")
+    return vars(parser.parse_args(args))
+
+
+def main(args: List[str]):
+    """Aggregates RSSI histograms and prints their summary and aggregation time.
+
+    Args:
+        args (list): Arguments as provided by sys.argv.
+    """
+    parsed_args = parse_args(args)
+    start = time.perf_counter()
+    histogram = aggregate_dataset(parsed_args['key'], pattern=parsed_args['pattern'],
+                                  key_width=parsed_args['key_width'], cache=parsed_args['cache'])
+    summary = histogram.summary()
+    duration = time.perf_counter() - start
+    print(summary.to_string(float_format=lambda x: f"{x:.1f}"))
+    print(f"Aggregated {summary['COUNT'].sum()} advertisements into {len(summary)} groups in {duration:.2f} s.")
+
+
+if __name__ == '__main__':
+    """Script execution."""
+    main(sys.argv[1:])
@@ -0,0 +1,37 @@
+"""Deferred imports of heavy modules.
+
+Importing numpy, pandas, and asyncio takes seconds on a Raspberry Pi Zero,
+yet the advertiser never uses them. Modules imported with lazy_import are
+only executed on first attribute access, so each mode only pays for the
+modules it actually uses.
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Import a module on first attribute access.
+
+    Args:
+        name (str): Absolute module name, e.g. 'pandas'.
+
+    Returns:
+        The module if already imported, otherwise a module which imports
+        itself on first attribute access.
+
+    Raises:
+        ModuleNotFoundError: Module must be installed.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
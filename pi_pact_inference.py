@@ -0,0 +1,178 @@
+"""Real-time proximity inference on received beacon advertisements.
+
+Loads one of the pickled classifiers trained in the pi_pact_*.ipynb notebooks
+and predicts the proximity of each received advertisement as it is processed.
+The feature set and label scheme of a model are taken from its file name, e.g.
+xgboost-models/3varP-binary-xgboost-model.pickle predicts near/far
+(pi_pact_sort.LABEL_SCHEMES['binary']) from RSSI and PRESSURE, and a '3b'
+model predicts the distance bin (pi_pact_sort.LABEL_SCHEMES['3b']).
+
+Command line usage:
+
+    python3 pi_pact_inference.py nb-kde-models/2var-binary-nb-kde-model.pickle pi_pact_scan_20200620T101242.csv
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import pickle
+from pi_pact_sort import FEATURE_SETS, LABEL_SCHEMES, LabelScheme
+import sys
+import time
+from typing import *
+
+def parse_model_name(model_path: Union[str, Path]) -> Tuple[str, str]:
+    """Feature set and label scheme of a pickled model from its file name.
+
+    Args:
+        model_path (str, pathlib.Path): Model file path named
+            {feature set}-{label scheme}-...-model.pickle.
+
+    Returns:
+        Feature set and label scheme, e.g. ('3varP', 'binary').
+
+    Raises:
+        ValueError: Model file name must start with a known feature set and
+            label scheme.
+    """
+    parts = Path(model_path).name.split('-')
+    if len(parts) < 2 or parts[0] not in FEATURE_SETS or parts[1] not in LABEL_SCHEMES:
+        raise ValueError(f"Model file name must start with one of the feature sets {list(FEATURE_SETS)} "
+                         f"followed by one of the label schemes {list(LABEL_SCHEMES)}.")
+    return parts[0], parts[1]
+
+
+class ProximityModel(object):
+    """A pickled proximity classifier applied to processed advertisements.
+
+    The model is unpickled once on instantiation. Each call to predict
+    classifies a batch of advertisements with a single model call, so the
+    model overhead is shared by every advertisement of a scan.
+
+    Attributes:
+        model_path (pathlib.Path): Pickled model file path.
+        feature_set (str): One of {'2var', '3varH', '3varP', '4var'}.
+        label_scheme (str): Name of a label scheme in
+            pi_pact_sort.LABEL_SCHEMES, e.g. 'binary' for near/far or '3b'
+            for distance bins.
+        features (list): Feature columns in training order.
+        categorize (pi_pact_sort.LabelScheme): Distance binning method of the
+            model labels, e.g. to label the DISTANCE of recorded
+            advertisements.
+        stats (dict): Number of batches and advertisements predicted, total
+            and maximum model time (s) per batch, and maximum latency (s)
+            from scan start to prediction.
+        latest (dict): Most recent prediction keyed by beacon address.
+    """
+
+    def __init__(self, model_path: Union[str, Path]):
+        """Instance initialization.
+
+        Args:
+            model_path (str, pathlib.Path): Pickled model file path.
+
+        Raises:
+            ValueError: Model file name must start with a known feature set
+                and label scheme.
+        """
+        self.model_path: Path = Path(model_path)
+        self.feature_set, self.label_scheme = parse_model_name(self.model_path)
+        self.features: List[str] = FEATURE_SETS[self.feature_set]
+        self.categorize: LabelScheme = LABEL_SCHEMES[self.label_scheme]
+        self.stats: Dict[str, Union[float, int]] = {}
+        self.latest: Dict[str, int] = {}
+        self.reset()
+        with self.model_path.open('rb') as f:
+            self.__model = pickle.load(f)  # Note: imports the model's own modules, e.g. sklearn
+
+    def reset(self):
+        """Clear prediction statistics and latest predictions."""
+        self.stats = {'batches': 0, 'advertisements': 0, 'model_time': 0.0, 'max_model_time': 0.0,
+                      'max_latency': 0.0}
+        self.latest = {}
+
+    def predict(self, advertisements: pd.DataFrame) -> pd.DataFrame:
+        """Predict the proximity of every advertisement.
+
+        Advertisements with a missing feature, e.g. before the first Sense
+        HAT sample, have no prediction.
+
+        Args:
+            advertisements (pandas.DataFrame): Processed advertisements
+                including the model features.
+
+        Returns:
+            Advertisements with added PREDICTION, the predicted label, and
+            LATENCY, the time (s) from the start of the scan which received
+            the advertisement until its prediction.
+        """
+        features = advertisements[self.features].to_numpy(dtype=np.float64, na_value=np.nan)
+        complete = ~np.isnan(features).any(axis=1)
+        predictions = pd.array(np.full(len(advertisements), pd.NA), dtype='Int8')
+        start_time = time.perf_counter()
+        if complete.any():
+            predictions[complete] = np.asarray(self.__model.predict(features[complete])).astype(np.int8)
+        model_time = time.perf_counter() - start_time
+        latency = (np.datetime64(pd.Timestamp.now(), 'ns')
+                   - advertisements['TIMESTAMP'].to_numpy(dtype='datetime64[ns]')) / np.timedelta64(1, 's')
+        advertisements = advertisements.assign(PREDICTION=predictions, LATENCY=latency.astype(np.float32))
+        self.stats['batches'] += 1
+        self.stats['advertisements'] += int(complete.sum())
+        self.stats['model_time'] += model_time
+        self.stats['max_model_time'] = max(self.stats['max_model_time'], model_time)
+        if len(advertisements) > 0:
+            self.stats['max_latency'] = max(self.stats['max_latency'], float(latency.max()))
+            latest = advertisements[complete].drop_duplicates('ADDRESS', keep='last')
+            self.latest.update(zip(latest['ADDRESS'].astype(str), latest['PREDICTION'].astype(int)))
+        return advertisements
+
+    def summary(self) -> str:
+        """One line summary of prediction statistics."""
+        per_advertisement = self.stats['model_time'] / max(self.stats['advertisements'], 1)
+        per_batch = self.stats['model_time'] / max(self.stats['batches'], 1)
+        return (f"Predicted {self.stats['advertisements']} advertisements in {self.stats['batches']} "
+                f"batches with {self.model_path.name}: {1e3 * per_batch:.2f} ms per batch "
+                f"(max {1e3 * self.stats['max_model_time']:.2f} ms), {1e6 * per_advertisement:.3g} us per "
+                f"advertisement, max latency {self.stats['max_latency']:.3f} s.")
+
+
+def parse_args(args: List[str]) -> Dict[str, Any]:
+    """Input argument parser.
+
+    Args:
+        args (list): Input arguments as taken from sys.argv.
+
+    Returns:
+        Dictionary containing parsed input arguments. Keys are argument names.
+    """
+    parser = argparse.ArgumentParser(description="Predict the proximity of recorded advertisements.")
+    parser.add_argument('model', help="Pickled model file.")
+    parser.add_argument('scan_file', help="Scan file to predict.")
+    parser.add_argument('--batch', type=int, default=20,
+                        help="Advertisements predicted per model call, e.g. per scan.")
+    return vars(parser.parse_args(args))
+
+
+def main(args: List[str]):
+    """Predicts a recorded scan file in batches and prints prediction statistics.
+
+    Args:
+        args (list): Arguments as provided by sys.argv.
+    """
+    parsed_args = parse_args(args)
+    model = ProximityModel(parsed_args['model'])
+    if Path(parsed_args['scan_file']).suffix == '.csv':
+        advertisements = pd.read_csv(parsed_args['scan_file'], parse_dates=['TIMESTAMP'])
+    else:
+        from pi_pact_columnar import read_scan_file  # Note: pyarrow is only required for columnar files
+        advertisements = read_scan_file(parsed_args['scan_file'])
+    advertisements['TIMESTAMP'] = pd.Timestamp.now()  # Note: latency of recorded scans is meaningless
+    for start in range(0, len(advertisements), parsed_args['batch']):
+        model.predict(advertisements.iloc[start:start + parsed_args['batch']])
+    print(model.summary())
+
+
+if __name__ == '__main__':
+    """Script execution."""
+    main(sys.argv[1:])
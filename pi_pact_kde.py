@@ -0,0 +1,257 @@
+"""Binned Gaussian kernel density estimates of RSSI distributions.
+
+RSSI values are integers, so the counts of each value (see
+pi_pact_histogram) hold a class's data exactly. The density of every class
+and bandwidth is the convolution of its counts, placed on a grid of
+GRID_RESOLUTION points per dBm, with a sampled Gaussian kernel, computed
+with one real FFT of the counts of every class and of the kernel of every
+bandwidth. This takes milliseconds for the full corpus, in place of an exact
+Gaussian sum over every sample at every grid point, and is exact at the grid
+points up to the kernel truncation at KERNEL_WIDTH standard deviations:
+
+    densities = kde_dataset('binary', [1, 2])
+    densities.frame(2)  # Note: grid (dBm) by class density with a 2 dBm bandwidth, e.g. for plotting
+    densities.predict_proba(rssi, 2)  # Note: posterior class probabilities of RSSI values
+
+Command line usage:
+
+    python3 pi_pact_kde.py --label_scheme 3b --bandwidths 1 2 4
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from pi_pact_dataset import DEFAULT_PATTERN
+from pi_pact_histogram import aggregate_dataset
+from pi_pact_sort import LABEL_SCHEMES, LabelScheme
+import sys
+import time
+from typing import *
+
+GRID_RESOLUTION = 4  # Note: grid points per dBm, so that integer RSSI values fall on grid points
+KERNEL_WIDTH = 5  # Note: standard deviations of a kernel included on each side of its center
+
+
+class KernelDensities(object):
+    """Kernel density estimates of several classes at several bandwidths on a shared grid.
+
+    Attributes:
+        grid (numpy.ndarray): Evaluation points (dBm) in ascending order.
+        classes (numpy.ndarray): Class labels in ascending order.
+        bandwidths (numpy.ndarray): Bandwidths, as given, in order.
+        relative (bool): Whether bandwidths are multiples of each class's
+            standard deviation, as bw_method of pandas.DataFrame.plot.kde,
+            instead of dBm.
+        counts (numpy.ndarray): Number of values of each class.
+        densities (numpy.ndarray): Densities (1/dBm) of shape (bandwidths,
+            classes, grid points).
+    """
+
+    def __init__(self, grid: np.ndarray, classes: np.ndarray, bandwidths: np.ndarray, relative: bool,
+                 counts: np.ndarray, densities: np.ndarray):
+        """Instance initialization.
+
+        Args:
+            grid (numpy.ndarray): Evaluation points (dBm).
+            classes (numpy.ndarray): Class labels.
+            bandwidths (numpy.ndarray): Bandwidths.
+            relative (bool): Whether bandwidths are relative to each class's
+                standard deviation.
+            counts (numpy.ndarray): Number of values of each class.
+            densities (numpy.ndarray): Densities of shape (bandwidths,
+                classes, grid points).
+        """
+        self.grid: np.ndarray = grid
+        self.classes: np.ndarray = classes
+        self.bandwidths: np.ndarray = bandwidths
+        self.relative: bool = relative
+        self.counts: np.ndarray = counts
+        self.densities: np.ndarray = densities
+
+    def frame(self, bandwidth: Optional[float] = None) -> pd.DataFrame:
+        """Densities at one bandwidth.
+
+        Args:
+            bandwidth (float): One of the bandwidths, or None for the first.
+
+        Returns:
+            DataFrame indexed by grid point with one column of densities per
+            class.
+        """
+        return pd.DataFrame(self.densities[self.__bandwidth_index(bandwidth)].T, index=self.grid,
+                            columns=self.classes)
+
+    def evaluate(self, values: Union[np.ndarray, pd.Series], bandwidth: Optional[float] = None) -> np.ndarray:
+        """Densities of every class at values, linearly interpolated between grid points.
+
+        Args:
+            values (numpy.ndarray, pandas.Series): RSSI values (dBm).
+            bandwidth (float): One of the bandwidths, or None for the first.
+
+        Returns:
+            Densities of shape (values, classes). Values outside the grid
+            have zero density.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        densities = self.densities[self.__bandwidth_index(bandwidth)]
+        return np.stack([np.interp(values, self.grid, density, left=0, right=0) for density in densities], axis=1)
+
+    def predict_proba(self, values: Union[np.ndarray, pd.Series], bandwidth: Optional[float] = None,
+                      priors: Optional[Sequence[float]] = None) -> np.ndarray:
+        """Posterior probability of every class given RSSI values, as KDEClassifier.predict_proba.
+
+        Args:
+            values (numpy.ndarray, pandas.Series): RSSI values (dBm).
+            bandwidth (float): One of the bandwidths, or None for the first.
+            priors (sequence): Prior probability of each class, or None for
+                the class frequencies of the estimates.
+
+        Returns:
+            Probabilities of shape (values, classes). Values outside of the
+            support of every class get uniform probabilities.
+        """
+        priors = self.counts / self.counts.sum() if priors is None else np.asarray(priors, dtype=np.float64)
+        joint = self.evaluate(values, bandwidth) * priors
+        total = joint.sum(axis=1, keepdims=True)
+        return np.divide(joint, total, out=np.full_like(joint, 1 / len(self.classes)), where=total > 0)
+
+    def predict(self, values: Union[np.ndarray, pd.Series], bandwidth: Optional[float] = None,
+                priors: Optional[Sequence[float]] = None) -> np.ndarray:
+        """Most probable class of every RSSI value, as KDEClassifier.predict."""
+        return self.classes[np.argmax(self.predict_proba(values, bandwidth, priors), axis=1)]
+
+    def __bandwidth_index(self, bandwidth: Optional[float]) -> int:
+        """Position of a bandwidth, or of the first if None."""
+        if bandwidth is None:
+            return 0
+        matches = np.flatnonzero(np.isclose(self.bandwidths, bandwidth))
+        if len(matches) == 0:
+            raise ValueError(f"Bandwidth must be one of {self.bandwidths.tolist()}.")
+        return int(matches[0])
+
+
+def binned_kde(counts: pd.DataFrame, bandwidths: Sequence[float], relative: bool = False,
+               resolution: int = GRID_RESOLUTION) -> KernelDensities:
+    """Gaussian kernel density estimates of integer values from their counts.
+
+    Args:
+        counts (pandas.DataFrame): Number of each value (integer columns)
+            of each class (index), e.g.
+            pi_pact_histogram.GroupedHistogram.counts.
+        bandwidths (sequence): Kernel standard deviations, in units of the
+            values or, if relative, multiples of each class's standard
+            deviation.
+        relative (bool): Whether bandwidths are relative to each class's
+            standard deviation.
+        resolution (int): Grid points per unit of the values.
+
+    Returns:
+        Densities of every class and bandwidth.
+
+    Raises:
+        ValueError: Bandwidths must be strictly positive and every class must
+            have values, and at least two if bandwidths are relative.
+    """
+    bandwidths = np.atleast_1d(np.asarray(bandwidths, dtype=np.float64))
+    if len(bandwidths) == 0 or np.any(bandwidths <= 0):
+        raise ValueError("Bandwidths must be a non-empty sequence of strictly positive values.")
+    counts = counts.sort_index(axis=1)
+    values = counts.columns.to_numpy(dtype=np.int64)
+    weights = counts.to_numpy(dtype=np.float64)
+    totals = weights.sum(axis=1)
+    if np.any(totals < (2 if relative else 1)):
+        raise ValueError("Every class must have values to estimate its density, and at least two with relative "
+                         "bandwidths.")
+    scales = np.ones(len(weights))
+    if relative:
+        means = weights @ values / totals
+        scales = np.sqrt(weights @ values ** 2 - totals * means ** 2) / np.sqrt(totals - 1)  # Note: as scipy
+    sigmas = bandwidths[:, np.newaxis] * scales[np.newaxis, :]  # Note: (bandwidths, classes) in value units
+    padding = int(np.ceil(KERNEL_WIDTH * sigmas.max() * resolution))
+    spacing = 1 / resolution
+    length = (values[-1] - values[0]) * resolution + 1 + 2 * padding
+    grid = values[0] - padding * spacing + spacing * np.arange(length)
+    binned = np.zeros((len(weights), length))
+    binned[:, padding + (values - values[0]) * resolution] = weights / totals[:, np.newaxis]
+    # Note: padding keeps every kernel within the grid, so the circular convolution does not wrap around
+    offsets = np.fft.ifftshift(np.arange(length) - length // 2) * spacing
+    kernels = np.exp(-0.5 * (offsets / sigmas[:, :, np.newaxis]) ** 2)
+    kernels[..., np.abs(offsets) > KERNEL_WIDTH * sigmas[:, :, np.newaxis]] = 0
+    kernels /= kernels.sum(axis=-1, keepdims=True) * spacing
+    densities = np.fft.irfft(np.fft.rfft(binned)[np.newaxis] * np.fft.rfft(kernels), n=length)
+    return KernelDensities(grid, counts.index.to_numpy(), bandwidths, relative, totals.astype(np.int64),
+                           np.maximum(densities, 0))  # Note: clips FFT round-off below zero
+
+
+def kde_dataset(label_scheme: Union[str, LabelScheme], bandwidths: Sequence[float], pattern: str = DEFAULT_PATTERN,
+                root: Union[str, Path] = '.', files: Optional[Iterable[Union[str, Path]]] = None,
+                relative: bool = False, cache: bool = True,
+                cache_dir: Optional[Union[str, Path]] = None) -> KernelDensities:
+    """Kernel density estimates of the RSSI of every class of recorded scan files.
+
+    Args:
+        label_scheme (str, pi_pact_sort.LabelScheme): Label scheme, or the
+            name of one in pi_pact_sort.LABEL_SCHEMES, of the classes.
+        bandwidths (sequence): Kernel standard deviations (dBm), or
+            multiples of each class's standard deviation if relative.
+        pattern (str): Glob pattern of CSV scan files relative to the root.
+        root (str, pathlib.Path): Directory the pattern is relative to.
+        files (iterable): CSV scan files to use instead of those matching the
+            pattern.
+        relative (bool): Whether bandwidths are relative to each class's
+            standard deviation.
+        cache (bool): Aggregate RSSI counts from the compiled dataset cache.
+        cache_dir (str, pathlib.Path): Cache directory. Defaults to
+            pi_pact_dataset.CACHE_DIR within the root.
+
+    Returns:
+        Densities of every class and bandwidth.
+    """
+    if isinstance(label_scheme, str):
+        label_scheme = LABEL_SCHEMES[label_scheme]
+    counts = aggregate_dataset('DISTANCE', 'RSSI', pattern, root, files, cache=cache, cache_dir=cache_dir).counts
+    counts = counts.groupby(label_scheme(counts.index.to_numpy())).sum()  # Note: sums the counts of each distance
+    return binned_kde(counts, bandwidths, relative)
+
+
+def parse_args(args: List[str]) -> Dict[str, Any]:
+    """Input argument parser.
+
+    Args:
+        args (list): Input arguments as taken from sys.argv.
+
+    Returns:
+        Dictionary containing parsed input arguments. Keys are argument names.
+    """
+    parser = argparse.ArgumentParser(description="Estimate the RSSI density of every distance class.")
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help="Glob pattern of CSV scan files.")
+    parser.add_argument('--label_scheme', choices=list(LABEL_SCHEMES), default='binary',
+                        help="Distance binning method of the classes.")
+    parser.add_argument('--bandwidths', type=float, nargs='+', default=[1.0], help="Kernel bandwidths (dBm).")
+    parser.add_argument('--relative', action='store_true',
+                        help="Bandwidths are multiples of each class's RSSI standard deviation.")
+    return vars(parser.parse_args(args))
+
+
+def main(args: List[str]):
+    """Estimates RSSI densities and prints the mode and estimation time of every class and bandwidth.
+
+    Args:
+        args (list): Arguments as provided by sys.argv.
+    """
+    parsed_args = parse_args(args)
+    start = time.perf_counter()
+    densities = kde_dataset(parsed_args['label_scheme'], parsed_args['bandwidths'], parsed_args['pattern'],
+                            relative=parsed_args['relative'])
+    duration = time.perf_counter() - start
+    modes = pd.DataFrame(densities.grid[densities.densities.argmax(axis=-1)], index=densities.bandwidths,
+                         columns=densities.classes)
+    print(f"Density mode (dBm) of each label (columns) by bandwidth (rows):\n{modes.to_string()}")
+    print(f"Estimated {len(densities.classes)} densities of {densities.counts.sum()} advertisements at "
+          f"{len(densities.bandwidths)} bandwidths on {len(densities.grid)} grid points in {1e3 * duration:.1f} ms.")
+
+
+if __name__ == '__main__':
+    """Script execution."""
+    main(sys.argv[1:])
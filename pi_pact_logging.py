@@ -0,0 +1,153 @@
+"""Non-blocking logging for the advertiser and scanner loops.
+
+In queue mode the handlers configured for a logger are moved behind a
+bounded queue: logging calls only enqueue the record, and a background
+listener thread formats it and writes it to the console and log file, so a
+stalled SD card no longer delays scans. Records logged while the queue is
+full are dropped and counted rather than blocking the caller. Frequent
+messages, e.g. one debug message per scan, can additionally be rate limited
+per call site.
+"""
+
+import logging
+import logging.handlers
+import queue
+import time
+from typing import *
+
+LOG_QUEUE_SIZE = 10000  # Records buffered before new records are dropped
+
+
+class RateLimitFilter(logging.Filter):
+    """Limits the rate of records at or below a level per call site.
+
+    Each call site, i.e. logger, file, and line, has a token bucket allowing
+    bursts of up to one second's worth of records. The number of records
+    suppressed since the previous record of a call site is appended to its
+    next record.
+
+    Attributes:
+        rate (float, int): Records per second allowed per call site.
+        level (int): Records at or below this level are rate limited.
+    """
+
+    def __init__(self, rate: Union[float, int], level: int = logging.DEBUG):
+        """Instance initialization.
+
+        Args:
+            rate (float, int): Records per second allowed per call site. Must
+                be strictly positive.
+            level (int): Records at or below this level are rate limited.
+
+        Raises:
+            ValueError: Logger rate limit must be strictly positive.
+        """
+        super().__init__()
+        if rate <= 0:
+            raise ValueError("Logger rate limit must be strictly positive.")
+        self.rate: Union[float, int] = rate
+        self.level: int = level
+        self.__buckets: Dict[Tuple[str, str, int], List[float]] = {}  # Note: [tokens, last time, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Whether to log a record, spending one token of its call site."""
+        if record.levelno > self.level:
+            return True
+        now = time.monotonic()
+        capacity = max(1.0, self.rate)
+        bucket = self.__buckets.setdefault((record.name, record.pathname, record.lineno), [capacity, now, 0])
+        bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            return False
+        bucket[0] -= 1
+        if bucket[2]:
+            record.msg = f"{record.msg} ({bucket[2]:.0f} similar messages suppressed)"
+            bucket[2] = 0
+        return True
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """Queue listener which can be stopped while its queue is full."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)  # Note: waits for the listener thread to make room
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler which never blocks the logging thread.
+
+    Attributes:
+        listener (logging.handlers.QueueListener): Listener writing the
+            queued records to the original handlers.
+        dropped (int): Number of records dropped because the queue was full.
+    """
+
+    def __init__(self, log_queue: queue.Queue, listener: logging.handlers.QueueListener):
+        """Instance initialization.
+
+        Args:
+            log_queue (queue.Queue): Bounded record queue.
+            listener (logging.handlers.QueueListener): Listener of the queue.
+        """
+        super().__init__(log_queue)
+        self.listener: logging.handlers.QueueListener = listener
+        self.dropped: int = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Enqueue records as they are, leaving all formatting to the listener thread."""
+        return record  # Note: records never leave the process, so they need not be pickleable
+
+    def enqueue(self, record: logging.LogRecord):
+        """Enqueue a record, dropping it if the queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def start_queue(logger: logging.Logger, size: int = LOG_QUEUE_SIZE) -> DroppingQueueHandler:
+    """Move a logger's handlers behind a queue served by a background thread.
+
+    Args:
+        logger (logging.Logger): Configured logger.
+        size (int): Records buffered before new records are dropped.
+
+    Returns:
+        The queue handler now attached to the logger.
+    """
+    handlers = logger.handlers[:]
+    log_queue: queue.Queue = queue.Queue(size)
+    listener = _QueueListener(log_queue, *handlers, respect_handler_level=True)
+    queue_handler = DroppingQueueHandler(log_queue, listener)
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(queue_handler)
+    listener.start()
+    return queue_handler
+
+
+def stop_queue(logger: logging.Logger) -> List[logging.Handler]:
+    """Write every queued record of a logger, then stop its listener thread.
+
+    Args:
+        logger (logging.Logger): Logger passed to start_queue.
+
+    Returns:
+        The handlers which were served by the listener, reattached to the
+        logger and still open, or no handlers if the logger is not queued.
+    """
+    handlers = []
+    for queue_handler in logger.handlers[:]:
+        if not isinstance(queue_handler, DroppingQueueHandler):
+            continue
+        listener = queue_handler.listener
+        listener.stop()  # Note: handles every record enqueued before stopping
+        logger.removeHandler(queue_handler)
+        for handler in listener.handlers:
+            logger.addHandler(handler)
+        if queue_handler.dropped:
+            logger.warning(f"Dropped {queue_handler.dropped} log records while the log queue was full.")
+        handlers.extend(listener.handlers)
+    return handlers
@@ -0,0 +1,284 @@
+"""Hot path metrics of the beacon advertiser and scanner loops.
+
+Counters and latency histograms with fixed buckets are updated in place,
+each in constant time, and exported in the Prometheus text format to a file,
+e.g. for the node_exporter textfile collector, and/or a local HTTP endpoint.
+A JSON summary with approximate quantiles is produced at shutdown. Disabled
+metrics return from every update immediately, so instrumentation costs a
+single attribute check per update when unused. The HTTP endpoint only
+listens on localhost, e.g. curl http://localhost:9100/metrics.
+"""
+
+from bisect import bisect_left
+import json
+import math
+import os
+from pathlib import Path
+import threading
+from typing import *
+
+METRICS_INTERVAL = 5  # (s) Interval at which the metrics file is rewritten
+METRICS_HOST = '127.0.0.1'
+SUMMARY_QUANTILES = [0.5, 0.9, 0.99]
+DURATION_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]  # (s)
+COUNT_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+# Metrics of each mode as (type, name, help, buckets)
+METRIC_DEFINITIONS: Dict[str, List[Tuple[str, str, str, Optional[List[float]]]]] = {
+    'advertiser': [
+        ('counter', 'starts_total', "Times advertising was started or restarted.", None),
+        ('histogram', 'start_duration_seconds', "Time taken to start advertising.", DURATION_BUCKETS),
+        ('histogram', 'control_latency_seconds',
+         "Time from receiving a control command until the advertising loop acted on it.", DURATION_BUCKETS)
+    ],
+    'scanner': [
+        ('counter', 'scans_total', "Scans performed.", None),
+        ('counter', 'advertisements_received_total', "Advertisements received, before filtering.", None),
+        ('counter', 'advertisements_passed_total', "Advertisements passing the filters.", None),
+        ('histogram', 'scan_duration_seconds', "Time blocked receiving each scan.", DURATION_BUCKETS),
+        ('histogram', 'scan_advertisements', "Advertisements received per scan, before filtering.",
+         COUNT_BUCKETS),
+        ('histogram', 'process_duration_seconds',
+         "Time taken to process, filter, smooth, and predict each batch of scans.", DURATION_BUCKETS),
+        ('histogram', 'write_duration_seconds', "Time taken to write each batch of advertisements.",
+         DURATION_BUCKETS),
+        ('histogram', 'control_latency_seconds',
+         "Time from receiving a control command until the scanning loop acted on it.", DURATION_BUCKETS)
+    ]
+}
+
+
+class Metrics(object):
+    """Registry of the counters and histograms of one advertiser or scanner run.
+
+    Updates and exports are guarded by a lock, as scans may be processed and
+    written on executor threads.
+
+    Attributes:
+        mode (str): Either 'advertiser' or 'scanner'. Prefixes metric names,
+            e.g. pi_pact_scanner_scans_total.
+        enabled (bool): Whether updates are recorded.
+    """
+
+    def __init__(self, mode: str, enabled: bool = True):
+        """Instance initialization.
+
+        Args:
+            mode (str): Either 'advertiser' or 'scanner'.
+            enabled (bool): Whether updates are recorded.
+        """
+        self.mode: str = mode
+        self.enabled: bool = enabled
+        self.__lock: threading.Lock = threading.Lock()
+        self.__definitions: Dict[str, Tuple[str, str, Optional[List[float]]]] = {
+            name: (kind, description, buckets) for kind, name, description, buckets in METRIC_DEFINITIONS[mode]}
+        self.__counters: Dict[str, float] = {}
+        self.__histograms: Dict[str, Dict[str, Any]] = {}
+        self.reset()
+
+    def reset(self):
+        """Zero every metric."""
+        with self.__lock:
+            for name, (kind, _, buckets) in self.__definitions.items():
+                if kind == 'counter':
+                    self.__counters[name] = 0
+                else:
+                    self.__histograms[name] = {'buckets': buckets, 'counts': [0] * (len(buckets) + 1),
+                                               'count': 0, 'sum': 0.0, 'min': math.inf, 'max': -math.inf}
+
+    def increment(self, name: str, amount: Union[float, int] = 1):
+        """Increment a counter.
+
+        Args:
+            name (str): Counter name, e.g. 'scans_total'.
+            amount (float, int): Non-negative increment.
+        """
+        if not self.enabled:
+            return
+        with self.__lock:
+            self.__counters[name] += amount
+
+    def observe(self, name: str, value: Union[float, int]):
+        """Record one observation in a histogram.
+
+        Args:
+            name (str): Histogram name, e.g. 'scan_duration_seconds'.
+            value (float, int): Observed value.
+        """
+        if not self.enabled:
+            return
+        with self.__lock:
+            histogram = self.__histograms[name]
+            histogram['counts'][bisect_left(histogram['buckets'], value)] += 1  # Note: buckets are upper bounds
+            histogram['count'] += 1
+            histogram['sum'] += value
+            histogram['min'] = min(histogram['min'], value)
+            histogram['max'] = max(histogram['max'], value)
+
+    def render(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        lines = []
+        with self.__lock:
+            for name, (kind, description, _) in self.__definitions.items():
+                full_name = f"pi_pact_{self.mode}_{name}"
+                lines.append(f"# HELP {full_name} {description}")
+                lines.append(f"# TYPE {full_name} {kind}")
+                if kind == 'counter':
+                    lines.append(f"{full_name} {self.__counters[name]}")
+                    continue
+                histogram = self.__histograms[name]
+                cumulative = 0
+                for bound, count in zip(histogram['buckets'] + [math.inf], histogram['counts']):
+                    cumulative += count
+                    label = '+Inf' if bound == math.inf else repr(float(bound))
+                    lines.append(f'{full_name}_bucket{{le="{label}"}} {cumulative}')
+                lines.append(f"{full_name}_sum {histogram['sum']}")
+                lines.append(f"{full_name}_count {histogram['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters and histogram statistics.
+
+        Returns:
+            Dictionary of every counter value and, for every histogram, its
+            count, mean, minimum, maximum, and approximate quantiles,
+            interpolated within buckets. Scanners also report the filter
+            pass rate.
+        """
+        with self.__lock:
+            summary: Dict[str, Any] = dict(self.__counters)
+            for name, histogram in self.__histograms.items():
+                count = histogram['count']
+                statistics: Dict[str, Any] = {'count': count}
+                if count > 0:
+                    statistics.update({'mean': histogram['sum'] / count, 'min': histogram['min'],
+                                       'max': histogram['max']})
+                    for quantile in SUMMARY_QUANTILES:
+                        statistics[f"p{100 * quantile:g}"] = _bucket_quantile(histogram, quantile)
+                summary[name] = statistics
+        if 'advertisements_received_total' in summary:
+            received = summary['advertisements_received_total']
+            summary['filter_pass_rate'] = summary['advertisements_passed_total'] / received if received else None
+        return summary
+
+
+def _bucket_quantile(histogram: Dict[str, Any], quantile: float) -> float:
+    """Approximate a quantile of a histogram by linear interpolation within its bucket."""
+    rank = quantile * histogram['count']
+    cumulative = 0
+    lower = histogram['min']
+    for bound, count in zip(histogram['buckets'] + [math.inf], histogram['counts']):
+        if count > 0 and cumulative + count >= rank:
+            upper = min(bound, histogram['max'])
+            lower = max(lower, histogram['min'])
+            return lower + (upper - lower) * (rank - cumulative) / count
+        cumulative += count
+        lower = bound
+    return histogram['max']
+
+
+class MetricsExporter(object):
+    """Exports metrics while running and summarizes them at shutdown.
+
+    Attributes:
+        metrics (Metrics): Exported metrics.
+        metrics_file (pathlib.Path): Prometheus text format file rewritten
+            every METRICS_INTERVAL, or None. The JSON summary is written
+            next to it with a .json suffix at shutdown.
+        port (int): Port of the local HTTP endpoint serving /metrics in the
+            Prometheus text format and /summary in JSON, or None.
+    """
+
+    def __init__(self, metrics: Metrics, metrics_file: Optional[Path] = None, port: Optional[int] = None):
+        """Instance initialization.
+
+        Args:
+            metrics (Metrics): Exported metrics.
+            metrics_file (pathlib.Path): Prometheus text format file, or None.
+            port (int): Port of the local HTTP endpoint, or None.
+        """
+        self.metrics: Metrics = metrics
+        self.metrics_file: Optional[Path] = metrics_file
+        self.port: Optional[int] = port
+        self.__stopped: threading.Event = threading.Event()
+        self.__threads: List[threading.Thread] = []
+        self.__server = None  # Note: http.server.ThreadingHTTPServer while serving
+
+    def start(self):
+        """Start rewriting the metrics file and serving the HTTP endpoint."""
+        self.__stopped.clear()
+        if self.metrics_file is not None:
+            self.__threads.append(threading.Thread(target=self.__run, name='MetricsExporter', daemon=True))
+        if self.port is not None:
+            from http.server import ThreadingHTTPServer  # Note: only imported when serving metrics
+            self.__server = ThreadingHTTPServer((METRICS_HOST, self.port), _metrics_handler(self.metrics))
+            self.__server.daemon_threads = True
+            self.__threads.append(threading.Thread(target=self.__server.serve_forever, name='MetricsServer',
+                                                   daemon=True))
+        for thread in self.__threads:
+            thread.start()
+
+    def close(self) -> Dict[str, Any]:
+        """Stop exporting, write the final metrics file and JSON summary.
+
+        Returns:
+            Metrics summary.
+        """
+        self.__stopped.set()
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+        for thread in self.__threads:
+            thread.join()
+        self.__threads.clear()
+        summary = self.metrics.summary()
+        if self.metrics_file is not None:
+            write_atomic(self.metrics_file, self.metrics.render())
+            write_atomic(self.metrics_file.with_suffix('.json'), json.dumps(summary, indent=2) + '\n')
+        return summary
+
+    def __run(self):
+        """Rewrite the metrics file every interval until closed."""
+        while not self.__stopped.wait(METRICS_INTERVAL):
+            try:
+                write_atomic(self.metrics_file, self.metrics.render())
+            except OSError:
+                pass  # Note: retried at the next interval
+
+
+def _metrics_handler(metrics: Metrics) -> type:
+    """HTTP request handler class serving the given metrics."""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """Serves /metrics and /summary."""
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = metrics.render(), 'text/plain; version=0.0.4; charset=utf-8'
+            elif self.path == '/summary':
+                body, content_type = json.dumps(metrics.summary()), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *_):
+            pass  # Note: keeps scrapes out of the console
+
+    return MetricsHandler
+
+
+def write_atomic(path: Path, text: str):
+    """Replace a file's contents atomically, so readers never see a partial file."""
+    temporary = path.with_name(f".{path.name}.tmp")
+    with temporary.open('w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
@@ -10,6 +10,7 @@ OPTIONAL_ARGS = ['distance_increment', 'wait_interval']
 
 # List of args specific to this script that cannot be passed to pi_pact.py
 REMOVE_ARGS = ['--distance_increment', '--wait_interval', '--distance_final', '--timeout_final', '--iterations']
+REMOVE_FLAGS = ['--stop_on_error']
 
 
 def parse_args(args: List[str]) -> Dict[str, str]:
@@ -31,6 +32,8 @@ def parse_args(args: List[str]) -> Dict[str, str]:
                         help="Timeout (s) for both beacon advertiser and  scanner modes.")
     parser.add_argument('--wait_interval', type=float,
                         help='The wait in between runs (s).')
+    parser.add_argument('--stop_on_error', action='store_true',
+                        help='Stop at the first failed run instead of continuing with the next.')
 
     # User must select exactly one way for this script to terminate.
     finish_group = parser.add_mutually_exclusive_group(required=True)
@@ -50,6 +53,7 @@ def parse_args(args: List[str]) -> Dict[str, str]:
                             help="Beacon scanner mode.")
     parser.add_argument('--config_yml', help="Configuration YAML.")
     parser.add_argument('--control_file', help="Control file.")
+    parser.add_argument('--control_socket', help="Control socket.")
     parser.add_argument('--scan_prefix', help="Scan output file prefix.")
     parser.add_argument('--uuid', help="Beacon advertiser UUID.")
     parser.add_argument('--major', type=int,
@@ -60,10 +64,40 @@ def parse_args(args: List[str]) -> Dict[str, str]:
                         help="Beacon advertiser TX power.")
     parser.add_argument('--interval', type=int,
                         help="Beacon advertiser interval (ms).")
-    parser.add_argument('--revist', type=int,
+    parser.add_argument('--revisit', type=float,
                         help="Beacon scanner revisit interval (s)")
+    parser.add_argument('--engine', choices=['blocking', 'asyncio'],
+                        help="Beacon scanner engine.")
+    parser.add_argument('--adapters', nargs='+',
+                        help="Bluetooth adapters on which to scan in parallel, e.g. hci0 hci1.")
+    parser.add_argument('--stagger', action='store_true', default=None,
+                        help="Beacon scanner offsets the scans of multiple adapters.")
     parser.add_argument('--use_sense_hat', type=bool,
                         help="Toggles use of sense hat.")
+    parser.add_argument('--stream', action='store_true', default=None,
+                        help="Beacon scanner streams each scan to the output file.")
+    parser.add_argument('--backend', choices=['hardware', 'replay'],
+                        help="Beacon scanner backend.")
+    parser.add_argument('--replay_path',
+                        help="Recorded scan file, folder, or glob pattern to replay.")
+    parser.add_argument('--replay_speed', type=float,
+                        help="Replay speed relative to real time ('inf' for as fast as possible).")
+    parser.add_argument('--segment_size', type=float,
+                        help="Size (MiB) at which streamed output starts a new segment file.")
+    parser.add_argument('--segment_interval', type=float,
+                        help="Time (s) after which streamed output starts a new segment file.")
+    parser.add_argument('--retention', type=float,
+                        help="Total size (MiB) of segment files retained on disk.")
+    parser.add_argument('--output_format', choices=['csv', 'parquet', 'arrow'],
+                        help="Beacon scanner output file format.")
+    parser.add_argument('--smoothing', choices=['ema', 'median', 'kalman'],
+                        help="Beacon scanner per-beacon RSSI smoothing method.")
+    parser.add_argument('--model',
+                        help="Pickled proximity model applied to scanned advertisements.")
+    parser.add_argument('--metrics_file',
+                        help="Prometheus text format file to which metrics are exported.")
+    parser.add_argument('--metrics_port', type=int,
+                        help="Port of a local HTTP endpoint serving metrics.")
     return vars(parser.parse_args(args))
 
 
@@ -79,7 +113,7 @@ def load_config(parsed_args: Dict[str, str]) -> Dict[str, str]:
     config = dict()
 
     for arg in OPTIONAL_ARGS:
-        if parsed_args.get(arg):
+        if parsed_args.get(arg) is not None:
             config[arg] = parsed_args.get(arg)
         else:
             config[arg] = DEFAULT_ARGS.get(arg)
@@ -90,6 +124,10 @@ def load_config(parsed_args: Dict[str, str]) -> Dict[str, str]:
 def main(args: List[str]):
     """Repeatedly runs pi_pact.py with variable distance and interval increments.
 
+    The advertiser or scanner is created once as a pi_pact.Session and each
+    run only changes the pre-measured distance. A failed run is logged by the
+    session and, unless stop_on_error is set, followed by the next run.
+
     Args:
         args (list): Arguments as provided by sys.argv.
 
@@ -106,35 +144,44 @@ def main(args: List[str]):
         if arg in arg_list:
             del arg_list[arg_list.index(arg) + 1]
             arg_list.remove(arg)
-    arg_list[args.index('--distance') + 1] = str(distance)
+    for arg in REMOVE_FLAGS:
+        if arg in arg_list:
+            arg_list.remove(arg)
 
     # Script stops once a certain distance measurement is reached.
     if parsed_args.get('distance_final'):
-        if (distance - parsed_args.get('distance_final')) / config.get('distance_increment') <= 0:
+        if (distance - parsed_args.get('distance_final')) / config.get('distance_increment') > 0:
+            raise ValueError("Distance increment must allow final distance to be reached.")
+
+    with pi_pact.Session(arg_list) as session:
+
+        def run(run_distance: float):
+            try:
+                session.run(distance=run_distance)
+            except Exception:
+                if parsed_args.get('stop_on_error'):
+                    raise  # Note: already logged by the session
+
+        if parsed_args.get('distance_final'):
             while (distance - parsed_args.get('distance_final')) / config.get('distance_increment') <= 0:
-                pi_pact.main(arg_list)
+                run(distance)
+                distance -= config.get('distance_increment')
+                time.sleep(config.get('wait_interval'))
+
+        # Script stops after a given timeout.
+        elif parsed_args.get('timeout_final'):
+            start_time: float = time.monotonic()
+            while (time.monotonic() - start_time) < parsed_args.get('timeout_final'):
+                run(distance)
                 distance -= config.get('distance_increment')
-                arg_list[args.index('--distance') + 1] = str(distance)
                 time.sleep(config.get('wait_interval'))
-        else:
-            raise ValueError("Distance increment must allow final distance to be reached.")
 
-    # Script stops after a given timeout.
-    elif parsed_args.get('timeout_final'):
-        start_time: float = time.monotonic()
-        while (time.monotonic() - start_time) < parsed_args.get('timeout_final'):
-            pi_pact.main(arg_list)
-            distance -= config.get('distance_increment')
-            arg_list[args.index('--distance') + 1] = str(distance)
-            time.sleep(config.get('wait_interval'))
-
-    # Script stops after running n times.
-    else:
-        for i in range(parsed_args.get('iterations')):
-            pi_pact.main(arg_list)
-            distance -= config.get('distance_increment')
-            arg_list[args.index('--distance') + 1] = str(distance)
-            time.sleep(config.get('wait_interval'))
+        # Script stops after running n times.
+        else:
+            for i in range(parsed_args.get('iterations')):
+                run(distance)
+                distance -= config.get('distance_increment')
+                time.sleep(config.get('wait_interval'))
 
 
 if __name__ == '__main__':
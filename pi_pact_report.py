@@ -0,0 +1,265 @@
+"""Headless batch rendering of the data analysis figures.
+
+Renders the figures of the data-analysis plot scripts, along with those of
+the data analysis notebook, to image files without a display. The input of
+every figure is a small aggregate of the recorded data, e.g. the mode RSSI
+of every distance (see pi_pact_histogram) or the RSSI density of every
+distance class (see pi_pact_kde), computed once per report from the compiled
+dataset cache and shared by every figure using it. Figures are rendered in
+parallel worker processes. A digest of each figure's aggregate, plot, and
+options is recorded in a manifest in the output directory, and figures
+whose digest and files are unchanged are skipped, so regenerating a report
+after adding data only renders the figures it changed.
+
+Rendering requires matplotlib. Command line usage:
+
+    python3 pi_pact_report.py --output_dir report --formats png svg
+"""
+
+import argparse
+from functools import partial
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import pandas as pd
+from pathlib import Path
+from pi_pact_histogram import aggregate_dataset
+from pi_pact_kde import kde_dataset
+from pi_pact_metrics import write_atomic
+import sys
+import time
+from typing import *
+
+REPORT_DIR = 'report'  # Note: relative to the repository root
+REPORT_MANIFEST = 'report.json'
+REPORT_VERSION = 1  # Note: changing it renders every figure again
+REPORT_FORMATS = ['png', 'svg']
+REPORT_DPI = 150
+
+
+def _modes(key: str, pattern: str, key_width: Optional[float], root: Path) -> pd.DataFrame:
+    """Mode RSSI of every value, or bin, of a column."""
+    return aggregate_dataset(key, 'RSSI', pattern, root, key_width=key_width, cache=True).mode().to_frame('RSSI')
+
+
+def _densities(label_scheme: str, bandwidth: float, pattern: str, root: Path) -> pd.DataFrame:
+    """RSSI density of every class of a label scheme, with a bandwidth relative to each class's deviation."""
+    return kde_dataset(label_scheme, [bandwidth], pattern, root, relative=True).frame()
+
+
+# Aggregates of the recorded data, by name, each computed from the dataset cache under the report root
+AGGREGATES: Dict[str, Callable[[Path], pd.DataFrame]] = {
+    'distance modes': partial(_modes, 'DISTANCE', 'indoor*/*.csv', None),
+    'humidity modes': partial(_modes, 'HUMIDITY', 'indoor-noObstruct-SenseHat*/*.csv', 1),
+    'temperature modes': partial(_modes, 'TEMPERATURE', 'indoor-noObstruct-SenseHat*/*.csv', 1),
+    'pressure modes': partial(_modes, 'PRESSURE', 'indoor-noObstruct-SenseHat*/*.csv', None),
+    'distance densities': partial(_densities, '3b', 1, 'indoor*/*.csv')
+}
+
+
+def plot_modes(axes, data: pd.DataFrame, independ: str, independ_units: str, depend: str = 'RSSI',
+               depend_units: str = 'dBm', marker: str = 'o'):
+    """Line plot of the mode of a dependent variable vs. an independent variable.
+
+    Args:
+        axes (matplotlib.axes.Axes): Axes to plot on.
+        data (pandas.DataFrame): Modes of the dependent variable column,
+            indexed by independent variable value.
+        independ (str): Independent variable, e.g. 'DISTANCE'.
+        independ_units (str): Units of the independent variable, e.g. 'm'.
+        depend (str): Dependent variable column.
+        depend_units (str): Units of the dependent variable.
+        marker (str): Marker of every mode.
+    """
+    axes.plot(data.index, data[depend], marker=marker, label='mode')
+    axes.legend(loc='upper right')
+    axes.set_xlabel(f'{independ} ({independ_units})')
+    axes.set_ylabel(f'{depend} ({depend_units})')
+    axes.set_title(f'Mode {depend} ({depend_units}) vs. {independ} ({independ_units})')
+
+
+def plot_densities(axes, data: pd.DataFrame, columns: Dict[int, str], title: str):
+    """Line plot of the RSSI densities of distance classes.
+
+    Args:
+        axes (matplotlib.axes.Axes): Axes to plot on.
+        data (pandas.DataFrame): Densities indexed by RSSI (dBm) with one
+            column per class.
+        columns (dict): Legend label of every class to plot, e.g.
+            {1: 'H1', 0: 'H0'}, in order.
+        title (str): Figure title.
+    """
+    for label, name in columns.items():
+        axes.plot(data.index, data[label], label=name)
+    axes.legend(loc='upper left')
+    axes.set_xlabel('RSSI (dBm)')
+    axes.set_ylabel('Density')
+    axes.set_title(title)
+
+
+# Figures of the report, by file name, as (aggregate, plot function, plot options)
+FIGURES: Dict[str, Tuple[str, Callable[..., None], Dict[str, Any]]] = {
+    'mode-rssi-distance': ('distance modes', plot_modes,
+                           {'independ': 'DISTANCE', 'independ_units': 'm', 'marker': '>'}),
+    'mode-rssi-humidity': ('humidity modes', plot_modes, {'independ': 'HUMIDITY', 'independ_units': '%'}),
+    'mode-rssi-temperature': ('temperature modes', plot_modes,
+                              {'independ': 'TEMPERATURE', 'independ_units': 'Degrees C'}),
+    'mode-rssi-pressure': ('pressure modes', plot_modes, {'independ': 'PRESSURE', 'independ_units': 'mbar'}),
+    'kde-binary': ('distance densities', plot_densities,
+                   {'columns': {1: 'H1', 0: 'H0'}, 'title': 'Binary Hypothesis KDE'}),
+    'kde-3b': ('distance densities', plot_densities,
+               {'columns': {2: 'H2', 1: 'H1', 0: 'H0'}, 'title': 'Distance Category KDE'})
+}
+
+
+def figure_digest(data: pd.DataFrame, plot: Callable[..., None], options: Dict[str, Any]) -> str:
+    """Digest of everything a rendered figure depends on.
+
+    Args:
+        data (pandas.DataFrame): Aggregate plotted.
+        plot (callable): Plot function.
+        options (dict): Plot options.
+
+    Returns:
+        Hexadecimal SHA-256 digest of the aggregate's values, index, and
+        columns, the plot function, its options, and REPORT_VERSION.
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    digest.update(json.dumps([REPORT_VERSION, plot.__name__, [str(column) for column in data.columns], options],
+                             sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def render_figure(plot: Callable[..., None], data: pd.DataFrame, options: Dict[str, Any], paths: List[Path]):
+    """Render a figure without a display and save it in every format.
+
+    Args:
+        plot (callable): Plot function taking axes, data, and options.
+        data (pandas.DataFrame): Aggregate to plot.
+        options (dict): Plot options.
+        paths (list): Files to save, with the format as suffix, e.g.
+            report/kde-binary.svg.
+    """
+    import matplotlib  # Note: only imported when rendering
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.style.use('ggplot')
+    figure, axes = plt.subplots()
+    try:
+        plot(axes, data, **options)
+        figure.tight_layout()
+        for path in paths:
+            figure.savefig(path, dpi=REPORT_DPI)
+    finally:
+        plt.close(figure)
+
+
+def _render_figure(arguments: Tuple[Callable[..., None], pd.DataFrame, Dict[str, Any], List[Path]]):
+    """Worker process entry point of render_figure."""
+    render_figure(*arguments)
+
+
+def render_report(output_dir: Union[str, Path] = REPORT_DIR, formats: Iterable[str] = REPORT_FORMATS,
+                  figures: Optional[Iterable[str]] = None, root: Union[str, Path] = '.',
+                  processes: Optional[int] = None, force: bool = False) -> Dict[str, bool]:
+    """Render report figures whose aggregate, plot, or files changed.
+
+    Args:
+        output_dir (str, pathlib.Path): Directory of the figure files and
+            manifest.
+        formats (iterable): Image formats, e.g. ['png', 'svg'].
+        figures (iterable): Names of the figures in FIGURES to render, or
+            None for every figure.
+        root (str, pathlib.Path): Repository root containing the data
+            folders and dataset cache.
+        processes (int): Number of worker processes rendering figures.
+            Defaults to the number of CPUs. Figures are rendered in this
+            process if 1.
+        force (bool): Render every figure, even if unchanged.
+
+    Returns:
+        Whether each figure was rendered (True) or skipped as unchanged
+        (False), by name.
+
+    Raises:
+        ValueError: Figures must be in FIGURES.
+    """
+    names = list(FIGURES) if figures is None else list(figures)
+    if any(name not in FIGURES for name in names):
+        raise ValueError(f"Report figures must be in {list(FIGURES)}.")
+    output_dir = Path(output_dir)
+    formats = list(formats)
+    try:
+        manifest = json.loads((output_dir / REPORT_MANIFEST).read_text())
+    except (OSError, ValueError):
+        manifest = {}
+    aggregates = {name: AGGREGATES[name](Path(root)) for name in sorted(set(FIGURES[name][0] for name in names))}
+    tasks = []
+    rendered = {}
+    for name in names:
+        aggregate, plot, options = FIGURES[name]
+        digest = figure_digest(aggregates[aggregate], plot, options)
+        paths = [output_dir / f"{name}.{extension}" for extension in formats]
+        rendered[name] = force or manifest.get(name) != digest or not all(path.exists() for path in paths)
+        if rendered[name]:
+            tasks.append((plot, aggregates[aggregate], options, paths))
+            manifest[name] = digest
+    if not tasks:
+        return rendered
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+    if processes > 1:
+        # Note: spawned workers, as forking a process with threads running is unsafe
+        with multiprocessing.get_context('spawn').Pool(processes) as pool:
+            pool.map(_render_figure, tasks, chunksize=math.ceil(len(tasks) / (4 * processes)))
+    else:
+        for task in tasks:
+            _render_figure(task)
+    write_atomic(output_dir / REPORT_MANIFEST, json.dumps(manifest, indent=2, sort_keys=True) + '\n')
+    return rendered
+
+
+def parse_args(args: List[str]) -> Dict[str, Any]:
+    """Input argument parser.
+
+    Args:
+        args (list): Input arguments as taken from sys.argv.
+
+    Returns:
+        Dictionary containing parsed input arguments. Keys are argument names.
+    """
+    parser = argparse.ArgumentParser(description="Render the data analysis figures to image files.")
+    parser.add_argument('--output_dir', default=REPORT_DIR, help="Directory of the figure files.")
+    parser.add_argument('--formats', nargs='+', default=REPORT_FORMATS, help="Image formats, e.g. png svg.")
+    parser.add_argument('--figures', nargs='+', choices=list(FIGURES), help="Figures to render. Defaults to all.")
+    parser.add_argument('--processes', type=int,
+                        help="Number of worker processes. Defaults to the number of CPUs.")
+    parser.add_argument('--force', action='store_true', help="Render every figure, even if unchanged.")
+    return vars(parser.parse_args(args))
+
+
+def main(args: List[str]):
+    """Renders the report and prints which figures were rendered and the time taken.
+
+    Args:
+        args (list): Arguments as provided by sys.argv.
+    """
+    parsed_args = parse_args(args)
+    start = time.perf_counter()
+    rendered = render_report(parsed_args['output_dir'], parsed_args['formats'], parsed_args['figures'],
+                             processes=parsed_args['processes'], force=parsed_args['force'])
+    duration = time.perf_counter() - start
+    for name, changed in rendered.items():
+        print(f"{name}: {'rendered' if changed else 'unchanged'}")
+    print(f"Rendered {sum(rendered.values())} of {len(rendered)} figures to {parsed_args['output_dir']} "
+          f"in {duration:.2f} s.")
+
+
+if __name__ == '__main__':
+    """Script execution."""
+    main(sys.argv[1:])
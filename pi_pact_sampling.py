@@ -0,0 +1,262 @@
+"""Class balanced sampling of the recorded scan data.
+
+Every advertisement is given a uniform random key, and the sample of each
+class consists of its SAMPLE_SIZE advertisements with the smallest keys.
+stratified_sample selects them from a loaded dataset with one grouping of
+the labels and a partial sort of the keys of each class, in place of
+masking, sampling, and appending each class in turn. ReservoirSampler selects the same rows from a stream of
+parts, e.g. one scan file at a time, keeping only the current sample of each
+class in memory, so balanced training sets can be built from corpora larger
+than memory:
+
+    data = stratified_sample(load_dataset(['RSSI'], cache=True, label_scheme='binary'), 30000)
+    data = stream_sample(['RSSI'], 30000, 'binary', pattern='*/*.csv')
+
+Given the same random state and file order, both return the same rows.
+
+Command line usage:
+
+    python3 pi_pact_sampling.py --feature_set 4var --label_scheme binary --sample_size 30000 --stream
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from pi_pact_dataset import DEFAULT_PATTERN, LABEL_DTYPE, dataset_files, load_dataset, read_dataset_file, \
+    restore_categories
+from pi_pact_sort import FEATURE_SETS, LABEL_SCHEMES, LabelScheme
+import sys
+import time
+from typing import *
+
+
+def _smallest_keys(labels: np.ndarray, keys: np.ndarray,
+                   sample_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Positions of the sample_size smallest keys of each label.
+
+    Args:
+        labels (numpy.ndarray): Integer class labels.
+        keys (numpy.ndarray): Random key of each label.
+        sample_size (int): Number of positions per label.
+
+    Returns:
+        Positions grouped by label in ascending order and by key within each
+        label, the distinct labels, and the number of positions of each.
+    """
+    order = np.argsort(labels, kind='stable')  # Note: radix sort of integer labels, linear in their number
+    sorted_labels = labels[order]
+    starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]]) if len(order) else order
+    ends = np.r_[starts[1:], len(order)]
+    positions = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        group = order[start:end]
+        if len(group) > sample_size:
+            group = group[np.argpartition(keys[group], sample_size - 1)[:sample_size]]
+        positions.append(group[np.argsort(keys[group])])
+    kept = np.concatenate(positions) if positions else order
+    return kept, sorted_labels[starts], ends - starts
+
+
+def _check_counts(labels: np.ndarray, counts: np.ndarray, sample_size: int):
+    """Raise if any class has fewer advertisements than the sample size."""
+    if np.any(counts < sample_size):
+        raise ValueError(f"Every class must have at least {sample_size} advertisements to sample, found "
+                         f"{dict(zip(labels.tolist(), counts.tolist()))}.")
+
+
+def stratified_sample(data: pd.DataFrame, sample_size: int, label_column: str = 'LABEL',
+                      random_state: Optional[Union[int, np.random.Generator]] = None) -> pd.DataFrame:
+    """Sample the same number of advertisements of every class without replacement.
+
+    Args:
+        data (pandas.DataFrame): Advertisements with a label column, e.g.
+            from pi_pact_dataset.load_dataset with a label_scheme.
+        sample_size (int): Number of advertisements per class.
+        label_column (str): Column of integer class labels.
+        random_state (int, numpy.random.Generator): Seed or generator of the
+            random keys.
+
+    Returns:
+        Sampled advertisements grouped by class in ascending order, in random
+        order within each class, with their original index.
+
+    Raises:
+        ValueError: Every class must have at least sample_size advertisements.
+    """
+    labels = data[label_column].to_numpy()
+    keys = np.random.default_rng(random_state).random(len(labels))
+    kept, classes, counts = _smallest_keys(labels, keys, sample_size)
+    _check_counts(classes, counts, sample_size)
+    return data.iloc[kept]
+
+
+class ReservoirSampler(object):
+    """Stratified sample of a stream of advertisements.
+
+    Each part of the stream is merged with the current sample and only the
+    sample_size advertisements with the smallest random keys of each class
+    are kept, so memory is bounded by the sample and one part.
+
+    Attributes:
+        sample_size (int): Number of advertisements per class.
+        label_column (str): Column of integer class labels.
+    """
+
+    def __init__(self, sample_size: int, label_column: str = 'LABEL',
+                 random_state: Optional[Union[int, np.random.Generator]] = None):
+        """Instance initialization.
+
+        Args:
+            sample_size (int): Number of advertisements per class.
+            label_column (str): Column of integer class labels.
+            random_state (int, numpy.random.Generator): Seed or generator of
+                the random keys.
+
+        Raises:
+            ValueError: Sample size must be strictly positive.
+        """
+        if sample_size <= 0:
+            raise ValueError("Sample size must be strictly positive.")
+        self.sample_size: int = sample_size
+        self.label_column: str = label_column
+        self.__rng: np.random.Generator = np.random.default_rng(random_state)
+        self.__data: Optional[pd.DataFrame] = None
+        self.__keys: np.ndarray = np.empty(0)
+        self.__counts: Dict[int, int] = {}
+
+    @property
+    def counts(self) -> Dict[int, int]:
+        """Number of advertisements of each class seen so far."""
+        return dict(sorted(self.__counts.items()))
+
+    def update(self, data: pd.DataFrame):
+        """Add a part of the stream to the sample.
+
+        Args:
+            data (pandas.DataFrame): Advertisements with a label column.
+        """
+        keys = self.__rng.random(len(data))  # Note: drawn before any merge, so keys follow stream order
+        labels, counts = np.unique(data[self.label_column].to_numpy(), return_counts=True)
+        for label, count in zip(labels.tolist(), counts.tolist()):
+            self.__counts[label] = self.__counts.get(label, 0) + count
+        if self.__data is not None:
+            data = pd.concat([self.__data, data], ignore_index=True)
+            keys = np.concatenate([self.__keys, keys])
+        else:
+            data = data.reset_index(drop=True)
+        kept, _, _ = _smallest_keys(data[self.label_column].to_numpy(), keys, self.sample_size)
+        self.__data = data.iloc[kept].reset_index(drop=True)
+        self.__keys = keys[kept]
+
+    def sample(self) -> pd.DataFrame:
+        """Sampled advertisements.
+
+        Returns:
+            Sampled advertisements grouped by class in ascending order, in
+            random order within each class, with a fresh index.
+
+        Raises:
+            ValueError: Every class must have at least sample_size
+                advertisements.
+        """
+        if self.__data is None:
+            raise ValueError("Reservoir sampler must be updated before sampling.")
+        counts = self.counts
+        _check_counts(np.array(list(counts)), np.array(list(counts.values())), self.sample_size)
+        return restore_categories(self.__data.copy())
+
+
+def stream_sample(columns: Optional[Iterable[str]], sample_size: int, label_scheme: Union[str, LabelScheme],
+                  pattern: str = DEFAULT_PATTERN, root: Union[str, Path] = '.',
+                  files: Optional[Iterable[Union[str, Path]]] = None,
+                  random_state: Optional[Union[int, np.random.Generator]] = None) -> pd.DataFrame:
+    """Stratified sample of recorded scan files, reading one file at a time.
+
+    Args:
+        columns (iterable): Columns to sample, e.g. ['RSSI'], or None for
+            every column.
+        sample_size (int): Number of advertisements per class.
+        label_scheme (str, pi_pact_sort.LabelScheme): Label scheme, or the
+            name of one in pi_pact_sort.LABEL_SCHEMES, with which to label
+            DISTANCE in an additional LABEL column.
+        pattern (str): Glob pattern of CSV scan files relative to the root.
+        root (str, pathlib.Path): Directory the pattern is relative to.
+        files (iterable): CSV scan files to sample instead of those matching
+            the pattern.
+        random_state (int, numpy.random.Generator): Seed or generator of the
+            random keys.
+
+    Returns:
+        Sampled advertisements as from stratified_sample of the same files
+        loaded by pi_pact_dataset.load_dataset, with a fresh index.
+
+    Raises:
+        FileNotFoundError: At least one file must match or be selected.
+        ValueError: Every class must have at least sample_size advertisements.
+    """
+    files = dataset_files(pattern, root) if files is None else [Path(csv_file) for csv_file in files]
+    if not files:
+        raise FileNotFoundError("No recorded scan files matched or selected.")
+    if isinstance(label_scheme, str):
+        label_scheme = LABEL_SCHEMES[label_scheme]
+    columns = None if columns is None else list(columns)
+    read_columns = columns if columns is None or 'DISTANCE' in columns else columns + ['DISTANCE']
+    sampler = ReservoirSampler(sample_size, random_state=random_state)
+    for csv_file in files:
+        part = read_dataset_file(csv_file, read_columns)
+        labels = label_scheme(part['DISTANCE'].to_numpy()).astype(LABEL_DTYPE)
+        part = part[columns] if read_columns is not columns else part
+        part['LABEL'] = labels
+        sampler.update(part)
+    return sampler.sample()
+
+
+def parse_args(args: List[str]) -> Dict[str, Any]:
+    """Input argument parser.
+
+    Args:
+        args (list): Input arguments as taken from sys.argv.
+
+    Returns:
+        Dictionary containing parsed input arguments. Keys are argument names.
+    """
+    parser = argparse.ArgumentParser(description="Sample a class balanced training set of recorded scan files.")
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help="Glob pattern of CSV scan files.")
+    parser.add_argument('--feature_set', choices=list(FEATURE_SETS), default='2var',
+                        help="Model feature set to sample.")
+    parser.add_argument('--label_scheme', choices=list(LABEL_SCHEMES), default='binary',
+                        help="Distance binning method of the labels.")
+    parser.add_argument('--sample_size', type=int, default=30000, help="Number of advertisements per class.")
+    parser.add_argument('--random_state', type=int, default=1, help="Seed of the random sample.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Read one file at a time, keeping only the sample in memory, instead of loading "
+                             "the dataset from its cache.")
+    return vars(parser.parse_args(args))
+
+
+def main(args: List[str]):
+    """Samples a model feature set and prints its sampling time and label counts.
+
+    Args:
+        args (list): Arguments as provided by sys.argv.
+    """
+    parsed_args = parse_args(args)
+    columns = FEATURE_SETS[parsed_args['feature_set']]
+    start = time.perf_counter()
+    if parsed_args['stream']:
+        data = stream_sample(columns, parsed_args['sample_size'], parsed_args['label_scheme'],
+                             parsed_args['pattern'], random_state=parsed_args['random_state'])
+    else:
+        data = stratified_sample(load_dataset(columns, parsed_args['pattern'], cache=True,
+                                              label_scheme=parsed_args['label_scheme']),
+                                 parsed_args['sample_size'], random_state=parsed_args['random_state'])
+    duration = time.perf_counter() - start
+    print(f"Sampled {len(data)} advertisements with features {columns} in {duration:.2f} s.")
+    for label, count in data['LABEL'].value_counts().sort_index().items():
+        print(f"Label {label}: {count} advertisements.")
+
+
+if __name__ == '__main__':
+    """Script execution."""
+    main(sys.argv[1:])
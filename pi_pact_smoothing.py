@@ -0,0 +1,267 @@
+"""Streaming per-beacon RSSI smoothing.
+
+Smoothers keep constant size state per beacon in numpy arrays, indexed by the
+beacon's slot in a pi_pact_state.BeaconStateTable, and update it once per
+received advertisement, so smoothing keeps pace with the scanner regardless
+of session length. Each batch of advertisements is smoothed in as many
+vectorized steps as the most frequent beacon occurs in it, usually once per
+scan, rather than one Python call per advertisement.
+"""
+
+import numpy as np
+import pandas as pd
+from pi_pact_state import occurrences
+from typing import *
+
+SMOOTHED_COLUMN = 'RSSI SMOOTHED'
+# Default parameters of each smoothing method
+SMOOTHING_DEFAULTS: Dict[str, Dict[str, Union[float, int]]] = {
+    'ema': {'alpha': 0.3},
+    'median': {'window': 5},
+    'kalman': {'process_noise': 0.05, 'measurement_noise': 4.0}
+}
+SMOOTHING_METHODS = list(SMOOTHING_DEFAULTS)
+
+
+class RssiSmoother(object):
+    """Base of streaming per-beacon RSSI smoothers.
+
+    State arrays have one row per state table slot. Subclasses allocate their
+    state and update it for a set of distinct slots at a time.
+
+    Attributes:
+        method (str): Smoothing method.
+        capacity (int): Number of slots with allocated state.
+    """
+
+    method = ''
+
+    def __init__(self, capacity: int):
+        """Instance initialization.
+
+        Args:
+            capacity (int): Number of slots with allocated state, i.e. the
+                capacity of the state table.
+        """
+        self.capacity: int = capacity
+        self._state: Dict[str, np.ndarray] = self._allocate(capacity)
+
+    def clear(self, slots: Optional[np.ndarray] = None):
+        """Reset the state of slots, e.g. once assigned to new beacons.
+
+        Args:
+            slots (numpy.ndarray): Slots to reset, or None to reset every
+                slot.
+        """
+        if slots is None:
+            self._state = self._allocate(self.capacity)
+            return
+        initial = self._allocate(len(slots))
+        for name, values in self._state.items():
+            values[slots] = initial[name]
+
+    def _allocate(self, capacity: int) -> Dict[str, np.ndarray]:
+        """Allocate initial state arrays for the given number of slots."""
+        raise NotImplementedError
+
+    def _update(self, rows: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Update the state of distinct rows with one sample each.
+
+        Args:
+            rows (numpy.ndarray): Distinct state rows.
+            values (numpy.ndarray): RSSI sample of each row.
+
+        Returns:
+            Smoothed RSSI of each row after the update.
+        """
+        raise NotImplementedError
+
+    def smooth(self, advertisements: pd.DataFrame, slots: np.ndarray) -> pd.DataFrame:
+        """Smooth the RSSI of advertisements in temporal order.
+
+        Args:
+            advertisements (pandas.DataFrame): Advertisements in temporal
+                order, including RSSI.
+            slots (numpy.ndarray): State table slot of each advertisement, as
+                returned by BeaconStateTable.record. Advertisements without a
+                slot (-1) are not smoothed.
+
+        Returns:
+            Advertisements with the smoothed RSSI inserted after RSSI.
+        """
+        smoothed = np.full(len(advertisements), np.nan, dtype=np.float32)
+        kept = np.flatnonzero(slots >= 0)
+        if len(kept) > 0:
+            rows = slots[kept]
+            values = advertisements['RSSI'].to_numpy(dtype=np.float64)[kept]
+            # Update every slot once per step, in temporal order
+            occurrence = occurrences(rows)
+            by_occurrence = np.argsort(occurrence, kind='stable')
+            bounds = np.cumsum(np.bincount(occurrence))
+            for indices in np.split(by_occurrence, bounds[:-1]):
+                smoothed[kept[indices]] = self._update(rows[indices], values[indices])
+        advertisements = advertisements.copy()
+        advertisements.insert(advertisements.columns.get_loc('RSSI') + 1, SMOOTHED_COLUMN, smoothed)
+        return advertisements
+
+
+class EmaSmoother(RssiSmoother):
+    """Exponential moving average of RSSI.
+
+    Attributes:
+        alpha (float): Weight of the newest sample, in (0, 1].
+    """
+
+    method = 'ema'
+
+    def __init__(self, capacity: int, alpha: float = SMOOTHING_DEFAULTS['ema']['alpha']):
+        """Instance initialization.
+
+        Args:
+            capacity (int): Number of slots with allocated state.
+            alpha (float): Weight of the newest sample, in (0, 1].
+
+        Raises:
+            ValueError: Smoothing alpha must be in (0, 1].
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError("Smoothing alpha must be in (0, 1].")
+        self.alpha: float = alpha
+        super().__init__(capacity)
+
+    def _allocate(self, capacity: int) -> Dict[str, np.ndarray]:
+        return {'mean': np.full(capacity, np.nan)}
+
+    def _update(self, rows: np.ndarray, values: np.ndarray) -> np.ndarray:
+        mean = self._state['mean'][rows]
+        mean = np.where(np.isnan(mean), values, mean + self.alpha * (values - mean))
+        self._state['mean'][rows] = mean
+        return mean
+
+
+class MedianSmoother(RssiSmoother):
+    """Median of the most recent RSSI samples.
+
+    Attributes:
+        window (int): Number of most recent samples.
+    """
+
+    method = 'median'
+
+    def __init__(self, capacity: int, window: int = SMOOTHING_DEFAULTS['median']['window']):
+        """Instance initialization.
+
+        Args:
+            capacity (int): Number of slots with allocated state.
+            window (int): Number of most recent samples.
+
+        Raises:
+            ValueError: Smoothing window must be a strictly positive integer.
+        """
+        if not isinstance(window, int) or window <= 0:
+            raise ValueError("Smoothing window must be a strictly positive integer.")
+        self.window: int = window
+        super().__init__(capacity)
+
+    def _allocate(self, capacity: int) -> Dict[str, np.ndarray]:
+        return {'samples': np.full((capacity, self.window), np.nan), 'count': np.zeros(capacity, dtype=np.int64)}
+
+    def _update(self, rows: np.ndarray, values: np.ndarray) -> np.ndarray:
+        count = self._state['count'][rows]
+        self._state['samples'][rows, count % self.window] = values  # Note: ring buffer
+        self._state['count'][rows] = count + 1
+        samples = self._state['samples'][rows]
+        if (count + 1 >= self.window).all():
+            return np.median(samples, axis=1)
+        return np.nanmedian(samples, axis=1)
+
+
+class KalmanSmoother(RssiSmoother):
+    """One-dimensional Kalman filter of RSSI as a random walk.
+
+    Attributes:
+        process_noise (float): Variance (dBm^2) added to the estimate between
+            samples.
+        measurement_noise (float): Variance (dBm^2) of each RSSI sample.
+    """
+
+    method = 'kalman'
+
+    def __init__(self, capacity: int, process_noise: float = SMOOTHING_DEFAULTS['kalman']['process_noise'],
+                 measurement_noise: float = SMOOTHING_DEFAULTS['kalman']['measurement_noise']):
+        """Instance initialization.
+
+        Args:
+            capacity (int): Number of slots with allocated state.
+            process_noise (float): Variance (dBm^2) added to the estimate
+                between samples.
+            measurement_noise (float): Variance (dBm^2) of each RSSI sample.
+
+        Raises:
+            ValueError: Smoothing noise variances must be strictly positive.
+        """
+        if process_noise <= 0 or measurement_noise <= 0:
+            raise ValueError("Smoothing noise variances must be strictly positive.")
+        self.process_noise: float = process_noise
+        self.measurement_noise: float = measurement_noise
+        super().__init__(capacity)
+
+    def _allocate(self, capacity: int) -> Dict[str, np.ndarray]:
+        return {'estimate': np.full(capacity, np.nan), 'variance': np.full(capacity, np.nan)}
+
+    def _update(self, rows: np.ndarray, values: np.ndarray) -> np.ndarray:
+        estimate = self._state['estimate'][rows]
+        variance = self._state['variance'][rows]
+        variance = variance + self.process_noise
+        gain = variance / (variance + self.measurement_noise)
+        new = np.isnan(estimate)  # Note: the first sample is taken as is
+        estimate = np.where(new, values, estimate + gain * (values - estimate))
+        self._state['estimate'][rows] = estimate
+        self._state['variance'][rows] = np.where(new, self.measurement_noise, (1 - gain) * variance)
+        return estimate
+
+
+SMOOTHERS: Dict[str, Type[RssiSmoother]] = {'ema': EmaSmoother, 'median': MedianSmoother, 'kalman': KalmanSmoother}
+
+
+def create_smoother(settings: Union[str, Mapping[str, Any]], capacity: int) -> RssiSmoother:
+    """Create an RSSI smoother from smoothing settings.
+
+    Args:
+        settings (str, dict): Smoothing method, or dictionary of the method
+            keyed by 'method' and its parameters, e.g. {'method': 'ema',
+            'alpha': 0.5}. Missing parameters use their defaults.
+        capacity (int): Number of slots with allocated state, i.e. the
+            capacity of the state table.
+
+    Returns:
+        The configured smoother.
+
+    Raises:
+        ValueError: Smoothing method must be one of the smoothing methods.
+        KeyError: Smoothing parameters must be parameters of the method.
+    """
+    if isinstance(settings, str):
+        settings = {'method': settings}
+    parameters = dict(settings)
+    method = parameters.pop('method', None)
+    if method not in SMOOTHERS:
+        raise ValueError(f"Smoothing method must be one of the smoothing methods {SMOOTHING_METHODS}.")
+    for key in parameters:
+        if key not in SMOOTHING_DEFAULTS[method]:
+            raise KeyError(f"Smoothing parameters of {method} must be one of {list(SMOOTHING_DEFAULTS[method])}.")
+    return SMOOTHERS[method](capacity, **{**SMOOTHING_DEFAULTS[method], **parameters})
+
+
+def smoother_slot_bytes(settings: Union[str, Mapping[str, Any]]) -> int:
+    """Memory (bytes) of the state a smoother keeps per slot.
+
+    Args:
+        settings (str, dict): Smoothing method, or dictionary of the method
+            and its parameters, as for create_smoother.
+
+    Returns:
+        Bytes of every state array per slot, e.g. 8 for the mean of ema, or
+        8 per sample of the window plus 8 for the count of median.
+    """
+    return sum(values.nbytes for values in create_smoother(settings, 1)._state.values())
@@ -1,4 +1,6 @@
 import math
+import numpy as np
+from typing import *
 
 
 def categorize(distance: float) -> int:
@@ -27,3 +29,122 @@ def bin_categorize(distance: float) -> int:
         return 1
     else:
         return 0
+
+
+class LabelScheme(object):
+    """Vectorized distance binning method defined by bin edges.
+
+    Distances are labelled with a single np.digitize call over all of them.
+    Bins include their lower edge, i.e. [edges[i - 1], edges[i]). Calling a
+    scheme with a scalar distance returns an int, like categorize and
+    bin_categorize, and with an array returns an array of labels.
+
+    Attributes:
+        name (str): Scheme name, used in model file names, e.g. 'binary' in
+            4var-binary-xgboost-model.pickle.
+        edges (numpy.ndarray): Ascending bin edges (m), or None for bins of a
+            fixed width starting at 0 m.
+        labels (numpy.ndarray): Label of each bin, from the bin below the
+            first edge to the bin above the last edge, or None to number
+            bins from 0.
+        width (float): Bin width (m) if edges is None.
+    """
+
+    def __init__(self, name: str, edges: Optional[Sequence[float]] = None, labels: Optional[Sequence[int]] = None,
+                 width: Optional[float] = None):
+        """Instance initialization.
+
+        Args:
+            name (str): Scheme name. Must not contain '-', which separates
+                the parts of model file names.
+            edges (list): Ascending bin edges (m).
+            labels (list): Label of each of the len(edges) + 1 bins, or None
+                to number bins from 0.
+            width (float): Bin width (m), instead of edges.
+
+        Raises:
+            ValueError: Label scheme must have a name without '-' and either
+                strictly ascending edges with one label per bin or a strictly
+                positive width.
+        """
+        if not name or '-' in name:
+            raise ValueError("Label scheme name must be non-empty and must not contain '-'.")
+        if (edges is None) == (width is None):
+            raise ValueError("Label scheme must be defined by either bin edges or a bin width.")
+        if edges is not None:
+            edges = np.asarray(edges, dtype=np.float64)
+            if edges.ndim != 1 or len(edges) == 0 or np.any(np.diff(edges) <= 0):
+                raise ValueError("Label scheme edges must be a non-empty strictly ascending sequence.")
+            if labels is not None:
+                labels = np.asarray(labels, dtype=np.int64)
+                if labels.shape != (len(edges) + 1,):
+                    raise ValueError("Label scheme must have one label per bin, i.e. one more than edges.")
+        elif width <= 0:
+            raise ValueError("Label scheme width must be strictly positive.")
+        elif labels is not None:
+            raise ValueError("Label scheme labels require bin edges.")
+        self.name: str = name
+        self.edges: Optional[np.ndarray] = edges
+        self.labels: Optional[np.ndarray] = labels
+        self.width: Optional[float] = width
+
+    def __repr__(self) -> str:
+        return f"LabelScheme({self.name!r}, {self.definition()})"
+
+    def __call__(self, distance: Union[float, np.ndarray]) -> Union[int, np.ndarray]:
+        """Label distances.
+
+        Args:
+            distance (float, numpy.ndarray): Pre-measured distance(s) (m).
+
+        Returns:
+            The label of a scalar distance, or an int64 array of the label of
+            each distance.
+        """
+        distances = np.asarray(distance, dtype=np.float64)
+        if self.edges is None:
+            labels = np.floor(distances / self.width).astype(np.int64)
+        else:
+            labels = np.digitize(distances, self.edges)
+            if self.labels is not None:
+                labels = self.labels[labels]
+        return int(labels) if labels.ndim == 0 else labels
+
+    def definition(self) -> Dict[str, Any]:
+        """Edges, labels, and width of the scheme as plain Python values, e.g. to detect stale cached labels."""
+        return {'edges': None if self.edges is None else self.edges.tolist(),
+                'labels': None if self.labels is None else self.labels.tolist(), 'width': self.width}
+
+
+# Features of each model feature set, in training order
+FEATURE_SETS: Dict[str, List[str]] = {'2var': ['RSSI'],
+                                      '3varH': ['RSSI', 'HUMIDITY'],
+                                      '3varP': ['RSSI', 'PRESSURE'],
+                                      '4var': ['RSSI', 'HUMIDITY', 'PRESSURE']}
+
+# Label schemes of the trained models, by name
+LABEL_SCHEMES: Dict[str, LabelScheme] = {}
+
+
+def register_label_scheme(name: str, edges: Optional[Sequence[float]] = None,
+                          labels: Optional[Sequence[int]] = None, width: Optional[float] = None) -> LabelScheme:
+    """Define a label scheme and add it to LABEL_SCHEMES.
+
+    Args:
+        name (str): Scheme name, e.g. 'halfMeter'.
+        edges (list): Ascending bin edges (m).
+        labels (list): Label of each of the len(edges) + 1 bins, or None to
+            number bins from 0.
+        width (float): Bin width (m), instead of edges.
+
+    Returns:
+        The registered scheme, replacing any scheme of the same name.
+    """
+    scheme = LabelScheme(name, edges, labels, width)
+    LABEL_SCHEMES[name] = scheme
+    return scheme
+
+
+register_label_scheme('binary', edges=[2], labels=[1, 0])  # Note: as bin_categorize, near (1) below 2 m
+register_label_scheme('3b', width=1)  # Note: as categorize, the floor of the distance in meters
+register_label_scheme('b3', width=1)  # Note: earlier name of '3b' in some of the shipped model file names
@@ -0,0 +1,220 @@
+"""Bounded per-beacon state of a running scanner.
+
+The state table assigns each beacon address a slot of preallocated numpy
+arrays holding a ring buffer of its most recent RSSI samples and timestamps,
+along with its sample count and first and last time seen. The number of slots
+is fixed by a memory cap. Addresses not seen for longer than a time to live
+(TTL) are evicted, and once every slot is taken the least recently seen
+address is evicted, so memory stays flat however many rotating addresses
+pass by. Address lookups and updates are O(1) dictionary operations, and
+samples of a batch of advertisements are stored with vectorized assignments.
+"""
+
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from typing import *
+
+ADDRESS_OVERHEAD = 200  # (bytes) Approximate memory of one address string and its dictionary entry
+NEVER = np.iinfo(np.int64).max  # Note: first seen time of an empty slot
+
+
+def occurrences(rows: np.ndarray) -> np.ndarray:
+    """Number each element by its occurrence among equal elements.
+
+    Args:
+        rows (numpy.ndarray): Integer array, e.g. slots of advertisements in
+            temporal order.
+
+    Returns:
+        Array of the same length which is 0 for the first occurrence of each
+        value, 1 for the second, and so on.
+    """
+    order = np.argsort(rows, kind='stable')
+    starts = np.flatnonzero(np.r_[True, rows[order][1:] != rows[order][:-1]])
+    occurrence = np.empty(len(rows), dtype=np.int64)
+    occurrence[order] = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+    return occurrence
+
+
+class BeaconStateTable(object):
+    """Address keyed table of recent samples per beacon with bounded memory.
+
+    Attributes:
+        window (int): Number of most recent samples retained per beacon.
+        ttl (float, int): Time (s) after which a beacon not seen is evicted,
+            or None.
+        capacity (int): Maximum number of beacons, fixed by the memory cap.
+        stats (dict): Number of beacons evicted by TTL and by LRU, and
+            samples dropped because their beacon was evicted by a later
+            beacon of the same batch.
+    """
+
+    def __init__(self, window: int = 16, ttl: Optional[Union[float, int]] = None,
+                 max_memory: Union[float, int] = 8, listener_bytes: int = 0):
+        """Instance initialization. Allocates every slot.
+
+        Args:
+            window (int): Number of most recent samples retained per beacon.
+            ttl (float, int): Time (s) after which a beacon not seen is
+                evicted, or None to only evict least recently seen beacons.
+            max_memory (float, int): Memory cap (MiB) of the table, including
+                the state of its listeners.
+            listener_bytes (int): Memory (bytes) of the state kept per slot by
+                listeners subscribing to the table, e.g. an RSSI smoother (see
+                pi_pact_smoothing.smoother_slot_bytes).
+
+        Raises:
+            ValueError: State table memory cap must allow at least one beacon.
+        """
+        self.window: int = window
+        self.ttl: Optional[Union[float, int]] = ttl
+        slot_bytes = window * (np.dtype(np.int8).itemsize + np.dtype(np.int64).itemsize) + 3 * 8 + ADDRESS_OVERHEAD \
+            + listener_bytes
+        self.capacity: int = int(max_memory * 2 ** 20 // slot_bytes)
+        if self.capacity < 1:
+            raise ValueError("State table memory cap must allow at least one beacon.")
+        self.stats: Dict[str, int] = {}
+        self.__rssi: np.ndarray = np.zeros((self.capacity, window), dtype=np.int8)
+        self.__timestamps: np.ndarray = np.zeros((self.capacity, window), dtype=np.int64)  # Note: datetime64[ns]
+        self.__count: np.ndarray = np.zeros(self.capacity, dtype=np.int64)
+        self.__first_seen: np.ndarray = np.full(self.capacity, NEVER, dtype=np.int64)
+        self.__last_seen: np.ndarray = np.zeros(self.capacity, dtype=np.int64)
+        self.__slots: 'OrderedDict[str, int]' = OrderedDict()  # Note: least recently seen first
+        self.__free: List[int] = []
+        self.__listeners: List[Callable[[np.ndarray], None]] = []
+        self.clear()
+
+    def __len__(self) -> int:
+        """Number of beacons in the table."""
+        return len(self.__slots)
+
+    def __contains__(self, address: str) -> bool:
+        """Whether a beacon is in the table."""
+        return address in self.__slots
+
+    def subscribe(self, listener: Callable[[np.ndarray], None]):
+        """Register a listener called with slots assigned to new beacons.
+
+        Listeners keeping their own state per slot, e.g. RSSI smoothers, reset
+        it for these slots.
+
+        Args:
+            listener (callable): Called with an array of slots.
+        """
+        self.__listeners.append(listener)
+
+    def clear(self):
+        """Evict every beacon and reset statistics."""
+        self.__slots.clear()
+        self.__free = list(range(self.capacity - 1, -1, -1))
+        self.stats = {'ttl_evictions': 0, 'lru_evictions': 0, 'dropped': 0}
+
+    def get(self, address: str) -> Optional[Dict[str, Any]]:
+        """Recent samples and statistics of a beacon.
+
+        Args:
+            address (str): Beacon address.
+
+        Returns:
+            Dictionary of the beacon's retained RSSI samples and TIMESTAMPs
+            from oldest to newest, total sample count, and first and last
+            time seen, or None if the beacon is not in the table.
+        """
+        slot = self.__slots.get(address)
+        if slot is None:
+            return None
+        count = self.__count[slot]
+        order = (np.arange(max(0, count - self.window), count)) % self.window
+        return {'RSSI': self.__rssi[slot, order].copy(),
+                'TIMESTAMP': self.__timestamps[slot, order].astype('datetime64[ns]'),
+                'count': int(count), 'first_seen': np.datetime64(int(self.__first_seen[slot]), 'ns'),
+                'last_seen': np.datetime64(int(self.__last_seen[slot]), 'ns')}
+
+    def status(self) -> Dict[str, int]:
+        """Number of beacons, capacity, and eviction statistics."""
+        return {'beacons': len(self.__slots), 'capacity': self.capacity, **self.stats}
+
+    def record(self, advertisements: pd.DataFrame) -> np.ndarray:
+        """Store advertisements in the table.
+
+        Args:
+            advertisements (pandas.DataFrame): Advertisements in temporal
+                order, including ADDRESS, TIMESTAMP, and RSSI.
+
+        Returns:
+            Slot of each advertisement, or -1 for samples dropped because
+            more beacons than the table capacity were received in the batch.
+        """
+        if len(advertisements) == 0:
+            return np.empty(0, dtype=np.int64)
+        addresses = advertisements['ADDRESS'].astype('category')
+        codes = addresses.cat.codes.to_numpy().astype(np.int64)
+        timestamps = advertisements['TIMESTAMP'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        self.__expire(int(timestamps.max()))
+        # Assign slots from least to most recently seen address of the batch
+        last_index = np.full(len(addresses.cat.categories), -1, dtype=np.int64)
+        np.maximum.at(last_index, codes, np.arange(len(codes)))
+        seen = np.flatnonzero(last_index >= 0)
+        seen = seen[np.argsort(last_index[seen])]
+        categories = addresses.cat.categories.astype(str).tolist()
+        category_slots = np.full(len(categories), -1, dtype=np.int64)
+        fresh = []
+        for code in seen:
+            address = categories[code]
+            slot = self.__slots.get(address)
+            if slot is None:
+                slot = self.__assign(address)
+                fresh.append(slot)
+            else:
+                self.__slots.move_to_end(address)
+            category_slots[code] = slot
+        # Drop addresses evicted again within the batch
+        for code in seen[:max(0, len(seen) - self.capacity)]:
+            if self.__slots.get(categories[code]) != category_slots[code]:
+                category_slots[code] = -1
+        if fresh:
+            fresh = np.array(fresh, dtype=np.int64)
+            self.__count[fresh] = 0
+            self.__first_seen[fresh] = NEVER
+            for listener in self.__listeners:
+                listener(fresh)
+        slots = category_slots[codes]
+        kept = slots >= 0
+        self.stats['dropped'] += int((~kept).sum())
+        # Write the most recent window of samples of each slot into its ring buffer
+        kept_slots = slots[kept]
+        occurrence = occurrences(kept_slots)
+        _, inverse, total = np.unique(kept_slots, return_inverse=True, return_counts=True)
+        recent = occurrence >= total[inverse] - self.window
+        positions = (self.__count[kept_slots] + occurrence) % self.window
+        rows = kept_slots[recent]
+        self.__rssi[rows, positions[recent]] = advertisements['RSSI'].to_numpy()[kept][recent]
+        self.__timestamps[rows, positions[recent]] = timestamps[kept][recent]
+        np.add.at(self.__count, kept_slots, 1)
+        np.minimum.at(self.__first_seen, kept_slots, timestamps[kept])
+        np.maximum.at(self.__last_seen, kept_slots, timestamps[kept])
+        return slots
+
+    def __assign(self, address: str) -> int:
+        """Assign a free slot to a new address, evicting the least recently seen if full."""
+        if not self.__free:
+            _, slot = self.__slots.popitem(last=False)
+            self.stats['lru_evictions'] += 1
+            self.__free.append(slot)
+        slot = self.__free.pop()
+        self.__slots[address] = slot
+        return slot
+
+    def __expire(self, now: int):
+        """Evict addresses not seen within the TTL before now (ns)."""
+        if self.ttl is None:
+            return
+        deadline = now - int(self.ttl * 1e9)
+        while self.__slots:
+            address, slot = next(iter(self.__slots.items()))
+            if self.__last_seen[slot] >= deadline:
+                break
+            del self.__slots[address]
+            self.__free.append(slot)
+            self.stats['ttl_evictions'] += 1